@@ -1,19 +1,29 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+from scipy.sparse import csr_matrix
 import os
+from instrumentation import span, timed, increment
+from catalogue import TrackCatalogue
+from content_features import ContentFeatureBuilder, AppendableRows, _reserve
+from fallback_tables import FallbackTables
+from top_k import top_k
 
 class ContentBasedRecommender:
     """
     A content-based recommender system for Spotify tracks based on genres and artists.
     """
-    def __init__(self, spotify_data_path=None):
+    def __init__(self, spotify_data_path=None, deduplicate=True, statistics=None):
         """
         Initializes the recommender by loading the Spotify data.
         
         Args:
             spotify_data_path (str, optional): The file path to the Spotify dataset CSV file.
                                              If None, will automatically find the dataset.
+            deduplicate (bool): Collapse repeated track_ids into one catalogue item whose
+                                `track_genre` lists all of its genres.
+            statistics (EDAAccumulator, optional): Stored dataset statistics
+                (`eda_store.dataset_statistics`); the fallback tables rank tracks
+                without a popularity by their genre's prior.
         """
         if spotify_data_path is None:
             spotify_data_path = self._find_dataset()
@@ -21,9 +31,21 @@ class ContentBasedRecommender:
         if not os.path.exists(spotify_data_path):
             raise FileNotFoundError(f"Dataset not found at: {spotify_data_path}")
             
-        self.spotify_df = pd.read_csv(spotify_data_path)
+        with span('content.load'):
+            self.spotify_df = pd.read_csv(spotify_data_path)
+
+        self.catalogue = None
+        if deduplicate:
+            self.catalogue = TrackCatalogue(self.spotify_df)
+            self.spotify_df = self.catalogue.items
         self.tfidf_matrix = None
-        self.track_indices = None
+        self.feature_builder = None
+        self.fallback = None
+        self.statistics = statistics
+        self._track_indices = None
+        self.item_shards = None
+        self.tables = None
+        self.candidate_generator = None
     
     def _find_dataset(self):
         """Automatically find the dataset file."""
@@ -45,80 +67,413 @@ class ContentBasedRecommender:
         # If not found, return the default relative path
         return '../data/dataset.csv'
 
-    def fit(self):
+    @property
+    def spotify_df(self):
+        """The catalogue's rows; tracks from `add_tracks` are concatenated on first read."""
+        if self._appended_frames:
+            self._spotify_df = pd.concat([self._spotify_df, *self._appended_frames], ignore_index=True)
+            self._appended_frames = []
+        return self._spotify_df
+
+    @spotify_df.setter
+    def spotify_df(self, frame):
+        self._spotify_df = frame
+        self._appended_frames = []
+
+    @property
+    def track_indices(self):
+        """Row of every track by name (repeated for repeated names)."""
+        self._merge_added_names()
+        return self._track_indices
+
+    @property
+    def first_track_rows(self):
+        """First row of every distinct track name."""
+        self._merge_added_names()
+        return self._first_track_rows
+
+    @timed('content.fit')
+    def fit(self, lean=False, **feature_options):
         """
         Preprocesses the data and computes the TF-IDF matrix for track genres and artists.
         This method must be called before `recommend`.
+
+        Args:
+            lean (bool): Use ContentFeatureBuilder (whole-artist and genre tokens,
+                         float32 CSR, optional vocabulary cap or hashing) instead of
+                         TfidfVectorizer on a combined text column.
+            **feature_options: Options passed to ContentFeatureBuilder, e.g.
+                               `max_artists` or `n_hash_features`.
         """
 
         # CHANGED: Use 'genres' and 'artists' columns, fill missing values
         self.spotify_df['track_genre'] = self.spotify_df['track_genre'].fillna('')
         self.spotify_df['artists'] = self.spotify_df['artists'].fillna('')
 
-        # Combine genres and artists for richer content representation
-        self.spotify_df['content'] = self.spotify_df['track_genre'] + ' ' + self.spotify_df['artists']
+        if lean:
+            self.feature_builder = ContentFeatureBuilder(**feature_options)
+            self.tfidf_matrix = self.feature_builder.fit_transform(self.spotify_df)
+        else:
+            self.feature_builder = None
+            # Combine genres and artists for richer content representation
+            self.spotify_df['content'] = self.spotify_df['track_genre'] + ' ' + self.spotify_df['artists']
 
-        # TfidfVectorizer
-        tfidf = TfidfVectorizer(stop_words='english')
+            # TfidfVectorizer (sklearn is imported here, not at module import)
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            tfidf = TfidfVectorizer(stop_words='english')
 
-        # TF-IDF-matrix on combined content
-        self.tfidf_matrix = tfidf.fit_transform(self.spotify_df['content'])
+            # TF-IDF-matrix on combined content
+            self.tfidf_matrix = tfidf.fit_transform(self.spotify_df['content'])
 
         # Create index for track names
-        self.track_indices = pd.Series(self.spotify_df.index, index=self.spotify_df['track_name']).drop_duplicates()
+        self._track_indices = pd.Series(self.spotify_df.index, index=self.spotify_df['track_name']).drop_duplicates()
+        # First row of every name and a code per row, for vectorized multi-seed lookups
+        self._first_track_rows = self._track_indices[~self._track_indices.index.duplicated()]
+        self.track_name_codes = pd.factorize(self.spotify_df['track_name'])[0]
+        self.track_names = self.spotify_df['track_name'].to_numpy(dtype=object)
         # CHANGED: 'title' -> 'track_name'
 
-    def recommend(self, track_name, num_recommendations=5):
+        # Popularity heads per genre and artist, for seeds outside the dataset
+        self.fallback = FallbackTables(self.spotify_df, statistics=self.statistics)
+
+        # Tables, candidates and shards were built from the previous TF-IDF rows
+        if self.tables is not None or self.candidate_generator is not None or self.item_shards is not None:
+            print("Model refitted: dropping precomputed tables, candidate generator and item shards.")
+            self.tables = self.candidate_generator = None
+            self.shard_items(0)
+
+        # State of add_tracks: growable buffers and names added since the name index was built
+        self._rows = None
+        self._names, self._codes = self.track_names, self.track_name_codes
+        self._added_first_rows = {}
+        self._added_track_ids = set()
+        self._n_name_codes = int(self.track_name_codes.max()) + 1 if len(self.track_name_codes) else 0
+
+    def track_rows(self, names):
+        """
+        First row of every track name, including tracks added since the name
+        index was last rebuilt.
+
+        Returns:
+            np.ndarray: Row per name; -1 for unknown names.
+        """
+        positions = self._first_track_rows.index.get_indexer(names)
+        rows = np.where(positions >= 0, self._first_track_rows.to_numpy()[positions], -1).astype(np.int64)
+        if self._added_first_rows:
+            missing = np.flatnonzero(rows < 0)
+            rows[missing] = [self._added_first_rows.get(name, -1) for name in np.asarray(names, dtype=object)[missing]]
+        return rows
+
+    def _merge_added_names(self):
+        """Fold the names added by `add_tracks` into the pandas name index."""
+        if self._track_indices is None or len(self._track_indices) == len(self.track_names):
+            return
+        start = len(self._track_indices)
+        added = pd.Series(np.arange(start, len(self.track_names)), index=self.track_names[start:])
+        self._track_indices = pd.concat([self._track_indices, added])
+        self._first_track_rows = pd.concat([self._first_track_rows, pd.Series(self._added_first_rows, dtype=np.int64)])
+        self._added_first_rows = {}
+
+    def prepare_for_serving(self):
+        """
+        Finish the work `add_tracks` defers to the next read, so that queries
+        only read state and can run on many threads (see model_snapshots).
+        """
+        self._merge_added_names()
+        self.spotify_df = self.spotify_df
+
+    @timed('content.add_tracks')
+    def add_tracks(self, df, refresh_fraction=0.1):
+        """
+        Append new tracks to the fitted catalogue without refitting.
+
+        Rows are featurised with the fitted vocabulary, extended for new genres
+        and artists, and appended to the TF-IDF matrix in amortised O(len(df)).
+        Earlier rows keep the IDF weights they were last weighted with; once the
+        catalogue has grown by `refresh_fraction` since then, every row is
+        re-weighted from the maintained document frequencies. New names are
+        looked up through an overlay that is merged into the name index at the
+        same point (or when `track_indices` is read), and the rows are
+        concatenated onto `spotify_df` when it is next read.
+
+        Precomputed tables, the candidate generator and item shards describe
+        the old catalogue and are dropped.
+
+        Args:
+            df (pd.DataFrame): New tracks with the dataset's columns.
+            refresh_fraction (float): Growth that triggers IDF re-weighting and the index merge.
+
+        Returns:
+            int: Number of tracks added. With a deduplicated catalogue, repeated
+                 track_ids are merged and already known ones skipped.
+        """
+        if self.tfidf_matrix is None:
+            raise ValueError("The model has not been fitted yet. Please call the 'fit' method first.")
+        if self.feature_builder is None:
+            raise ValueError("add_tracks needs the lean features kept by fit(lean=True).")
+        if not self.tfidf_matrix.data.flags.writeable:
+            # Most appends go to fresh arrays, so a frozen model would not fail on its own
+            raise ValueError("The model is served from a read-only ModelSnapshot; "
+                             "add tracks to a new fit and publish it instead.")
+
+        if self.catalogue is not None:
+            df = TrackCatalogue(df).items
+            ids = df['track_id'].to_numpy(dtype=object)
+            known = self.catalogue.track_id_to_idx.index.get_indexer(ids) >= 0
+            if self._added_track_ids:
+                known |= np.fromiter((track_id in self._added_track_ids for track_id in ids), bool, len(ids))
+            df = df[~known]
+            self._added_track_ids.update(df['track_id'])
+        if len(df) == 0:
+            return 0
+        df = df.assign(track_genre=df['track_genre'].fillna(''), artists=df['artists'].fillna(''))
+
+        with span('content.add_tracks.features'):
+            rows = self.feature_builder.partial_fit_transform(df)
+        if self._rows is None:
+            self._rows = AppendableRows(self.tfidf_matrix)
+        self._rows.append(rows)
+        self.tfidf_matrix = self._rows.matrix
+
+        start, stop = len(self.track_names), len(self.track_names) + len(df)
+        names = df['track_name'].to_numpy(dtype=object)
+        codes, distinct = pd.factorize(names, use_na_sentinel=False)
+        distinct = np.asarray(distinct, dtype=object)
+        existing = self.track_rows(distinct)
+        new = existing < 0
+        distinct_codes = np.empty(len(distinct), dtype=self.track_name_codes.dtype)
+        distinct_codes[~new] = self.track_name_codes[existing[~new]]
+        distinct_codes[new] = self._n_name_codes + np.arange(new.sum())
+        self._n_name_codes += int(new.sum())
+        first = start + np.unique(codes, return_index=True)[1]
+        self._added_first_rows.update(zip(distinct[new], first[new]))
+
+        self._names = _reserve(self._names, start, stop)
+        self._codes = _reserve(self._codes, start, stop)
+        self._names[start:stop] = names
+        self._codes[start:stop] = distinct_codes[codes]
+        self.track_names = self._names[:stop]
+        self.track_name_codes = self._codes[:stop]
+        self._appended_frames.append(df)
+
+        if self.tables is not None or self.candidate_generator is not None or self.item_shards is not None:
+            print("Catalogue changed: dropping precomputed tables, candidate generator and item shards.")
+            self.tables = self.candidate_generator = None
+            self.shard_items(0)
+
+        builder = self.feature_builder
+        if builder.n_documents - builder.weighted_documents > refresh_fraction * builder.weighted_documents:
+            with span('content.add_tracks.reweight'):
+                self._rows = AppendableRows(builder.reweight(self.tfidf_matrix))
+                self.tfidf_matrix = self._rows.matrix
+                self._merge_added_names()
+        increment('content.tracks_added', len(df))
+        return len(df)
+
+    def shard_items(self, n_shards):
+        """
+        Serve `recommend` from `n_shards` worker processes, each holding a
+        contiguous slice of the TF-IDF rows and returning its local top-k.
+
+        Args:
+            n_shards (int): Number of shards; 0 or None goes back to single-process scoring.
+        """
+        from sharded_scoring import ShardedScorer
+
+        if self.tfidf_matrix is None:
+            raise ValueError("The model has not been fitted yet. Please call the 'fit' method first.")
+        if self.item_shards is not None:
+            self.item_shards.close()
+            self.item_shards = None
+        if n_shards:
+            # TF-IDF rows are L2-normalised, so dot products are cosine similarities
+            self.item_shards = ShardedScorer.from_matrix(self.tfidf_matrix, n_shards)
+
+    def use_tables(self, tables):
+        """
+        Answer `recommend` from precomputed top-N tables where possible.
+
+        Args:
+            tables (RecommendationTables or None): Tables from `recommendation_tables.build_tables`;
+                                                   None goes back to live scoring.
+        """
+        if tables is not None and not tables.matches_content(self):
+            print("Recommendation tables were built for another catalogue; using live scoring.")
+            tables = None
+        self.tables = tables
+
+    def use_candidate_generator(self, generator):
+        """
+        Rank only the tracks a CandidateGenerator proposes instead of every track.
+
+        Args:
+            generator (CandidateGenerator or None): Generator over this recommender's
+                                                    tracks; None goes back to full scoring.
+        """
+        if generator is not None and generator.n_items != len(self.spotify_df):
+            raise ValueError("The candidate generator was built for another catalogue.")
+        self.candidate_generator = generator
+
+    @timed('content.recommend')
+    def recommend(self, track_name, num_recommendations=5, reranker=None, seed_metadata=None):
         """
         Recommends tracks similar to a given track name.
         
         Args:
             track_name (str): The name of the track to get recommendations for.
             num_recommendations (int): The number of recommendations to return.
+            reranker (DiversityReranker, optional): Diversify the top `reranker.pool_size`
+                                                    candidates instead of returning the nearest tracks.
+            seed_metadata (dict, optional): 'artists' and 'genres' of the track (e.g. from
+                                            `fallback_tables.seed_metadata`), used if it is not
+                                            in the dataset.
             
         Returns:
-            list: A list of recommended track names. Returns an empty list
-                  if the track name is not found or if the model hasn't been fitted.
+            list: A list of recommended track names. A track that is not found gets
+                  the most popular tracks of its artists and genres (or overall).
+                  Returns an empty list if the model hasn't been fitted.
         """
-        if self.tfidf_matrix is None or self.track_indices is None:
+        if self.tfidf_matrix is None or self._track_indices is None:
             print("The model has not been fitted yet. Please call the 'fit' method first.")
             return []
-            
-        if track_name not in self.track_indices:
-            print(f"Track '{track_name}' not found in the dataset.")
+
+        # Get the index of the track (the first one if the name repeats)
+        idx = self.track_rows([track_name])[0]
+        if idx < 0:
+            print(f"Track '{track_name}' not found in the dataset; using popular tracks.")
+            increment('content.recommend.not_found')
+            return self.fallback.recommend(**(seed_metadata or {}), n=num_recommendations, exclude=[track_name])
+
+        if reranker is not None:
+            rows, scores = self._top_candidates(np.array([idx]), np.ones(1), reranker.pool_size)
+            return self.diversify(rows, scores, num_recommendations, reranker)
+
+        if self.tables is not None:
+            cached = self.tables.lookup('content', idx, num_recommendations)
+            if cached is not None:
+                increment('content.recommend.table_hit')
+                return self.track_names[cached].tolist()
+
+        if self.candidate_generator is not None:
+            candidates = self.candidate_generator.for_tracks([idx])
+            track_indices = self._rank_candidates(idx, candidates, num_recommendations)
+            return self.track_names[track_indices].tolist()
+
+        # Vectorized top-k over every track (or the item shards), ties by the lower row;
+        # tracks with the seed's name are excluded
+        track_indices, _ = self._top_candidates(np.array([idx]), np.ones(1), num_recommendations)
+        return self.track_names[track_indices].tolist()
+
+    def _resolve_seeds(self, seeds, weights):
+        """
+        Row index and normalised weight of every known seed track.
+
+        Unknown names are reported and skipped.
+        """
+        weights = np.ones(len(seeds)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if len(weights) != len(seeds):
+            raise ValueError("seeds and weights must have the same length.")
+
+        rows = self.track_rows(np.asarray(seeds, dtype=object))
+        for seed in np.asarray(seeds, dtype=object)[rows < 0]:
+            print(f"Track '{seed}' not found in the dataset.")
+            increment('content.recommend.not_found')
+        kept = weights[rows >= 0]
+        rows = rows[rows >= 0]
+
+        if len(kept) and kept.sum() > 0:
+            kept = kept / kept.sum()
+        return rows.astype(np.int64), kept
+
+    @timed('content.recommend_for_tracks')
+    def recommend_for_tracks(self, seeds, weights=None, n=5):
+        """
+        Recommends tracks for a playlist of seed tracks with one scoring pass.
+
+        TF-IDF rows are L2-normalised, so the weighted sum of the seeds' cosine
+        similarity rows equals the similarity to the weighted sum of their
+        vectors. That aggregated query is scored against every track in a
+        single sparse product, whatever the number of seeds.
+
+        Args:
+            seeds (list): Track names of the playlist.
+            weights (list, optional): Weight per seed; defaults to equal weights.
+            n (int): The number of recommendations to return.
+
+        Returns:
+            list: Recommended track names, never one of the seeds' names.
+        """
+        if self.tfidf_matrix is None or self._track_indices is None:
+            print("The model has not been fitted yet. Please call the 'fit' method first.")
             return []
 
-        # Get the index of the track
-        idx = self.track_indices[track_name]
-        
-        # If duplicate track names exist, idx will be a Series. Get the first index.
-        if isinstance(idx, pd.Series):
-            idx = idx.iloc[0]
+        rows, weights = self._resolve_seeds(seeds, weights)
+        if len(rows) == 0:
+            return []
 
-        # Calculate cosine similarity
-        sim_scores = cosine_similarity(self.tfidf_matrix[idx:idx+1], self.tfidf_matrix)[0]
-        
-        # Enumerate and sort similarity scores
-        sim_scores = list(enumerate(sim_scores))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        
-        # --- MODIFIED LOGIC TO HANDLE DUPLICATES ---
-        # Filter out all songs with the same name as the input track
-        filtered_scores = [score for score in sim_scores if self.spotify_df['track_name'].iloc[score[0]] != track_name]
-        
-        # Get the top N recommendations from the filtered list
-        top_scores = filtered_scores[:num_recommendations]
-        track_indices = [i[0] for i in top_scores]
-        # --- END MODIFIED LOGIC ---
-
-        # Get top recommendations excluding the track itself
-        #sim_scores = sim_scores[1:num_recommendations + 1]
-        #track_indices = [i[0] for i in sim_scores]
-        
-        # Return the track names
-        return self.spotify_df['track_name'].iloc[track_indices].tolist()  # CHANGED: 'title' -> 'track_name'
+        track_indices, _ = self._top_candidates(rows, weights, n)
+        return self.track_names[track_indices].tolist()
 
-if __name__ == '__main__':
+    def _top_candidates(self, rows, weights, k):
+        """
+        Best `k` tracks for the weighted sum of the given rows, excluding every
+        track that shares a name with one of them.
+
+        Returns:
+            tuple: (row indices, cosine scores), best first.
+        """
+        query = csr_matrix(weights[None, :]) @ self.tfidf_matrix[rows]
+        excluded = np.flatnonzero(np.isin(self.track_name_codes, self.track_name_codes[rows]))
+
+        if self.item_shards is not None:
+            track_indices, scores = self.item_shards.top_k(query, k, exclude=[excluded])
+            keep = np.isfinite(scores[0])
+            return track_indices[0][keep], scores[0][keep]
+
+        scores = np.asarray((self.tfidf_matrix @ query.T).todense()).ravel()
+        scores[excluded] = -np.inf
+        top = top_k(scores, k)
+        return top, scores[top]
+
+    def _rank_candidates(self, row, candidates, k):
+        """
+        Exact cosine ranking of candidate rows against one track, excluding
+        tracks with the same name.
+
+        Returns:
+            np.ndarray: The best `k` candidate rows, best first.
+        """
+        scores = np.asarray((self.tfidf_matrix[candidates] @ self.tfidf_matrix[row].T).todense()).ravel()
+        scores[self.track_name_codes[candidates] == self.track_name_codes[row]] = -np.inf
+        return candidates[top_k(scores, k, keys=candidates)]
+
+    def candidate_pool(self, track_name, pool_size):
+        """
+        The `pool_size` most similar tracks to `track_name`, for re-ranking.
+
+        Returns:
+            tuple: (row indices, cosine scores), best first; empty if the track is unknown.
+        """
+        rows, weights = self._resolve_seeds([track_name], None)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return self._top_candidates(rows, weights, pool_size)
+
+    def diversify(self, rows, relevance, n, reranker):
+        """
+        Re-rank candidate rows with a DiversityReranker.
+
+        Returns:
+            list: Track names of the picks.
+        """
+        picks = reranker.rerank(relevance, n, features=self.tfidf_matrix[rows],
+                                artists=self.spotify_df['artists'].to_numpy()[rows],
+                                genres=self.spotify_df['track_genre'].to_numpy()[rows])
+        return self.track_names[rows[picks]].tolist()
+
+
+def main():
+    """Demo function to test the content-based recommender."""
     # Simple main function to test
     # Not part of the unit test 
     
@@ -136,4 +491,12 @@ if __name__ == '__main__':
     if recommendations:
         print(f"Recommendations for '{track_name_to_test}':")
         for track in recommendations:
-            print(f"- {track}")
\ No newline at end of file
+            print(f"- {track}")
+
+
+if __name__ == '__main__':
+    from profiling import parse_profile_args, profile_run
+    args = parse_profile_args("Content-based recommender demo")
+
+    with profile_run('basic_recommender', args):
+        main()
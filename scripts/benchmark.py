@@ -0,0 +1,276 @@
+import numpy as np
+import tracemalloc
+import platform
+import argparse
+import json
+import time
+import sys
+import os
+from synthetic_data import write_synthetic_dataset
+from basic_recommender import ContentBasedRecommender
+from collaborative_filtering import CollaborativeFiltering
+from hybrid_recommender import HybridRecommender
+
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results')
+
+
+def _measure(func, repeat, track_memory):
+    """
+    Time `func` over `repeat` runs and optionally record its peak allocation.
+
+    The memory run is a separate traced call so tracemalloc overhead never
+    leaks into the timings.
+
+    Returns:
+        dict: Timing statistics in seconds and peak memory in MB.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    result = {
+        'runs': repeat,
+        'min_s': float(np.min(timings)),
+        'median_s': float(np.median(timings)),
+        'mean_s': float(np.mean(timings)),
+    }
+
+    if track_memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_memory_mb'] = peak / 1024**2
+
+    return result
+
+
+class RecommenderBenchmark:
+    """
+    Benchmark suite for the recommender hot paths on synthetic datasets.
+
+    Each dataset size gets its own seeded synthetic CSV; every stage is timed
+    separately so a change in one fit or query path shows up on its own line.
+    """
+
+    STAGES = ['content_fit', 'content_recommend', 'content_recommend_playlist', 'cf_create_matrix',
+              'cf_fit_svd', 'cf_fit_user_based', 'cf_fit_item_based', 'cf_recommend_svd',
+              'cf_recommend_item_based', 'hybrid_fit', 'hybrid_recommend']
+
+    def __init__(self, sizes=None, seed=42, repeat=3, fit_repeat=1, track_memory=True,
+                 stages=None, data_dir=None):
+        """
+        Args:
+            sizes (list, optional): Dataset sizes in rows (10k to 10M).
+            seed (int): Seed for the synthetic data generator.
+            repeat (int): Timed runs per query stage.
+            fit_repeat (int): Timed runs per fit stage.
+            track_memory (bool): Whether to record peak memory per stage.
+            stages (list, optional): Subset of STAGES to run.
+            data_dir (str, optional): Where generated datasets are cached.
+        """
+        self.sizes = sizes or DEFAULT_SIZES
+        self.seed = seed
+        self.repeat = repeat
+        self.fit_repeat = fit_repeat
+        self.track_memory = track_memory
+        self.stages = stages or self.STAGES
+        self.data_dir = data_dir or os.path.join(DEFAULT_RESULTS_DIR, 'datasets')
+
+    def _dataset_path(self, n_rows):
+        """Generate (or reuse) the synthetic dataset for a size."""
+        path = os.path.join(self.data_dir, f"synthetic_{n_rows}_seed{self.seed}.csv")
+        if not os.path.exists(path):
+            write_synthetic_dataset(path, n_rows, seed=self.seed)
+        return path
+
+    def _run_stage(self, name, func, repeat, results):
+        """Measure one stage if it was selected."""
+        if name not in self.stages:
+            return
+        print(f"  {name}...")
+        results[name] = _measure(func, repeat, self.track_memory)
+        print(f"    median {results[name]['median_s'] * 1000:.1f} ms")
+
+    def run_size(self, n_rows):
+        """
+        Run every selected stage on one dataset size.
+
+        Returns:
+            dict: Stage name -> measurement.
+        """
+        path = self._dataset_path(n_rows)
+        print(f"\nBenchmarking {n_rows:,} rows")
+        results = {}
+
+        # Content-based
+        content = ContentBasedRecommender(path)
+        self._run_stage('content_fit', content.fit, self.fit_repeat, results)
+        content.fit()
+        seed_track = content.spotify_df['track_name'].iloc[0]
+        self._run_stage('content_recommend', lambda: content.recommend(seed_track, 5), self.repeat, results)
+        playlist = content.spotify_df['track_name'].iloc[:200].tolist()
+        self._run_stage('content_recommend_playlist', lambda: content.recommend_for_tracks(playlist, n=5),
+                        self.repeat, results)
+
+        # Collaborative filtering
+        cf = CollaborativeFiltering(path)
+        self._run_stage('cf_create_matrix', cf._create_user_item_matrix, self.fit_repeat, results)
+        self._run_stage('cf_fit_svd', lambda: cf.fit_svd(n_components=20), self.fit_repeat, results)
+        self._run_stage('cf_fit_user_based', lambda: cf.fit_user_based_cf(n_neighbors=10), self.fit_repeat, results)
+        self._run_stage('cf_fit_item_based', lambda: cf.fit_item_based_cf(n_neighbors=10), self.fit_repeat, results)
+        cf.fit_svd(n_components=20)
+        cf.fit_item_based_cf(n_neighbors=10)
+        seed_user = cf.idx_to_user[0]
+        self._run_stage('cf_recommend_svd', lambda: cf.recommend_svd(seed_user, 5), self.repeat, results)
+        self._run_stage('cf_recommend_item_based', lambda: cf.recommend_item_based(seed_user, 5), self.repeat, results)
+
+        # Hybrid
+        if 'hybrid_fit' in self.stages or 'hybrid_recommend' in self.stages:
+            self._run_stage('hybrid_fit', lambda: HybridRecommender(path), self.fit_repeat, results)
+            hybrid = HybridRecommender(path)
+            self._run_stage('hybrid_recommend', lambda: hybrid.recommend(seed_track, num_recommendations=5),
+                            self.repeat, results)
+
+        return results
+
+    def run(self):
+        """
+        Run the suite over every size.
+
+        Returns:
+            dict: JSON-serialisable benchmark report.
+        """
+        report = {
+            'environment': environment_info(),
+            'config': {
+                'seed': self.seed,
+                'repeat': self.repeat,
+                'fit_repeat': self.fit_repeat,
+                'track_memory': self.track_memory,
+            },
+            'results': {},
+        }
+        for n_rows in self.sizes:
+            report['results'][str(n_rows)] = self.run_size(n_rows)
+        return report
+
+
+def environment_info():
+    """Versions and hardware details needed to reproduce a run."""
+    import pandas as pd
+    import scipy
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def compare_to_baseline(report, baseline, time_threshold=0.2, memory_threshold=0.2):
+    """
+    Compare a report against a stored baseline.
+
+    Args:
+        report (dict): Current benchmark report.
+        baseline (dict): Baseline benchmark report.
+        time_threshold (float): Allowed relative slowdown of the median time.
+        memory_threshold (float): Allowed relative growth of the peak memory.
+
+    Returns:
+        list: One dict per compared (size, stage), with a `regression` flag.
+    """
+    comparisons = []
+    for size, stages in report['results'].items():
+        baseline_stages = baseline.get('results', {}).get(size, {})
+        for stage, current in stages.items():
+            if stage not in baseline_stages:
+                continue
+            previous = baseline_stages[stage]
+            time_ratio = current['median_s'] / previous['median_s'] if previous['median_s'] > 0 else 1.0
+            entry = {
+                'size': size,
+                'stage': stage,
+                'time_ratio': time_ratio,
+                'regression': time_ratio > 1 + time_threshold,
+            }
+            if 'peak_memory_mb' in current and previous.get('peak_memory_mb'):
+                entry['memory_ratio'] = current['peak_memory_mb'] / previous['peak_memory_mb']
+                entry['regression'] = entry['regression'] or entry['memory_ratio'] > 1 + memory_threshold
+            comparisons.append(entry)
+    return comparisons
+
+
+def print_comparison(comparisons):
+    """Print a baseline comparison table."""
+    print("\nComparison against baseline:")
+    print(f"  {'size':>10}  {'stage':<26} {'time':>8} {'memory':>8}")
+    for entry in comparisons:
+        memory = f"{entry['memory_ratio']:.2f}x" if 'memory_ratio' in entry else '-'
+        flag = '  REGRESSION' if entry['regression'] else ''
+        print(f"  {entry['size']:>10}  {entry['stage']:<26} {entry['time_ratio']:>7.2f}x {memory:>8}{flag}")
+
+
+def main():
+    """Run the benchmark suite from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the recommender hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Synthetic dataset sizes in rows (10k to 10M)")
+    parser.add_argument('--stages', nargs='+', choices=RecommenderBenchmark.STAGES,
+                        help="Only run these stages")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per query stage")
+    parser.add_argument('--fit-repeat', type=int, default=1, help="Timed runs per fit stage")
+    parser.add_argument('--no-memory', action='store_true', help="Skip peak memory tracking")
+    parser.add_argument('--output', default=os.path.join(DEFAULT_RESULTS_DIR, 'benchmark.json'))
+    parser.add_argument('--baseline', default=os.path.join(DEFAULT_RESULTS_DIR, 'benchmark_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--time-threshold', type=float, default=0.2)
+    parser.add_argument('--memory-threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    benchmark = RecommenderBenchmark(sizes=args.sizes, seed=args.seed, repeat=args.repeat,
+                                     fit_repeat=args.fit_repeat, track_memory=not args.no_memory,
+                                     stages=args.stages)
+    report = benchmark.run()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparisons = compare_to_baseline(report, baseline, args.time_threshold, args.memory_threshold)
+    print_comparison(comparisons)
+
+    regressions = [c for c in comparisons if c['regression']]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above threshold.")
+        return 1
+    print("\nNo regressions above threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import csr_matrix
+import time
+from content_features import _split_distinct
+from instrumentation import timed
+from top_k import top_k
+
+
+def _entity_matrix(series, separator, rank):
+    """
+    Item x entity incidence (genres or artists), with items ordered by popularity rank.
+
+    Returns:
+        tuple: (entity vocabulary, item x entity CSR in original item order,
+                entity x item CSR whose column indices are popularity ranks)
+    """
+    codes, n_distinct, token_rows, tokens = _split_distinct(series, separator)
+    token_codes, vocabulary = pd.factorize(tokens)
+    incidence = csr_matrix((np.ones(len(token_codes), dtype=np.int8), (token_rows, token_codes)),
+                           shape=(n_distinct, len(vocabulary)))
+    incidence.sum_duplicates()
+    item_entity = incidence[codes].tocsr()
+    item_entity.data[:] = 1
+
+    # Transposing the rank-ordered matrix sorts every posting list by popularity
+    postings = item_entity[np.argsort(rank)].T.tocsr()
+    postings.sort_indices()
+    return vocabulary, item_entity, postings
+
+
+class CandidateGenerator:
+    """
+    Cheap candidate sources for two-stage recommendation.
+
+    At build time every genre and artist gets an inverted posting list of
+    tracks sorted by popularity, so a genre's popularity head is a prefix of
+    its list. Optional co-occurrence neighbours come from the user-item
+    matrix. A query draws a few thousand tracks from these lists; the exact
+    scorers then rank only those.
+    """
+
+    @timed('candidates.build')
+    def __init__(self, items, head_size=200, artist_size=100, max_candidates=3000):
+        """
+        Args:
+            items (pd.DataFrame): Catalogue tracks with `artists`, `track_genre` and
+                                  `popularity` columns (row order = track index).
+            head_size (int): Tracks taken from each genre's popularity head.
+            artist_size (int): Tracks taken from each artist's posting list.
+            max_candidates (int): Cap on candidates per query (most popular kept).
+        """
+        self.head_size = head_size
+        self.artist_size = artist_size
+        self.max_candidates = max_candidates
+        self.n_items = len(items)
+
+        popularity = items['popularity'].fillna(0).to_numpy(dtype=np.float64)
+        self.popularity_order = np.argsort(-popularity, kind='stable')
+        self.rank = np.empty(self.n_items, dtype=np.int64)
+        self.rank[self.popularity_order] = np.arange(self.n_items)
+
+        self.genres, self.item_genres, self.genre_postings = _entity_matrix(items['track_genre'], None, self.rank)
+        self.artists, self.item_artists, self.artist_postings = _entity_matrix(items['artists'], ';', self.rank)
+        self.neighbors = None
+
+    @classmethod
+    def from_recommender(cls, content, **options):
+        """Generator over a fitted ContentBasedRecommender's tracks."""
+        return cls(content.spotify_df, **options)
+
+    @timed('candidates.co_occurrence')
+    def add_co_occurrence(self, user_item_matrix, item_rows, n_neighbors=50, max_user_items=200,
+                          block_size=1024, seed=42):
+        """
+        Precompute, for every track, the tracks most often rated by the same users.
+
+        Users with long histories dominate the cost of X^T X, so every user
+        contributes at most `max_user_items` sampled items as neighbours
+        (every item is still a query).
+
+        Args:
+            user_item_matrix (scipy.sparse matrix): Users x CF items.
+            item_rows (np.ndarray): Track index of every CF item (-1 if not in the catalogue).
+            n_neighbors (int): Neighbours kept per track.
+            max_user_items (int): Items sampled per user on the neighbour side.
+            block_size (int): CF items processed per sparse product (at most 32767).
+            seed (int): Sampling seed.
+        """
+        binary = csr_matrix(user_item_matrix, dtype=np.float32, copy=True)
+        binary.data[:] = 1
+        by_item = binary.T.tocsr()
+
+        # Keep a random `max_user_items` entries of every longer row
+        rng = np.random.default_rng(seed)
+        lengths = np.diff(binary.indptr)
+        rows = np.repeat(np.arange(binary.shape[0]), lengths)
+        order = np.lexsort((rng.random(binary.nnz), rows))
+        position = np.arange(binary.nnz) - binary.indptr[rows]
+        keep = np.zeros(binary.nnz, dtype=bool)
+        keep[order[position < max_user_items]] = True
+        sampled = csr_matrix((binary.data[keep], binary.indices[keep],
+                              np.concatenate([[0], np.cumsum(np.minimum(lengths, max_user_items))])),
+                             shape=binary.shape)
+
+        self.neighbors = np.full((self.n_items, n_neighbors), -1, dtype=np.int32)
+        for start in range(0, by_item.shape[0], block_size):
+            counts = (by_item[start:start + block_size] @ sampled).tocsr()
+            local = np.repeat(np.arange(counts.shape[0], dtype=np.int16), np.diff(counts.indptr))
+            columns, values = counts.indices, counts.data
+            valid = (columns != start + local.astype(np.int64)) & (item_rows[columns] >= 0)
+            local, columns, values = local[valid], columns[valid], values[valid]
+
+            # Best `n_neighbors` per item: two stable passes (count desc, then item)
+            # over small integer keys, which numpy sorts with a radix sort
+            count_dtype = np.int16 if len(values) == 0 or values.max() < 2**15 else np.int32
+            order = np.argsort(-values.astype(count_dtype), kind='stable')
+            order = order[np.argsort(local[order], kind='stable')]
+            local, columns = local[order], columns[order]
+            first = np.concatenate([[0], np.cumsum(np.bincount(local, minlength=counts.shape[0]))])
+            slot = np.arange(len(local)) - first[local]
+            best = slot < n_neighbors
+            rows = item_rows[start + local[best].astype(np.int64)]
+            known = rows >= 0
+            self.neighbors[rows[known], slot[best][known]] = item_rows[columns[best][known]]
+
+    def _postings(self, postings, entities, limit):
+        """Tracks from the first `limit` entries of each entity's posting list."""
+        parts = [postings.indices[postings.indptr[e]:min(postings.indptr[e] + limit, postings.indptr[e + 1])]
+                 for e in entities]
+        return self.popularity_order[np.concatenate(parts)] if parts else np.empty(0, dtype=np.int64)
+
+    def for_tracks(self, rows, max_seeds=100):
+        """
+        Candidate tracks for a set of seed tracks (a track query or a user's history).
+
+        Sources: the popularity head of every seed genre, the posting lists of
+        the seed artists, co-occurrence neighbours of the seeds and the global
+        popularity head.
+
+        Args:
+            rows (array-like): Seed track indices.
+            max_seeds (int): Most popular seeds used for the artist and neighbour sources.
+
+        Returns:
+            np.ndarray: Candidate track indices, most popular first (seeds included).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) > max_seeds:
+            popular_rows = rows[np.argsort(self.rank[rows])[:max_seeds]]
+        else:
+            popular_rows = rows
+
+        genres = np.flatnonzero(np.bincount(self.item_genres[rows].indices, minlength=len(self.genres)))
+        artists = np.unique(self.item_artists[popular_rows].indices)
+        parts = [self._postings(self.genre_postings, genres, self.head_size),
+                 self._postings(self.artist_postings, artists, self.artist_size),
+                 self.popularity_order[:self.head_size]]
+        if self.neighbors is not None:
+            neighbors = self.neighbors[popular_rows].ravel()
+            parts.append(neighbors[neighbors >= 0])
+
+        # Union through a popularity-rank mask: sorted by popularity, no hashing
+        selected = np.zeros(self.n_items, dtype=bool)
+        for part in parts:
+            selected[self.rank[part]] = True
+        return self.popularity_order[np.flatnonzero(selected)[:self.max_candidates]]
+
+
+def _cf_rows(content, cf):
+    """Track index of every CF item and CF item of every track (-1 when missing)."""
+    track_ids = content.spotify_df['track_id'].to_numpy()
+    cf_ids = np.array([cf.idx_to_item[i] for i in range(len(cf.idx_to_item))], dtype=object)
+    first_rows = pd.Series(np.arange(len(track_ids)), index=track_ids)
+    first_rows = first_rows[~first_rows.index.duplicated()]
+    item_rows = first_rows.reindex(cf_ids).fillna(-1).to_numpy(dtype=np.int64)
+    return item_rows, pd.Index(cf_ids).get_indexer(track_ids)
+
+
+def build_candidate_generator(content, cf=None, **options):
+    """
+    Build a generator over the content recommender's tracks and attach it to
+    both recommenders (with co-occurrence neighbours when `cf` is given).
+
+    Returns:
+        CandidateGenerator: The generator.
+    """
+    generator = CandidateGenerator.from_recommender(content, **options)
+    content.use_candidate_generator(generator)
+    if cf is not None:
+        item_rows, row_items = _cf_rows(content, cf)
+        generator.add_co_occurrence(cf.user_item_matrix, item_rows)
+        cf.use_candidate_generator(generator, item_rows, row_items)
+    return generator
+
+
+def _recall(result_scores, reference_scores):
+    """
+    Tie-aware recall@k: share of the exact top-k slots filled by results that
+    score at least as well as the exact k-th item.
+    """
+    if len(reference_scores) == 0:
+        return 1.0
+    return float(np.sum(result_scores >= reference_scores[-1] - 1e-9)) / len(reference_scores)
+
+
+def evaluate_two_stage(content, cf=None, n_queries=50, k=10, seed=42):
+    """
+    Per-stage latency and recall@k of two-stage recommendation against full scoring.
+
+    Content queries compare with cosine similarity over every track; SVD
+    queries with the all-item dot product. Many tracks share genre and
+    artist tokens, so recall counts any result tied with the exact k-th
+    score as a hit. Both recommenders must have a candidate generator attached.
+
+    Returns:
+        dict: Measurements per recommender.
+    """
+    rng = np.random.default_rng(seed)
+    generator = content.candidate_generator
+    report = {}
+
+    # Content: full scoring = the vectorized exact scorer over all tracks
+    rows = rng.choice(len(content.spotify_df), min(n_queries, len(content.spotify_df)), replace=False)
+    generation, ranking, full, recalls, sizes = [], [], [], [], []
+    for row in rows:
+        start = time.perf_counter()
+        _, reference_scores = content._top_candidates(np.array([row]), np.ones(1), k)
+        full.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        candidates = generator.for_tracks([row])
+        generation.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        result = content._rank_candidates(row, candidates, k)
+        ranking.append(time.perf_counter() - start)
+
+        sizes.append(len(candidates))
+        result_scores = np.asarray((content.tfidf_matrix[result] @ content.tfidf_matrix[row].T).todense()).ravel()
+        recalls.append(_recall(result_scores, reference_scores))
+    report['content'] = (generation, ranking, full, recalls, sizes)
+
+    if cf is not None and cf.svd_model is not None:
+        users = rng.choice(cf.user_item_matrix.shape[0], min(n_queries, cf.user_item_matrix.shape[0]), replace=False)
+        generation, ranking, full, recalls, sizes = [], [], [], [], []
+        components = cf.svd_model.components_
+        for user in users:
+            rated = cf.user_item_matrix[user].indices
+            start = time.perf_counter()
+            full_scores = components.T @ cf.svd_factors[user]
+            full_scores[rated] = -np.inf
+            reference = top_k(full_scores, k)
+            full.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            candidates = cf._svd_candidates(user)
+            generation.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            scores = components[:, candidates].T @ cf.svd_factors[user]
+            result = candidates[top_k(scores, k, keys=candidates)]
+            ranking.append(time.perf_counter() - start)
+
+            sizes.append(len(candidates))
+            recalls.append(_recall(full_scores[result], full_scores[reference]))
+        report['svd'] = (generation, ranking, full, recalls, sizes)
+
+    summary = {}
+    print(f"\nTwo-stage vs full scoring, recall@{k}, median latency over {n_queries} queries")
+    print(f"{'scorer':<8}{'candidates':>11}{'generate ms':>13}{'rank ms':>9}{'two-stage ms':>14}{'full ms':>9}{'recall':>8}")
+    for name, (generation, ranking, full, recalls, sizes) in report.items():
+        summary[name] = {
+            'candidates': float(np.mean(sizes)),
+            'generate_ms': 1000 * float(np.median(generation)),
+            'rank_ms': 1000 * float(np.median(ranking)),
+            'two_stage_ms': 1000 * float(np.median(np.add(generation, ranking))),
+            'full_ms': 1000 * float(np.median(full)),
+            'recall': float(np.mean(recalls)),
+        }
+        row = summary[name]
+        print(f"{name:<8}{row['candidates']:>11.0f}{row['generate_ms']:>13.2f}{row['rank_ms']:>9.2f}"
+              f"{row['two_stage_ms']:>14.2f}{row['full_ms']:>9.2f}{row['recall']:>8.3f}")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    from basic_recommender import ContentBasedRecommender
+    from collaborative_filtering import CollaborativeFiltering
+
+    parser = argparse.ArgumentParser(description="Measure two-stage candidate generation against full scoring.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--max-candidates', type=int, default=3000, help="Candidates per query")
+    parser.add_argument('--head-size', type=int, default=200, help="Tracks per genre popularity head")
+    parser.add_argument('--queries', type=int, default=50, help="Queries per scorer")
+    args = parser.parse_args()
+
+    content = ContentBasedRecommender(args.data)
+    content.fit()
+    cf = CollaborativeFiltering(args.data)
+    cf.fit_svd(n_components=20)
+
+    build_candidate_generator(content, cf, head_size=args.head_size, max_candidates=args.max_candidates)
+    evaluate_two_stage(content, cf, n_queries=args.queries)
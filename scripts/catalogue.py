@@ -0,0 +1,155 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import csr_matrix
+import time
+import os
+from instrumentation import timed
+
+
+class TrackCatalogue:
+    """
+    Canonical track catalogue with one item per `track_id`.
+
+    The Kaggle dataset repeats the same track under several `track_genre`
+    values. The catalogue keeps the first row of every track and stores its
+    genres as a sparse item x genre indicator matrix, plus a space-joined
+    `track_genre` string so text features still see every genre.
+    """
+
+    @timed('catalogue.build')
+    def __init__(self, df):
+        """
+        Build the catalogue from the raw dataset.
+
+        Args:
+            df (pd.DataFrame): Raw dataset with possibly repeated `track_id` rows.
+        """
+        df = df.reset_index(drop=True)
+        self.source_rows = len(df)
+
+        item_codes, track_ids = pd.factorize(df['track_id'])
+        genres = df['track_genre'].fillna('')
+        genre_codes, genre_names = pd.factorize(genres)
+
+        # First occurrence of every track, in order of first appearance
+        first_rows = np.flatnonzero(~pd.Series(item_codes).duplicated().to_numpy())
+        self.items = df.iloc[first_rows].reset_index(drop=True)
+
+        indicator = csr_matrix((np.ones(len(df), dtype=np.int8), (item_codes, genre_codes)),
+                               shape=(len(track_ids), len(genre_names)))
+        indicator.sum_duplicates()
+        indicator.data[:] = 1
+        self.genre_matrix = indicator
+        self.genre_names = np.asarray(genre_names, dtype=object)
+
+        pairs = pd.DataFrame({'item': item_codes, 'genre': genres}).drop_duplicates()
+        self.items['track_genre'] = pairs.groupby('item', sort=True)['genre'].agg(' '.join).to_numpy()
+        self.items['n_genres'] = np.diff(indicator.indptr)
+
+        self.track_id_to_idx = pd.Series(np.arange(len(track_ids)), index=track_ids)
+
+    @classmethod
+    def from_csv(cls, data_path):
+        """Load a dataset CSV and build its catalogue."""
+        return cls(pd.read_csv(data_path))
+
+    def __len__(self):
+        return len(self.items)
+
+    def genres_of(self, idx):
+        """Genre names of the item at position `idx`."""
+        start, stop = self.genre_matrix.indptr[idx], self.genre_matrix.indptr[idx + 1]
+        return self.genre_names[self.genre_matrix.indices[start:stop]].tolist()
+
+    def summary(self):
+        """Size reduction achieved by deduplication."""
+        return {
+            'source_rows': self.source_rows,
+            'items': len(self.items),
+            'genres': len(self.genre_names),
+            'duplicate_rows_removed': self.source_rows - len(self.items),
+            'reduction_pct': 100 * (1 - len(self.items) / self.source_rows) if self.source_rows else 0.0,
+            'multi_genre_items': int((self.items['n_genres'] > 1).sum()),
+            'genre_matrix_nnz': int(self.genre_matrix.nnz),
+        }
+
+    def print_summary(self):
+        """Print the deduplication summary."""
+        summary = self.summary()
+        print(f"Catalogue built: {summary['source_rows']:,} rows -> {summary['items']:,} tracks "
+              f"({summary['reduction_pct']:.1f}% fewer rows)")
+        print(f"Genres: {summary['genres']}, multi-genre tracks: {summary['multi_genre_items']:,}")
+
+
+def _time(func, repeat=3):
+    """Median wall time of `func` in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def compare_catalogue(data_path=None, n_queries=20):
+    """
+    Report matrix size, fit time and query time with and without deduplication.
+
+    Args:
+        data_path (str, optional): Dataset CSV. If None, will automatically find the dataset.
+        n_queries (int): Number of tracks/users queried per configuration.
+
+    Returns:
+        dict: Measurements for 'raw' and 'catalogue'.
+    """
+    from basic_recommender import ContentBasedRecommender
+    from collaborative_filtering import CollaborativeFiltering
+
+    report = {}
+    for label, deduplicate in (('raw', False), ('catalogue', True)):
+        print(f"\n--- {label} ---")
+        content = ContentBasedRecommender(data_path, deduplicate=deduplicate)
+        content_fit = _time(content.fit, repeat=1)
+        tracks = content.spotify_df['track_name'].dropna().unique()[:n_queries]
+        content_query = _time(lambda: [content.recommend(t, 5) for t in tracks]) / max(len(tracks), 1)
+
+        start = time.perf_counter()
+        cf = CollaborativeFiltering(data_path, deduplicate=deduplicate)
+        cf_build = time.perf_counter() - start
+        svd_fit = _time(lambda: cf.fit_svd(n_components=20), repeat=1)
+        users = list(cf.user_to_idx)[:n_queries]
+        svd_query = _time(lambda: [cf.recommend_svd(u, 5) for u in users]) / max(len(users), 1)
+
+        report[label] = {
+            'tfidf_shape': content.tfidf_matrix.shape,
+            'tfidf_nnz': int(content.tfidf_matrix.nnz),
+            'user_item_shape': cf.user_item_matrix.shape,
+            'user_item_nnz': int(cf.user_item_matrix.nnz),
+            'content_fit_s': content_fit,
+            'content_query_ms': 1000 * content_query,
+            'cf_load_and_build_s': cf_build,
+            'svd_fit_s': svd_fit,
+            'svd_query_ms': 1000 * svd_query,
+        }
+
+    print("\nCatalogue comparison (raw -> catalogue):")
+    for key in report['raw']:
+        print(f"  {key:<22} {str(report['raw'][key]):>18} -> {str(report['catalogue'][key]):>18}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the canonical track catalogue and report its savings.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    args = parser.parse_args()
+
+    if args.data is None:
+        from basic_recommender import ContentBasedRecommender
+        args.data = ContentBasedRecommender._find_dataset(None)
+    if not os.path.exists(args.data):
+        raise FileNotFoundError(f"Dataset not found at: {args.data}")
+
+    TrackCatalogue.from_csv(args.data).print_summary()
+    compare_catalogue(args.data)
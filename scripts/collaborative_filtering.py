@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-from sklearn.decomposition import TruncatedSVD, NMF
-from sklearn.neighbors import NearestNeighbors
-from sklearn.metrics.pairwise import cosine_similarity
 from scipy.sparse import csr_matrix
 import warnings
 import os
+from instrumentation import span, timed, increment
+from catalogue import TrackCatalogue
+from fallback_tables import FallbackTables
+from top_k import top_k
 warnings.filterwarnings('ignore')
 
 class CollaborativeFiltering:
@@ -13,23 +14,65 @@ class CollaborativeFiltering:
     A collaborative filtering recommender system for Spotify tracks.
     """
     
-    def __init__(self, data_path=None):
-        """Initialize the collaborative filtering recommender."""
+    def __init__(self, data_path=None, deduplicate=True, events_path=None, statistics=None):
+        """
+        Initialize the collaborative filtering recommender.
+
+        Args:
+            data_path (str, optional): Path to the dataset CSV. If None, will automatically find the dataset.
+            deduplicate (bool): Build the user-item matrix from the canonical track catalogue
+                                (one item per track_id, genres as a sparse indicator matrix).
+            events_path (str or list, optional): Listening-event logs (user_id, track_id, ms_played).
+                                                 If given, real users replace the synthetic genre users.
+            statistics (EDAAccumulator, optional): Stored dataset statistics
+                (`eda_store.dataset_statistics`); the fallback tables rank items
+                without a popularity (e.g. only seen in event logs) by a prior.
+        """
         if data_path is None:
             data_path = self._find_dataset()
         
         if not os.path.exists(data_path):
             raise FileNotFoundError(f"Dataset not found at: {data_path}")
             
-        self.df = pd.read_csv(data_path)
+        with span('cf.load'):
+            self.df = pd.read_csv(data_path)
+        self.catalogue = TrackCatalogue(self.df) if deduplicate else None
         self.user_item_matrix = None
         self.svd_model = None
         self.nmf_model = None
         self.user_neighbors = None
         self.item_neighbors = None
+        self.svd_shards = None
+        self.svd_quantized = None
+        self.tables = None
+        self.candidate_generator = None
+        self.fallback = None
+        self.statistics = statistics
         
         # Create user-item matrix from implicit feedback
-        self._create_user_item_matrix()
+        if events_path is not None:
+            from event_ingestion import EventIngestor
+            self.load_interactions(EventIngestor().ingest(events_path))
+        else:
+            self._create_user_item_matrix()
+    
+    def _item_frame(self):
+        """Dataset row of every item, in column order; items missing from the dataset get empty rows."""
+        item_ids = [self.idx_to_item[idx] for idx in range(self.user_item_matrix.shape[1])]
+        source = self.catalogue.items if self.catalogue is not None else self.df
+        items = source.drop_duplicates('track_id').set_index('track_id').reindex(item_ids).reset_index()
+        items['track_name'] = self.item_names
+        return items
+    
+    def _build_fallback(self):
+        """Popularity heads per genre and artist, for users outside the training data."""
+        self.fallback = FallbackTables(self._item_frame(), statistics=self.statistics)
+    
+    def _unknown_user(self, user_id, n_recommendations, seed_metadata):
+        """Popular tracks (for the seed's artists and genres, if given) for an unknown user."""
+        print(f"User '{user_id}' not found in training data; using popular tracks.")
+        increment('cf.recommend.unknown_user')
+        return self.fallback.recommend(**(seed_metadata or {}), n=n_recommendations)
     
     def _find_dataset(self):
         """Automatically find the dataset file."""
@@ -47,10 +90,15 @@ class CollaborativeFiltering:
         
         return '../data/dataset.csv'
     
+    @timed('cf.create_matrix')
     def _create_user_item_matrix(self):
         """Create user-item matrix from implicit feedback based on genres."""
         print("Creating user-item matrix from implicit feedback...")
         
+        if self.catalogue is not None:
+            self._create_user_item_matrix_from_catalogue()
+            return
+        
         # Create synthetic users based on genre preferences
         genres = self.df['track_genre'].unique()
         user_item_data = []
@@ -90,49 +138,324 @@ class CollaborativeFiltering:
         self.user_item_matrix = csr_matrix((ratings, (rows, cols)), 
                                          shape=(len(user_ids), len(item_ids)))
         
+        # Track name of every item (first occurrence), for index -> name lookups
+        first_names = self.user_item_df.drop_duplicates('item_id').set_index('item_id')['track_name']
+        self.item_names = first_names[item_ids].to_numpy()
+        
         print(f"User-item matrix created: {self.user_item_matrix.shape}")
         print(f"Number of users: {len(user_ids)}, Items: {len(item_ids)}")
         print(f"Matrix density: {self.user_item_matrix.nnz / (len(user_ids) * len(item_ids)):.4f}")
+        self._build_fallback()
     
-    def fit_svd(self, n_components=50):
-        """Fit SVD model."""
-        print(f"Fitting SVD model with {n_components} components...")
-        self.svd_model = TruncatedSVD(n_components=n_components, random_state=42)
-        self.svd_factors = self.svd_model.fit_transform(self.user_item_matrix)
+    def _create_user_item_matrix_from_catalogue(self):
+        """Vectorized user-item matrix with one column per catalogue item."""
+        items = self.catalogue.items
+        
+        # Same implicit rating as the row-by-row path, computed once per item
+        popularity_score = items['popularity'].to_numpy(dtype=np.float64) / 100.0
+        duration_score = np.minimum(items['duration_ms'].to_numpy(dtype=np.float64) / (5 * 60 * 1000), 1.0)
+        item_ratings = popularity_score * 0.7 + duration_score * 0.3
+        
+        # A genre user rates every item tagged with its genre
+        genre_item = self.catalogue.genre_matrix.T.tocsr().astype(np.float64)
+        genre_item.data *= item_ratings[genre_item.indices]
+        self.user_item_matrix = genre_item
+        
+        user_ids = np.array([f"genre_{genre}" for genre in self.catalogue.genre_names], dtype=object)
+        item_ids = self.catalogue.track_id_to_idx.index.to_numpy()
+        self.item_names = items['track_name'].to_numpy()
+        
+        self.user_to_idx = {user: idx for idx, user in enumerate(user_ids)}
+        self.idx_to_user = {idx: user for user, idx in self.user_to_idx.items()}
+        self.item_to_idx = {item: idx for idx, item in enumerate(item_ids)}
+        self.idx_to_item = {idx: item for item, idx in self.item_to_idx.items()}
+        
+        coo = self.user_item_matrix.tocoo()
+        self.user_item_df = pd.DataFrame({
+            'user_id': user_ids[coo.row],
+            'item_id': item_ids[coo.col],
+            'rating': coo.data,
+            'track_name': self.item_names[coo.col],
+        })
+        
+        n_users, n_items = self.user_item_matrix.shape
+        print(f"User-item matrix created: {self.user_item_matrix.shape}")
+        print(f"Number of users: {n_users}, Items: {n_items}")
+        print(f"Matrix density: {self.user_item_matrix.nnz / (n_users * n_items):.4f}")
+        self._build_fallback()
+    
+    def load_interactions(self, ingestor):
+        """
+        Use an ingested event log as the user-item matrix.
+
+        Args:
+            ingestor (EventIngestor): Result of `EventIngestor.ingest`.
+        """
+        self.user_item_matrix = ingestor.user_item_matrix
+        user_ids, item_ids = ingestor.user_ids, ingestor.item_ids
+        
+        # Track names from the dataset; ids missing from it keep their track_id
+        names = self.df.drop_duplicates('track_id').set_index('track_id')['track_name']
+        self.item_names = names.reindex(item_ids).fillna(pd.Series(item_ids, index=item_ids)).to_numpy()
+        
+        self.user_to_idx = ingestor.user_to_idx
+        self.idx_to_user = dict(enumerate(user_ids))
+        self.item_to_idx = ingestor.item_to_idx
+        self.idx_to_item = dict(enumerate(item_ids))
+        
+        coo = self.user_item_matrix.tocoo()
+        self.user_item_df = pd.DataFrame({
+            'user_id': user_ids[coo.row],
+            'item_id': item_ids[coo.col],
+            'rating': coo.data,
+            'track_name': self.item_names[coo.col],
+        })
+        
+        n_users, n_items = self.user_item_matrix.shape
+        print(f"User-item matrix loaded from events: {self.user_item_matrix.shape}")
+        print(f"Matrix density: {self.user_item_matrix.nnz / max(n_users * n_items, 1):.6f}")
+        self._build_fallback()
+    
+    def _fit_matrix(self, dtype):
+        """The user-item matrix in `dtype` (no copy when it already is), or as stored."""
+        if dtype is None:
+            return self.user_item_matrix
+        return self.user_item_matrix.astype(dtype, copy=False)
+    
+    def _drop_fitted_serving(self, svd=False):
+        """
+        Drop serving structures derived from the previous fit: precomputed
+        tables and the candidate generator, and with `svd` also the SVD
+        shards and quantized factors, which hold the old item factors.
+        """
+        stale = self.tables is not None or self.candidate_generator is not None
+        if svd:
+            stale = stale or self.svd_shards is not None or self.svd_quantized is not None
+        if stale:
+            print("Model refitted: dropping precomputed tables, candidate generator"
+                  + (", SVD shards and quantized factors." if svd else "."))
+        self.tables = self.candidate_generator = None
+        if svd:
+            self.svd_quantized = None
+            if self.svd_shards is not None:
+                self.svd_shards.close()
+                self.svd_shards = None
+    
+    @timed('cf.fit_svd')
+    def fit_svd(self, n_components=50, algorithm='randomized', n_oversamples=10, n_iter=5, dtype=None):
+        """
+        Fit SVD model.
+
+        Args:
+            n_components (int): Number of latent factors.
+            algorithm (str): 'randomized' (sketch the range, then refine with power
+                             iterations) or 'arpack' (exact Lanczos via scipy).
+            n_oversamples (int): Extra sketch vectors beyond n_components (randomized only).
+            n_iter (int): Power iterations (randomized only); more is slower but more
+                          accurate when the spectrum decays slowly.
+            dtype (optional): e.g. np.float32 to fit and keep the factors in single
+                              precision (half the memory of float64).
+        """
+        print(f"Fitting SVD model with {n_components} components ({algorithm})...")
+        from sklearn.decomposition import TruncatedSVD
+        options = {'n_oversamples': n_oversamples, 'n_iter': n_iter} if algorithm == 'randomized' else {}
+        self.svd_model = TruncatedSVD(n_components=n_components, algorithm=algorithm, random_state=42, **options)
+        self.svd_factors = self.svd_model.fit_transform(self._fit_matrix(dtype))
+        self._drop_fitted_serving(svd=True)
         print(f"SVD explained variance ratio: {self.svd_model.explained_variance_ratio_.sum():.4f}")
     
-    def fit_nmf(self, n_components=50):
-        """Fit NMF model."""
+    def quantize_svd(self, dtype='int8', shortlist=None):
+        """
+        Score `recommend_svd` over reduced-precision item factors and re-rank
+        a shortlist with the exact factors.
+
+        Args:
+            dtype (str or None): 'int8' (per-item scales) or 'float16'; None goes back to exact scoring.
+            shortlist (int, optional): Candidates re-ranked exactly (default: max(10 * n, 100)).
+        """
+        from quantized_scoring import QuantizedItemFactors
+        
+        if self.svd_model is None:
+            raise ValueError("SVD model not fitted. Call fit_svd() first.")
+        self.svd_quantized = None
+        self.svd_shortlist = shortlist
+        if dtype:
+            self.svd_quantized = QuantizedItemFactors(self.svd_model.components_.T, dtype)
+    
+    def shard_svd_items(self, n_shards):
+        """
+        Serve `recommend_svd` from `n_shards` worker processes, each holding a
+        contiguous slice of the item factors and returning its local top-k.
+
+        Args:
+            n_shards (int): Number of shards; 0 or None goes back to single-process scoring.
+        """
+        from sharded_scoring import ShardedScorer
+        
+        if self.svd_model is None:
+            raise ValueError("SVD model not fitted. Call fit_svd() first.")
+        if self.svd_shards is not None:
+            self.svd_shards.close()
+            self.svd_shards = None
+        if n_shards:
+            item_factors = np.ascontiguousarray(self.svd_model.components_.T, dtype=np.float32)
+            self.svd_shards = ShardedScorer.from_matrix(item_factors, n_shards)
+    
+    def use_tables(self, tables):
+        """
+        Answer `recommend_*` calls from precomputed top-N tables where possible.
+
+        Args:
+            tables (RecommendationTables or None): Tables from `recommendation_tables.build_tables`;
+                                                   None goes back to live scoring.
+        """
+        if tables is not None and not tables.matches_cf(self):
+            print("Recommendation tables were built for other users or items; using live scoring.")
+            tables = None
+        self.tables = tables
+    
+    def use_candidate_generator(self, generator, item_rows=None, row_items=None):
+        """
+        Score `recommend_svd` over the tracks a CandidateGenerator proposes from
+        the user's history instead of over every item.
+
+        Args:
+            generator (CandidateGenerator or None): None goes back to full scoring.
+            item_rows (np.ndarray, optional): Generator track index of every CF item
+                                              (default: the same index).
+            row_items (np.ndarray, optional): CF item of every generator track, -1 if unknown
+                                              (default: the same index).
+        """
+        n_items = self.user_item_matrix.shape[1]
+        if generator is not None and item_rows is None and generator.n_items != n_items:
+            raise ValueError("The candidate generator was built for another catalogue; pass item_rows/row_items.")
+        self.candidate_generator = generator
+        self.candidate_item_rows = np.arange(n_items) if item_rows is None else np.asarray(item_rows)
+        self.candidate_row_items = np.arange(n_items) if row_items is None else np.asarray(row_items)
+    
+    def _svd_candidates(self, user_idx):
+        """Unrated CF items proposed for a user from the tracks in their history."""
+        rated_items = self.user_item_matrix[user_idx].indices
+        history = self.candidate_item_rows[rated_items]
+        candidates = self.candidate_row_items[self.candidate_generator.for_tracks(history[history >= 0])]
+        candidates = candidates[candidates >= 0]
+        return candidates[~np.isin(candidates, rated_items)]
+    
+    def _table_lookup(self, method, user_idx, n_recommendations):
+        """Tabulated recommendations, or None to fall back to live scoring."""
+        if self.tables is None:
+            return None
+        items = self.tables.lookup(method, user_idx, n_recommendations)
+        if items is None:
+            return None
+        increment('cf.recommend.table_hit')
+        return self.item_names[items].tolist()
+    
+    @timed('cf.fit_nmf')
+    def fit_nmf(self, n_components=50, max_iter=200, tol=None, callback=None, check_every=10, dtype=None):
+        """
+        Fit NMF model.
+
+        Without `tol` or `callback` this is a single NMF run of `max_iter`
+        iterations. Otherwise the fit runs in chunks of `check_every`
+        iterations, each continuing from the previous factors, and stops once
+        the reconstruction error improves by less than `tol` (relative) over a
+        chunk or the callback returns False.
+
+        Args:
+            n_components (int): Number of latent factors.
+            max_iter (int): Iteration budget.
+            tol (float, optional): Relative error improvement per chunk below which to stop.
+            callback (callable, optional): Called as callback(iteration, reconstruction_error)
+                                           after every chunk; return False to stop.
+            check_every (int): Iterations per chunk.
+            dtype (optional): e.g. np.float32 to fit in single precision.
+        """
         print(f"Fitting NMF model with {n_components} components...")
-        self.nmf_model = NMF(n_components=n_components, random_state=42, max_iter=200)
-        self.nmf_factors = self.nmf_model.fit_transform(self.user_item_matrix)
+        from sklearn.decomposition import NMF
+        from sklearn.exceptions import ConvergenceWarning
+        matrix = self._fit_matrix(dtype)
+        self.nmf_history = []
+        
+        if tol is None and callback is None:
+            self.nmf_model = NMF(n_components=n_components, random_state=42, max_iter=max_iter)
+            self.nmf_factors = self.nmf_model.fit_transform(matrix)
+        else:
+            W = H = None
+            iteration = 0
+            while iteration < max_iter:
+                chunk = min(check_every, max_iter - iteration)
+                model = NMF(n_components=n_components, random_state=42, max_iter=chunk,
+                            init='custom' if W is not None else None)
+                with warnings.catch_warnings():
+                    # Every chunk stops at its max_iter on purpose
+                    warnings.simplefilter('ignore', ConvergenceWarning)
+                    W = model.fit_transform(matrix, W=W, H=H)
+                H = model.components_
+                iteration += chunk
+                error = model.reconstruction_err_
+                previous = self.nmf_history[-1][1] if self.nmf_history else None
+                self.nmf_history.append((iteration, error))
+                if callback is not None and callback(iteration, error) is False:
+                    break
+                if tol is not None and previous is not None and previous - error <= tol * previous:
+                    print(f"NMF converged after {iteration} iterations.")
+                    break
+            self.nmf_model, self.nmf_factors = model, W
         print(f"NMF reconstruction error: {self.nmf_model.reconstruction_err_:.4f}")
     
+    @timed('cf.fit_user_based')
     def fit_user_based_cf(self, n_neighbors=20):
         """Fit user-based collaborative filtering model."""
         print(f"Fitting user-based CF with {n_neighbors} neighbors...")
+        from sklearn.neighbors import NearestNeighbors
         self.user_neighbors = NearestNeighbors(n_neighbors=n_neighbors, metric='cosine', algorithm='brute')
         self.user_neighbors.fit(self.user_item_matrix)
+        self._drop_fitted_serving()
     
+    @timed('cf.fit_item_based')
     def fit_item_based_cf(self, n_neighbors=20):
         """Fit item-based collaborative filtering model."""
         print(f"Fitting item-based CF with {n_neighbors} neighbors...")
         item_user_matrix = self.user_item_matrix.T
+        from sklearn.neighbors import NearestNeighbors
         self.item_neighbors = NearestNeighbors(n_neighbors=n_neighbors, metric='cosine', algorithm='brute')
         self.item_neighbors.fit(item_user_matrix)
+        self._drop_fitted_serving()
     
-    def recommend_svd(self, user_id, n_recommendations=5):
+    @timed('cf.recommend_svd')
+    def recommend_svd(self, user_id, n_recommendations=5, seed_metadata=None):
         """Get recommendations using SVD."""
         if self.svd_model is None:
             raise ValueError("SVD model not fitted. Call fit_svd() first.")
         
         if user_id not in self.user_to_idx:
-            print(f"User '{user_id}' not found in training data.")
-            return []
+            return self._unknown_user(user_id, n_recommendations, seed_metadata)
         
         user_idx = self.user_to_idx[user_id]
+        cached = self._table_lookup('svd', user_idx, n_recommendations)
+        if cached is not None:
+            return cached
         user_factors = self.svd_factors[user_idx]
         
+        if self.svd_shards is not None:
+            rated_items = self.user_item_matrix[user_idx].indices
+            top_item_indices, top_scores = self.svd_shards.top_k(user_factors, n_recommendations,
+                                                                 exclude=[rated_items])
+            return self.item_names[top_item_indices[0][np.isfinite(top_scores[0])]].tolist()
+        
+        if self.candidate_generator is not None:
+            candidates = self._svd_candidates(user_idx)
+            predicted_ratings = self.svd_model.components_[:, candidates].T @ user_factors
+            return self.item_names[candidates[top_k(predicted_ratings, n_recommendations, keys=candidates)]].tolist()
+        
+        if self.svd_quantized is not None:
+            rated_items = self.user_item_matrix[user_idx].indices
+            top_item_indices = self.svd_quantized.top_k(user_factors, n_recommendations,
+                                                        self.svd_model.components_.T,
+                                                        exclude=rated_items, shortlist=self.svd_shortlist)
+            return self.item_names[top_item_indices].tolist()
+        
         # Calculate predicted ratings for all items
         item_factors = self.svd_model.components_.T
         predicted_ratings = np.dot(item_factors, user_factors)
@@ -151,24 +474,57 @@ class CollaborativeFiltering:
         top_item_indices = unrated_items[top_indices]
         
         # Convert back to track names
-        recommendations = []
-        for item_idx in top_item_indices:
-            item_id = self.idx_to_item[item_idx]
-            track_name = self.user_item_df[self.user_item_df['item_id'] == item_id]['track_name'].iloc[0]
-            recommendations.append(track_name)
+        return self.item_names[top_item_indices].tolist()
+    
+    @timed('cf.recommend_svd_for_items')
+    def recommend_svd_for_items(self, item_indices, weights=None, n_recommendations=5, user_id=None):
+        """
+        Get SVD recommendations for a set of seed items, e.g. a playlist.
+
+        The seeds form a pseudo-user row that is folded into the SVD space
+        (row @ components.T, as TruncatedSVD.transform does) and scored
+        against every item in one product.
+
+        Args:
+            item_indices (array-like): Column indices of the seed items.
+            weights (array-like, optional): Weight per seed; defaults to 1.
+            n_recommendations (int): Number of recommendations.
+            user_id (str, optional): Known user whose own row is added to the profile.
+
+        Returns:
+            list: Recommended track names, excluding the seeds (and the user's items).
+        """
+        if self.svd_model is None:
+            raise ValueError("SVD model not fitted. Call fit_svd() first.")
         
-        return recommendations
+        item_indices = np.asarray(item_indices, dtype=np.int64)
+        weights = np.ones(len(item_indices)) if weights is None else np.asarray(weights, dtype=np.float64)
+        profile = np.bincount(item_indices, weights=weights, minlength=self.user_item_matrix.shape[1])
+        excluded = [item_indices]
+        if user_id is not None and user_id in self.user_to_idx:
+            user_row = self.user_item_matrix[self.user_to_idx[user_id]]
+            profile[user_row.indices] += user_row.data
+            excluded.append(user_row.indices)
+        
+        components = self.svd_model.components_
+        predicted_ratings = components.T @ (components @ profile)
+        predicted_ratings[np.concatenate(excluded)] = -np.inf
+        
+        return self.item_names[top_k(predicted_ratings, n_recommendations)].tolist()
     
-    def recommend_user_based(self, user_id, n_recommendations=5):
+    @timed('cf.recommend_user_based')
+    def recommend_user_based(self, user_id, n_recommendations=5, seed_metadata=None):
         """Get recommendations using user-based collaborative filtering."""
         if self.user_neighbors is None:
             raise ValueError("User-based model not fitted. Call fit_user_based_cf() first.")
         
         if user_id not in self.user_to_idx:
-            print(f"User '{user_id}' not found in training data.")
-            return []
+            return self._unknown_user(user_id, n_recommendations, seed_metadata)
         
         user_idx = self.user_to_idx[user_id]
+        cached = self._table_lookup('user_based', user_idx, n_recommendations)
+        if cached is not None:
+            return cached
         
         # Get similar users
         distances, neighbor_indices = self.user_neighbors.kneighbors(
@@ -199,24 +555,21 @@ class CollaborativeFiltering:
         top_item_indices = unrated_items[top_indices]
         
         # Convert back to track names
-        recommendations = []
-        for item_idx in top_item_indices:
-            item_id = self.idx_to_item[item_idx]
-            track_name = self.user_item_df[self.user_item_df['item_id'] == item_id]['track_name'].iloc[0]
-            recommendations.append(track_name)
-        
-        return recommendations
+        return self.item_names[top_item_indices].tolist()
     
-    def recommend_item_based(self, user_id, n_recommendations=5):
+    @timed('cf.recommend_item_based')
+    def recommend_item_based(self, user_id, n_recommendations=5, seed_metadata=None):
         """Get recommendations using item-based collaborative filtering."""
         if self.item_neighbors is None:
             raise ValueError("Item-based model not fitted. Call fit_item_based_cf() first.")
         
         if user_id not in self.user_to_idx:
-            print(f"User '{user_id}' not found in training data.")
-            return []
+            return self._unknown_user(user_id, n_recommendations, seed_metadata)
         
         user_idx = self.user_to_idx[user_id]
+        cached = self._table_lookup('item_based', user_idx, n_recommendations)
+        if cached is not None:
+            return cached
         user_items = self.user_item_matrix[user_idx].toarray().flatten()
         
         # Get items the user has rated
@@ -241,6 +594,7 @@ class CollaborativeFiltering:
             return []
         
         # Calculate scores based on similarity to rated items
+        from sklearn.metrics.pairwise import cosine_similarity
         scores = np.zeros(len(unrated_similar_items))
         for i, item_idx in enumerate(unrated_similar_items):
             for rated_item in rated_items:
@@ -255,14 +609,9 @@ class CollaborativeFiltering:
         top_item_indices = [unrated_similar_items[i] for i in top_indices]
         
         # Convert back to track names
-        recommendations = []
-        for item_idx in top_item_indices:
-            item_id = self.idx_to_item[item_idx]
-            track_name = self.user_item_df[self.user_item_df['item_id'] == item_id]['track_name'].iloc[0]
-            recommendations.append(track_name)
-        
-        return recommendations
+        return self.item_names[top_item_indices].tolist()
     
+    @timed('cf.evaluate_model')
     def evaluate_model(self, max_users=10):
         """Simple evaluation of the collaborative filtering model."""
         print("Evaluating collaborative filtering model...")
@@ -363,4 +712,8 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    from profiling import parse_profile_args, profile_run
+    args = parse_profile_args("Collaborative filtering demo")
+
+    with profile_run('collaborative_filtering', args):
+        main()
\ No newline at end of file
@@ -0,0 +1,353 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import csr_matrix
+import tracemalloc
+import time
+from instrumentation import timed
+
+
+def _split_distinct(series, separator):
+    """
+    Tokenise each distinct value of a delimited entity column once.
+
+    Args:
+        series (pd.Series): Column such as `artists` ("A;B") or `track_genre` ("pop rock").
+        separator (str or None): Entity separator; None splits on whitespace.
+
+    Returns:
+        tuple: (per-row code into the distinct values, number of distinct values,
+                distinct-value position of every token, token array)
+    """
+    codes, distinct = pd.factorize(series.fillna(''))
+    parts = pd.Series(distinct, dtype=object).str.split(separator)
+    exploded = parts.explode()
+    mask = exploded.notna() & (exploded != '')
+    return (codes, len(distinct), exploded.index[mask].to_numpy(dtype=np.int64),
+            exploded[mask].to_numpy(dtype=object))
+
+
+def _reserve(array, used, size, growth=1.5):
+    """`array` if it holds `size` elements, else a larger copy of its first `used` elements."""
+    if len(array) >= size:
+        return array
+    grown = np.empty(max(size, int(len(array) * growth)), dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class AppendableRows:
+    """
+    CSR matrix that grows by rows.
+
+    data, indices and indptr live in buffers with spare capacity that grow
+    geometrically, so appending k rows copies O(k) values amortised instead of
+    rebuilding the matrix. `matrix` is a view of the filled part; views handed
+    out earlier stay valid because appends only write past their end.
+    """
+
+    def __init__(self, matrix):
+        matrix = matrix.tocsr()
+        self.shape = matrix.shape
+        self.nnz = int(matrix.indptr[-1])
+        self._data, self._indices, self._indptr = matrix.data, matrix.indices, matrix.indptr
+
+    def append(self, rows):
+        """Append the rows of a CSR matrix; it may have more columns than the matrix so far."""
+        n_rows, nnz = self.shape[0], self.nnz
+        size = nnz + rows.nnz
+        self._data = _reserve(self._data, nnz, size)
+        self._indices = _reserve(self._indices, nnz, size)
+        self._indptr = _reserve(self._indptr, n_rows + 1, n_rows + 1 + rows.shape[0])
+
+        self._data[nnz:size] = rows.data
+        self._indices[nnz:size] = rows.indices
+        self._indptr[n_rows + 1:n_rows + 1 + rows.shape[0]] = rows.indptr[1:] + nnz
+        self.shape = (n_rows + rows.shape[0], max(self.shape[1], rows.shape[1]))
+        self.nnz = size
+
+    @property
+    def matrix(self):
+        n_rows = self.shape[0]
+        return csr_matrix((self._data[:self.nnz], self._indices[:self.nnz], self._indptr[:n_rows + 1]),
+                          shape=self.shape, copy=False)
+
+
+def matrix_nbytes(matrix):
+    """Bytes used by the data, indices and indptr arrays of a sparse matrix."""
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+class ContentFeatureBuilder:
+    """
+    Memory-lean TF-IDF features from genres and artists.
+
+    Artists are tokenised as whole entities (split on ';' only) and genres as
+    categorical tokens, directly from the source columns without building a
+    combined text column. The artist vocabulary can be capped to the most
+    frequent artists or replaced by a fixed number of hashed buckets. Output
+    is an L2-normalised float32 CSR matrix with int32 indices, with sklearn's
+    smoothed IDF: ln((1 + n) / (1 + df)) + 1.
+
+    Genres and artists first seen by `partial_fit_transform` get columns after
+    the existing ones, so the layout of earlier rows never changes. They are
+    kept in small token -> column dicts next to the fitted vocabularies, which
+    stay untouched so their hash tables are not rebuilt on every batch.
+    Document frequencies are kept so IDF weights can be re-applied later.
+    """
+
+    def __init__(self, max_artists=None, n_hash_features=None, min_df=1,
+                 genre_weight=1.0, artist_weight=1.0, dtype=np.float32):
+        """
+        Args:
+            max_artists (int, optional): Keep only the most frequent artists.
+            n_hash_features (int, optional): Hash artists into this many buckets instead
+                                             of keeping a vocabulary.
+            min_df (int): Drop artists appearing in fewer tracks.
+            genre_weight (float): Multiplier for the genre block.
+            artist_weight (float): Multiplier for the artist block.
+            dtype: Output value type.
+        """
+        self.max_artists = max_artists
+        self.n_hash_features = n_hash_features
+        self.min_df = min_df
+        self.genre_weight = genre_weight
+        self.artist_weight = artist_weight
+        self.dtype = dtype
+        self.genre_vocabulary = None
+        self.artist_vocabulary = None
+        self.document_frequency = None
+        self.n_documents = 0
+        self.weighted_documents = 0
+        self.n_columns = 0
+        self.added_genres = {}
+        self.added_artists = {}
+
+    @property
+    def n_features(self):
+        return self.n_columns
+
+    def _hash(self, tokens):
+        hashes = pd.util.hash_array(tokens.astype(object))
+        return (hashes % np.uint64(self.n_hash_features)).astype(np.int64)
+
+    @staticmethod
+    def _columns(vocabulary, columns, added, tokens):
+        """Feature column of every token; -1 for unknown tokens."""
+        positions = vocabulary.get_indexer(tokens)
+        mapped = np.full(len(positions), -1, dtype=np.int64)
+        known = positions >= 0
+        mapped[known] = columns[positions[known]]
+        if added:
+            missing = np.flatnonzero(~known)
+            mapped[missing] = [added.get(token, -1) for token in tokens[missing]]
+        return mapped
+
+    def _block(self, codes, n_distinct, token_rows, token_columns):
+        """
+        Binary rows for one entity column.
+
+        The distinct values are mapped to feature columns once; every row then
+        picks its distinct value's row by sparse fancy indexing.
+        """
+        keep = token_columns >= 0
+        incidence = csr_matrix((np.ones(keep.sum(), dtype=self.dtype), (token_rows[keep], token_columns[keep])),
+                               shape=(n_distinct, self.n_features), dtype=self.dtype)
+        incidence.sum_duplicates()
+        incidence.data[:] = 1
+        return incidence[codes]
+
+    def _binary_matrix(self, genres, artists):
+        """Binary document-term matrix (an entity counts once per track); unknown entities are dropped."""
+        genre_codes, n_genre_values, genre_rows, genre_tokens = genres
+        artist_codes, n_artist_values, artist_rows, artist_tokens = artists
+
+        genre_columns = self._columns(self.genre_vocabulary, self.genre_columns, self.added_genres, genre_tokens)
+        if self.n_hash_features:
+            artist_columns = self._hash(artist_tokens) + self.artist_offset
+        else:
+            artist_columns = self._columns(self.artist_vocabulary, self.artist_columns, self.added_artists,
+                                           artist_tokens)
+
+        return (self._block(genre_codes, n_genre_values, genre_rows, genre_columns)
+                + self._block(artist_codes, n_artist_values, artist_rows, artist_columns)).tocsr()
+
+    def _weight(self, matrix):
+        """Apply IDF and block weights, then L2-normalise rows."""
+        idf = (np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1).astype(self.dtype)
+        block_weights = np.full(self.n_columns, self.artist_weight, dtype=self.dtype)
+        block_weights[self.genre_columns] = self.genre_weight
+        block_weights[list(self.added_genres.values())] = self.genre_weight
+        idf *= block_weights
+
+        matrix.data *= idf[matrix.indices]
+        squared = np.bincount(np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr)),
+                              weights=matrix.data.astype(np.float64) ** 2, minlength=matrix.shape[0])
+        norms = np.sqrt(squared).astype(self.dtype)
+        norms[norms == 0] = 1
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+
+        matrix.indices = matrix.indices.astype(np.int32, copy=False)
+        matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+        return matrix
+
+    @timed('content.features_fit')
+    def fit_transform(self, df):
+        """
+        Learn the vocabulary and IDF weights from `df` and return its feature matrix.
+
+        Args:
+            df (pd.DataFrame): Tracks with `track_genre` and `artists` columns.
+
+        Returns:
+            scipy.sparse.csr_matrix: (len(df), n_features) float32 matrix.
+        """
+        genres = _split_distinct(df['track_genre'], None)
+        artists = _split_distinct(df['artists'], ';')
+        self.genre_vocabulary = pd.Index(pd.unique(genres[3]))
+
+        if not self.n_hash_features:
+            artist_codes, n_artist_values, artist_rows, artist_tokens = artists
+            entity_codes, entities = pd.factorize(artist_tokens)
+            # Document frequency of an artist = rows whose artists value contains it
+            value_counts = np.bincount(artist_codes, minlength=n_artist_values)
+            pairs = np.unique(artist_rows * max(len(entities), 1) + entity_codes)
+            artist_df = np.bincount(pairs % max(len(entities), 1),
+                                    weights=value_counts[pairs // max(len(entities), 1)],
+                                    minlength=len(entities))
+            keep = np.flatnonzero(artist_df >= self.min_df)
+            if self.max_artists is not None and len(keep) > self.max_artists:
+                keep = np.sort(keep[np.argsort(-artist_df[keep], kind='stable')[:self.max_artists]])
+            self.artist_vocabulary = pd.Index(entities[keep])
+
+        self.genre_columns = np.arange(len(self.genre_vocabulary))
+        self.artist_offset = len(self.genre_vocabulary)
+        n_artists = self.n_hash_features or len(self.artist_vocabulary)
+        self.artist_columns = None if self.n_hash_features else self.artist_offset + np.arange(n_artists)
+        self.n_columns = self.artist_offset + n_artists
+        self.added_genres, self.added_artists = {}, {}
+
+        matrix = self._binary_matrix(genres, artists)
+        self.n_documents = self.weighted_documents = len(df)
+        self.document_frequency = np.bincount(matrix.indices, minlength=self.n_features).astype(np.int64)
+        return self._weight(matrix)
+
+    def _extend(self, vocabulary, columns, added, tokens):
+        """Give unknown tokens new columns after the existing ones, recorded in `added`."""
+        unseen = pd.unique(tokens[self._columns(vocabulary, columns, added, tokens) < 0])
+        added.update(zip(unseen, range(self.n_columns, self.n_columns + len(unseen))))
+        self.n_columns += len(unseen)
+
+    def partial_fit_transform(self, df):
+        """
+        Add `df` to the fitted corpus and return its feature matrix.
+
+        New genres, and new artists unless the vocabulary was capped
+        (`max_artists`, `min_df` > 1) or is hashed, get new columns.
+        Document frequencies and the document count are updated; the rows
+        are weighted with the updated IDF, while rows returned earlier keep
+        theirs until passed through `reweight`.
+
+        Args:
+            df (pd.DataFrame): Tracks with `track_genre` and `artists` columns.
+
+        Returns:
+            scipy.sparse.csr_matrix: (len(df), n_features) float32 matrix.
+        """
+        if self.genre_vocabulary is None:
+            raise ValueError("Feature builder not fitted. Call fit_transform() first.")
+        genres = _split_distinct(df['track_genre'], None)
+        artists = _split_distinct(df['artists'], ';')
+        self._extend(self.genre_vocabulary, self.genre_columns, self.added_genres, genres[3])
+        if not self.n_hash_features and self.max_artists is None and self.min_df <= 1:
+            self._extend(self.artist_vocabulary, self.artist_columns, self.added_artists, artists[3])
+
+        matrix = self._binary_matrix(genres, artists)
+        self.n_documents += len(df)
+        document_frequency = np.zeros(self.n_columns, dtype=np.int64)
+        document_frequency[:len(self.document_frequency)] = self.document_frequency
+        self.document_frequency = document_frequency + np.bincount(matrix.indices, minlength=self.n_columns)
+        return self._weight(matrix)
+
+    def reweight(self, matrix):
+        """
+        Re-apply the current IDF weights to rows this builder produced.
+
+        Features are binary before weighting, so the sparsity pattern alone
+        gives back the unweighted rows.
+        """
+        binary = csr_matrix((np.ones(matrix.nnz, dtype=self.dtype), matrix.indices.copy(), matrix.indptr.copy()),
+                            shape=(matrix.shape[0], self.n_columns))
+        self.weighted_documents = self.n_documents
+        return self._weight(binary)
+
+    def transform(self, df):
+        """Feature matrix of `df` using the fitted vocabulary and IDF weights."""
+        if self.genre_vocabulary is None:
+            raise ValueError("Feature builder not fitted. Call fit_transform() first.")
+        genres = _split_distinct(df['track_genre'], None)
+        artists = _split_distinct(df['artists'], ';')
+        return self._weight(self._binary_matrix(genres, artists))
+
+
+def compare_with_tfidf(df, **builder_options):
+    """
+    Measure fit time, peak memory and matrix size of the default TfidfVectorizer
+    pipeline against ContentFeatureBuilder on the same tracks.
+
+    Returns:
+        dict: Measurements for 'tfidf' and 'lean'.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    def tfidf_pipeline():
+        content = df['track_genre'].fillna('') + ' ' + df['artists'].fillna('')
+        vectorizer = TfidfVectorizer(stop_words='english')
+        return vectorizer.fit_transform(content), len(vectorizer.vocabulary_)
+
+    def lean_pipeline():
+        builder = ContentFeatureBuilder(**builder_options)
+        return builder.fit_transform(df), builder.n_features
+
+    report = {}
+    for label, pipeline in (('tfidf', tfidf_pipeline), ('lean', lean_pipeline)):
+        start = time.perf_counter()
+        pipeline()
+        fit_time = time.perf_counter() - start
+
+        tracemalloc.start()
+        matrix, n_features = pipeline()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        report[label] = {
+            'fit_s': fit_time,
+            'peak_memory_mb': peak / 1024**2,
+            'matrix_mb': matrix_nbytes(matrix) / 1024**2,
+            'n_features': n_features,
+            'nnz': int(matrix.nnz),
+            'dtype': str(matrix.dtype),
+            'index_dtype': str(matrix.indices.dtype),
+        }
+
+    print("\nContent features (TfidfVectorizer -> lean builder):")
+    for key in report['tfidf']:
+        before, after = report['tfidf'][key], report['lean'][key]
+        if isinstance(before, float):
+            print(f"  {key:<16} {before:>12.3f} -> {after:>12.3f}")
+        else:
+            print(f"  {key:<16} {str(before):>12} -> {str(after):>12}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from basic_recommender import ContentBasedRecommender
+
+    parser = argparse.ArgumentParser(description="Compare the lean content features with TfidfVectorizer.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--max-artists', type=int, help="Cap the artist vocabulary")
+    parser.add_argument('--hash-features', type=int, help="Hash artists into this many buckets")
+    args = parser.parse_args()
+
+    recommender = ContentBasedRecommender(args.data)
+    compare_with_tfidf(recommender.spotify_df, max_artists=args.max_artists, n_hash_features=args.hash_features)
@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+from instrumentation import span, increment
+
+
+class ComponentScheduler:
+    """
+    Runs recommendation components concurrently under a per-call deadline.
+
+    Every component has an expected cost, an exponentially weighted average
+    of its measured latencies seeded with a prior. Components are started
+    cheapest first; one whose expected cost exceeds the remaining budget is
+    skipped, and one left running by an earlier call that returned late is
+    not started again. Calls running at the same time (e.g. one per
+    serving thread) each run their own components. When the deadline
+    expires the call returns whatever finished; late components that had
+    not started are cancelled, and those already running finish in the
+    background and only update their expected cost. Every skip shrinks a
+    component's expected cost by `decay`, so a component that became fast
+    is tried (and re-measured) again after a few calls instead of staying
+    disabled.
+    """
+
+    def __init__(self, expected_ms, max_workers=4, smoothing=0.3, decay=0.8):
+        """
+        Args:
+            expected_ms (dict): Prior expected cost in milliseconds per component name.
+            max_workers (int): Components running at once.
+            smoothing (float): Weight of the newest latency in the running average.
+            decay (float): Factor applied to the expected cost of a skipped component.
+        """
+        self.expected_ms = dict(expected_ms)
+        self.max_workers = max_workers
+        self.smoothing = smoothing
+        self.decay = decay
+        # Late runs per component, abandoned by calls that already returned
+        self.abandoned = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _observe(self, name, elapsed_ms, timing):
+        with self._lock:
+            previous = self.expected_ms.get(name, elapsed_ms)
+            self.expected_ms[name] = (1 - self.smoothing) * previous + self.smoothing * elapsed_ms
+            timing['done'] = True
+            if timing.get('abandoned'):
+                self.abandoned[name] -= 1
+                if self.abandoned[name] == 0:
+                    del self.abandoned[name]
+
+    def _run_component(self, name, func, timing):
+        start = time.perf_counter()
+        try:
+            with span(f'component.{name}'):
+                return func()
+        finally:
+            timing['ms'] = 1000 * (time.perf_counter() - start)
+            self._observe(name, timing['ms'], timing)
+
+    def run(self, components, deadline_ms):
+        """
+        Run components until they finish or `deadline_ms` passes.
+
+        Args:
+            components (list): (name, callable) pairs; each callable returns a list.
+            deadline_ms (float): Budget for this call.
+
+        Returns:
+            tuple: (results of the components that finished in time by name,
+                    report by name with 'status' ('ok', 'late', 'error', 'skipped'
+                    or 'busy'), 'expected_ms' and, once started, 'ms')
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='component')
+        start = time.perf_counter()
+        report, futures = {}, {}
+
+        with self._lock:
+            ordered = sorted(components, key=lambda component: self.expected_ms.get(component[0], 0.0))
+        for name, func in ordered:
+            remaining = deadline_ms - 1000 * (time.perf_counter() - start)
+            with self._lock:
+                expected = self.expected_ms.get(name, 0.0)
+                if name in self.abandoned:
+                    report[name] = {'status': 'busy', 'expected_ms': expected}
+                    continue
+                if expected > remaining:
+                    report[name] = {'status': 'skipped', 'expected_ms': expected}
+                    self.expected_ms[name] = expected * self.decay
+                    continue
+            timing = {}
+            futures[self._pool.submit(self._run_component, name, func, timing)] = (name, timing)
+            report[name] = {'status': 'running', 'expected_ms': expected}
+
+        remaining = max(deadline_ms - 1000 * (time.perf_counter() - start), 0.0)
+        wait(futures, timeout=remaining / 1000)
+
+        results = {}
+        for future, (name, timing) in futures.items():
+            if not future.done():
+                # A component still queued behind other calls' components is dropped
+                with self._lock:
+                    if not future.cancel() and not timing.get('done'):
+                        timing['abandoned'] = True
+                        self.abandoned[name] = self.abandoned.get(name, 0) + 1
+                report[name].update(status='late', ms=1000 * (time.perf_counter() - start))
+                increment(f'component.{name}.late')
+                continue
+            report[name]['ms'] = timing.get('ms', 0.0)
+            try:
+                results[name] = future.result()
+                report[name]['status'] = 'ok'
+            except Exception as e:
+                report[name].update(status='error', error=str(e))
+        return results, report
+
+    def close(self):
+        """Stop the worker threads once running components finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -1,16 +1,29 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from collections import Counter
 import warnings
 import os
 import sys
+from instrumentation import span
 warnings.filterwarnings('ignore')
 
-# Set style for better visualizations
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# matplotlib and seaborn are imported on first plot, so text-only analysis
+# (and streaming EDA workers) never pay for them
+plt = None
+sns = None
+
+
+def _load_plotting():
+    """Import matplotlib/seaborn and set the visualization style, once."""
+    global plt, sns
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        import seaborn
+
+        # Set style for better visualizations
+        pyplot.style.use('seaborn-v0_8')
+        seaborn.set_palette("husl")
+        plt, sns = pyplot, seaborn
 
 class SpotifyEDA:
     """
@@ -58,7 +71,8 @@ class SpotifyEDA:
         if not os.path.exists(self.data_path):
             raise FileNotFoundError(f"Dataset not found at: {self.data_path}")
         
-        self.df = pd.read_csv(self.data_path)
+        with span('eda.load'):
+            self.df = pd.read_csv(self.data_path)
         print(f"Dataset loaded successfully!")
         print(f"Dataset shape: {self.df.shape}")
         print(f"Memory usage: {self.df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
@@ -198,6 +212,7 @@ class SpotifyEDA:
     
     def create_visualizations(self):
         """Create comprehensive visualizations for the dataset."""
+        _load_plotting()
         print("\n" + "="*60)
         print(" CREATING VISUALIZATIONS")
         print("="*60)
@@ -265,8 +280,8 @@ class SpotifyEDA:
         # 7. Genre popularity box plot
         plt.subplot(4, 3, 7)
         top_genres = self.df['track_genre'].value_counts().head(8).index
-        genre_pop_data = [self.df[self.df['track_genre'] == genre]['popularity'].values 
-                         for genre in top_genres]
+        genre_groups = self.df.loc[self.df['track_genre'].isin(top_genres)].groupby('track_genre')['popularity']
+        genre_pop_data = [genre_groups.get_group(genre).values for genre in top_genres]
         plt.boxplot(genre_pop_data, labels=top_genres)
         plt.title('Popularity Distribution by Top Genres', fontsize=12, fontweight='bold')
         plt.xlabel('Genre')
@@ -322,9 +337,41 @@ class SpotifyEDA:
         plt.show()
         
         print(" Visualizations saved as 'spotify_eda_visualizations.png' in the resources folder.")
+
+    def create_fast_visualizations(self, output_dir='../resources/eda_panels', workers=None, sample_size=None):
+        """
+        Scalable alternative to `create_visualizations`.
+
+        Each panel is reduced to pre-binned aggregates (2D histograms instead of
+        full-resolution scatter plots, one groupby for the genre box plot) and
+        rendered to its own image in parallel worker processes.
+
+        Args:
+            output_dir (str): Directory for the panel images.
+            workers (int, optional): Number of rendering processes.
+            sample_size (int, optional): Draw the scatter panels from a genre-stratified
+                                         sample of this size instead of 2D histograms.
+        """
+        from eda_plots import prepare_plot_data, render_panels
+
+        print("\n" + "="*60)
+        print(" CREATING VISUALIZATIONS (FAST MODE)")
+        print("="*60)
+
+        with span('eda.plot_aggregates'):
+            panels = prepare_plot_data(self.df, sample_size=sample_size)
+        with span('eda.plot_render'):
+            paths = render_panels(panels, output_dir, workers=workers)
+
+        print(f" {len(paths)} panels saved in: {os.path.abspath(output_dir)}")
     
     def generate_summary_report(self):
-        """Generate a comprehensive summary report."""
+        """
+        Generate a comprehensive summary report.
+
+        Computed from the loaded DataFrame; stored statistics (`--stats-store`)
+        are only read by StreamingSpotifyEDA.
+        """
         print("\n" + "="*60)
         print(" EDA SUMMARY REPORT")
         print("="*60)
@@ -380,8 +427,15 @@ class SpotifyEDA:
         
         print(f"\n EDA analysis completed successfully!")
     
-    def run_full_analysis(self):
-        """Run the complete EDA analysis."""
+    def run_full_analysis(self, fast_plots=False, plot_workers=None, plot_sample_size=None):
+        """
+        Run the complete EDA analysis.
+
+        Args:
+            fast_plots (bool): Render pre-aggregated panels in parallel instead of the full figure.
+            plot_workers (int, optional): Number of rendering processes in fast mode.
+            plot_sample_size (int, optional): Stratified sample size for the scatter panels in fast mode.
+        """
         print(" Starting Comprehensive Spotify Dataset EDA Analysis")
         print("="*80)
         
@@ -390,19 +444,64 @@ class SpotifyEDA:
         self.analyze_genres()
         self.analyze_artists()
         self.analyze_audio_features()
-        self.create_visualizations()
+        if fast_plots:
+            self.create_fast_visualizations(workers=plot_workers, sample_size=plot_sample_size)
+        else:
+            self.create_visualizations()
         self.generate_summary_report()
         
         print("\n EDA Analysis Complete!")
-        print(" Check 'spotify_eda_visualizations.png' for visualizations")
+        if fast_plots:
+            print(" Check the 'eda_panels' folder in resources for visualizations")
+        else:
+            print(" Check 'spotify_eda_visualizations.png' for visualizations")
+
+def main(streaming=False, chunksize=200_000, workers=1, fast_plots=False, plot_sample_size=None, store_dir=None):
+    """
+    Main function to run the EDA analysis.
 
-def main():
-    """Main function to run the EDA analysis."""
-    # Initialize EDA analyzer (will auto-find dataset)
-    eda = SpotifyEDA()
+    Args:
+        streaming (bool): Use the single-pass, chunked StreamingSpotifyEDA.
+        chunksize (int): Rows per chunk in streaming mode.
+        workers (int): Worker processes summarising chunks in streaming mode.
+        fast_plots (bool): Render pre-aggregated panels in parallel.
+        plot_sample_size (int, optional): Stratified sample size for the scatter panels.
+        store_dir (str, optional): Report from the statistics stored in this directory,
+                                   recomputing only changed partitions (implies streaming).
+    """
+    if streaming or store_dir is not None:
+        from streaming_eda import StreamingSpotifyEDA
+        eda = StreamingSpotifyEDA(chunksize=chunksize, workers=workers, store_dir=store_dir)
+    else:
+        # Initialize EDA analyzer (will auto-find dataset)
+        eda = SpotifyEDA()
     
     # Run complete analysis
-    eda.run_full_analysis()
+    eda.run_full_analysis(fast_plots=fast_plots, plot_sample_size=plot_sample_size)
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    from profiling import add_profile_arguments, profile_run
+
+    parser = add_profile_arguments(argparse.ArgumentParser(description="Spotify dataset EDA"))
+    parser.add_argument('--streaming', action='store_true',
+                        help="Single pass over the CSV in chunks with bounded memory")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="Rows per chunk (or partition) in streaming mode")
+    parser.add_argument('--stats-store', nargs='?', const='default', metavar='DIR',
+                        help="Reuse stored statistics, recomputing only changed partitions "
+                             "(default directory: results/eda_stats)")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes in streaming mode")
+    parser.add_argument('--fast-plots', action='store_true',
+                        help="Render pre-binned panels to separate images in parallel")
+    parser.add_argument('--plot-sample-size', type=int,
+                        help="Draw scatter panels from a genre-stratified sample of this size")
+    args = parser.parse_args()
+
+    store_dir = args.stats_store
+    if store_dir == 'default':
+        from eda_store import DEFAULT_STORE_DIR
+        store_dir = DEFAULT_STORE_DIR
+
+    with profile_run('eda', args):
+        main(streaming=args.streaming, chunksize=args.chunksize, workers=args.workers,
+             fast_plots=args.fast_plots, plot_sample_size=args.plot_sample_size, store_dir=store_dir)
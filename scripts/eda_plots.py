@@ -0,0 +1,221 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+CORRELATION_FEATURES = ['danceability', 'energy', 'loudness', 'speechiness',
+                        'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo']
+
+# Panels drawn from 2D aggregates: name -> (x column, y column, colormap, sample color, title)
+DENSITY_PANELS = {
+    'energy_vs_valence': ('energy', 'valence', 'Purples', 'purple', 'Energy vs Valence Density'),
+    'danceability_vs_energy': ('danceability', 'energy', 'Oranges', 'orange', 'Danceability vs Energy Density'),
+    'acousticness_vs_instrumentalness': ('acousticness', 'instrumentalness', 'BuGn', 'teal', 'Acousticness vs Instrumentalness'),
+    'speechiness_vs_liveness': ('speechiness', 'liveness', 'YlOrBr', 'gold', 'Speechiness vs Liveness'),
+}
+
+
+def stratified_sample(df, n, column='track_genre', seed=42):
+    """
+    Sample about `n` rows keeping each value of `column` at its share of the data.
+
+    Returns:
+        pd.DataFrame: The sampled rows (all rows if the frame has at most `n`).
+    """
+    if n is None or len(df) <= n:
+        return df
+    fraction = n / len(df)
+    return df.groupby(column, group_keys=False).sample(frac=fraction, random_state=seed)
+
+
+def _histogram(values, bins):
+    counts, edges = np.histogram(values[~np.isnan(values)], bins=bins)
+    return {'counts': counts, 'edges': edges, 'mean': float(np.nanmean(values))}
+
+
+def _box_stats(groups, labels, max_fliers=200, seed=42):
+    """Box plot statistics per group, in the format of `Axes.bxp`."""
+    rng = np.random.default_rng(seed)
+    stats = []
+    for label in labels:
+        values = groups.get(label, np.empty(0))
+        if len(values) == 0:
+            continue
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        low = values[values >= q1 - 1.5 * iqr].min()
+        high = values[values <= q3 + 1.5 * iqr].max()
+        fliers = values[(values < low) | (values > high)]
+        if len(fliers) > max_fliers:
+            fliers = rng.choice(fliers, max_fliers, replace=False)
+        stats.append({'label': label, 'med': median, 'q1': q1, 'q3': q3,
+                      'whislo': low, 'whishi': high, 'fliers': fliers})
+    return stats
+
+
+def prepare_plot_data(df, bins=50, density_bins=100, sample_size=None, seed=42):
+    """
+    Reduce the dataset to the small aggregates each panel needs.
+
+    All per-row work happens here in NumPy/pandas; rendering then only draws
+    bins, counts and box statistics, so its cost no longer grows with rows.
+
+    Args:
+        df (pd.DataFrame): The Spotify tracks dataset.
+        bins (int): Bins for the 1D histograms.
+        density_bins (int): Bins per axis for the 2D density panels.
+        sample_size (int, optional): If set, the density panels are drawn as
+                                     scatter plots of a genre-stratified sample instead.
+        seed (int): Seed for sampling.
+
+    Returns:
+        dict: Panel name -> plot data.
+    """
+    panels = {}
+
+    genre_counts = df['track_genre'].value_counts()
+    panels['genre_counts'] = {'labels': genre_counts.index[:15].tolist(),
+                              'counts': genre_counts.values[:15]}
+
+    panels['popularity'] = _histogram(df['popularity'].to_numpy(dtype=np.float64), bins)
+    panels['duration'] = _histogram(df['duration_ms'].to_numpy(dtype=np.float64) / (1000 * 60), bins)
+    panels['tempo'] = _histogram(df['tempo'].to_numpy(dtype=np.float64), bins)
+    panels['correlation'] = {'matrix': df[CORRELATION_FEATURES].corr().to_numpy(),
+                             'labels': CORRELATION_FEATURES}
+
+    sample = stratified_sample(df, sample_size, seed=seed) if sample_size else None
+    for name, (x, y, _, _, _) in DENSITY_PANELS.items():
+        if sample is not None:
+            panels[name] = {'x': sample[x].to_numpy(), 'y': sample[y].to_numpy()}
+        else:
+            counts, x_edges, y_edges = np.histogram2d(df[x].to_numpy(dtype=np.float64),
+                                                      df[y].to_numpy(dtype=np.float64),
+                                                      bins=density_bins)
+            panels[name] = {'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges}
+
+    # One groupby for all top genres instead of re-filtering the frame per genre
+    top_genres = genre_counts.index[:8].tolist()
+    grouped = df.loc[df['track_genre'].isin(top_genres), ['track_genre', 'popularity']].groupby('track_genre')['popularity']
+    groups = {genre: values.to_numpy() for genre, values in grouped}
+    panels['genre_popularity'] = {'stats': _box_stats(groups, top_genres, seed=seed)}
+
+    key_counts = df['key'].value_counts().sort_index()
+    panels['key'] = {'labels': [KEY_NAMES[i] for i in key_counts.index], 'counts': key_counts.values}
+
+    mode_counts = df['mode'].value_counts().sort_index()
+    panels['mode'] = {'labels': [['Minor', 'Major'][i] for i in mode_counts.index], 'counts': mode_counts.values}
+
+    return panels
+
+
+def _draw_histogram(ax, data, color, title, xlabel, unit=''):
+    widths = np.diff(data['edges'])
+    ax.bar(data['edges'][:-1], data['counts'], width=widths, align='edge',
+           color=color, alpha=0.7, edgecolor='black')
+    ax.axvline(data['mean'], color='red', linestyle='--', label=f"Mean: {data['mean']:.1f}{unit}")
+    ax.set_title(title, fontsize=12, fontweight='bold')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Frequency')
+    ax.legend()
+
+
+def _draw_density(ax, data, name):
+    from matplotlib.colors import LogNorm
+
+    x, y, cmap, color, title = DENSITY_PANELS[name]
+    if 'counts' in data:
+        counts = np.ma.masked_equal(data['counts'].T, 0)
+        mesh = ax.pcolormesh(data['x_edges'], data['y_edges'], counts, cmap=cmap, norm=LogNorm())
+        ax.figure.colorbar(mesh, ax=ax, label='Tracks')
+    else:
+        ax.scatter(data['x'], data['y'], alpha=0.5, s=1, color=color)
+    ax.set_xlabel(x.capitalize())
+    ax.set_ylabel(y.capitalize())
+    ax.set_title(title, fontsize=12, fontweight='bold')
+
+
+def render_panel(name, data, output_dir, dpi=150):
+    """
+    Render one panel to `<output_dir>/<name>.png`.
+
+    Draws on a standalone Figure rather than through pyplot, so rendering
+    inline (workers=1) leaves the caller's pyplot backend and open figures
+    untouched, and worker processes never start a GUI backend.
+
+    Returns:
+        str: Path of the written image.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 5))
+    ax = fig.subplots()
+
+    if name == 'genre_counts':
+        ax.bar(data['labels'], data['counts'], color='skyblue', alpha=0.7)
+        ax.set_title('Top 15 Genres by Track Count', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Genre')
+        ax.set_ylabel('Number of Tracks')
+        ax.tick_params(axis='x', rotation=45)
+    elif name == 'popularity':
+        _draw_histogram(ax, data, 'lightgreen', 'Track Popularity Distribution', 'Popularity Score')
+    elif name == 'duration':
+        _draw_histogram(ax, data, 'lightcoral', 'Track Duration Distribution', 'Duration (minutes)', ' min')
+    elif name == 'tempo':
+        _draw_histogram(ax, data, 'lightblue', 'Tempo Distribution', 'Tempo (BPM)', ' BPM')
+    elif name == 'correlation':
+        image = ax.imshow(data['matrix'], cmap='coolwarm', vmin=-1, vmax=1)
+        labels = data['labels']
+        ax.set_xticks(range(len(labels)), labels, rotation=45, ha='right')
+        ax.set_yticks(range(len(labels)), labels)
+        for i in range(len(labels)):
+            for j in range(len(labels)):
+                ax.text(j, i, f"{data['matrix'][i, j]:.2f}", ha='center', va='center', fontsize=7)
+        fig.colorbar(image, ax=ax, shrink=0.8)
+        ax.set_title('Audio Features Correlation Heatmap', fontsize=12, fontweight='bold')
+    elif name in DENSITY_PANELS:
+        _draw_density(ax, data, name)
+    elif name == 'genre_popularity':
+        ax.bxp(data['stats'])
+        ax.set_title('Popularity Distribution by Top Genres', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Genre')
+        ax.set_ylabel('Popularity')
+        ax.tick_params(axis='x', rotation=45)
+    elif name == 'key':
+        ax.bar(data['labels'], data['counts'], color='lightgreen', alpha=0.7)
+        ax.set_title('Key Distribution', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Musical Key')
+        ax.set_ylabel('Number of Tracks')
+    elif name == 'mode':
+        ax.pie(data['counts'], labels=data['labels'], autopct='%1.1f%%', colors=['lightcoral', 'lightblue'])
+        ax.set_title('Major vs Minor Mode Distribution', fontsize=12, fontweight='bold')
+    else:
+        raise ValueError(f"Unknown panel: {name}")
+
+    fig.tight_layout()
+    path = os.path.join(output_dir, f"{name}.png")
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+
+def render_panels(panels, output_dir, workers=None, dpi=150):
+    """
+    Render every panel to its own image, in parallel worker processes.
+
+    Args:
+        panels (dict): Output of `prepare_plot_data`.
+        output_dir (str): Directory for the images.
+        workers (int, optional): Number of processes; 1 renders inline.
+        dpi (int): Image resolution.
+
+    Returns:
+        list: Paths of the written images.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or min(len(panels), os.cpu_count() or 1)
+    if workers <= 1:
+        return [render_panel(name, data, output_dir, dpi) for name, data in panels.items()]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_panel, name, data, output_dir, dpi) for name, data in panels.items()]
+        return [future.result() for future in futures]
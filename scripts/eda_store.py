@@ -0,0 +1,279 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import itertools
+import hashlib
+import pickle
+import json
+import zlib
+import io
+import os
+import pandas as pd
+from streaming_eda import EDAAccumulator
+from instrumentation import span, increment
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/eda_stats')
+
+# Bumped whenever EDAAccumulator changes shape, so old pickles are not reused
+FORMAT_VERSION = 1
+
+
+def partitions(data_path, rows=200_000, boundary_mask=63):
+    """
+    Split a CSV file into partitions of raw bytes, without parsing it.
+
+    A partition takes at least `rows` lines and then ends at the first line
+    whose CRC32 has all `boundary_mask` bits clear (and which does not end
+    inside a quoted field). Boundaries therefore depend on content, not on
+    position: inserting or deleting rows changes the partition they fall in,
+    and the following boundaries fall on the same lines as before.
+
+    Args:
+        data_path (str): Path to the dataset CSV.
+        rows (int): Minimum lines per partition.
+        boundary_mask (int): Bit mask of the boundary test; 63 ends a partition
+                             about 64 lines after its minimum size.
+
+    Yields:
+        tuple: (header line, partition bytes), both without parsing.
+    """
+    with open(data_path, 'rb') as f:
+        header = f.readline()
+        while True:
+            lines = list(itertools.islice(f, rows))
+            if not lines:
+                return
+            block = b''.join(lines)
+            quotes = block.count(b'"')
+            if quotes % 2 or zlib.crc32(lines[-1]) & boundary_mask:
+                extra = []
+                for line in f:
+                    extra.append(line)
+                    quotes += line.count(b'"')
+                    if quotes % 2 == 0 and zlib.crc32(line) & boundary_mask == 0:
+                        break
+                block += b''.join(extra)
+            yield header, block
+
+
+def _partition_key(header, block, top_n, artist_capacity):
+    """Digest of a partition's bytes and of everything that shapes its statistics."""
+    digest = hashlib.blake2b(f"{FORMAT_VERSION}:{top_n}:{artist_capacity}:".encode(), digest_size=16)
+    digest.update(header)
+    digest.update(block)
+    return digest.hexdigest()
+
+
+def _summarize_partition(header, block, top_n, artist_capacity):
+    """Statistics of one partition, with top-track offsets relative to its first row (runs in a worker process)."""
+    chunk = pd.read_csv(io.BytesIO(header + block))
+    return EDAAccumulator(top_n, artist_capacity).update(chunk, 0)
+
+
+class StatisticsStore:
+    """
+    EDA statistics kept on disk, one pickled EDAAccumulator per partition.
+
+    A partition is identified by the digest of its bytes, so statistics are
+    shared by every file (and every version of a file) that contains it. The
+    manifest records, per dataset path, the file's size and modification
+    time, its partition digests and the merged statistics, so an unchanged
+    file is answered without reading it.
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        """
+        Args:
+            directory (str): Directory of the partition pickles and the manifest.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def load(self, key):
+        """Stored statistics for `key`, or None."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def save(self, key, stats):
+        """Store statistics atomically (written to a temporary file, then renamed)."""
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def statistics(self, data_path, rows=200_000, workers=1, top_n=10, artist_capacity=5000, report=None):
+        """
+        Statistics of a dataset, recomputing only partitions not seen before.
+
+        Args:
+            data_path (str): Path to the dataset CSV.
+            rows (int): Minimum lines per partition.
+            workers (int): Worker processes summarising new partitions; 1 runs inline.
+            top_n (int): Number of top tracks kept.
+            artist_capacity (int): Number of artists tracked by the heavy-hitter summary.
+            report (dict, optional): Filled with 'partitions', 'reused' and 'computed'
+                                     counts and whether the whole file was 'cached'.
+
+        Returns:
+            EDAAccumulator: Merged statistics of the whole file.
+        """
+        report = {} if report is None else report
+        source = os.path.abspath(data_path)
+        status = os.stat(source)
+        entry = self.manifest.get(source)
+        fingerprint = {'size': status.st_size, 'mtime_ns': status.st_mtime_ns,
+                       'rows': rows, 'top_n': top_n, 'artist_capacity': artist_capacity}
+
+        if entry is not None and all(entry.get(k) == v for k, v in fingerprint.items()):
+            stats = self.load(entry['key'])
+            if stats is not None:
+                increment('eda_store.cached')
+                report.update(partitions=len(entry['partitions']), reused=len(entry['partitions']),
+                              computed=0, cached=True)
+                return stats
+
+        with span('eda_store.partitions'):
+            keys, parts = self._partition_statistics(source, rows, workers, top_n, artist_capacity, report)
+
+        # Merge in file order; top-track offsets become positions in the whole file
+        stats = EDAAccumulator(top_n, artist_capacity)
+        offset = 0
+        for part in parts:
+            if part.top_tracks is not None:
+                part.top_tracks.index = part.top_tracks.index + offset
+            offset += part.rows
+            stats.merge(part)
+
+        key = hashlib.blake2b(''.join(keys).encode(), digest_size=16).hexdigest()
+        self.save(key, stats)
+        self.manifest[source] = {**fingerprint, 'key': key, 'partitions': keys}
+        self._save_manifest()
+        report.update(partitions=len(keys), cached=False)
+        return stats
+
+    def _partition_statistics(self, source, rows, workers, top_n, artist_capacity, report):
+        """Per-partition statistics in file order, loading stored ones and computing the rest."""
+        keys, parts = [], []
+        reused = computed = 0
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        pending = {}
+        try:
+            for header, block in partitions(source, rows):
+                key = _partition_key(header, block, top_n, artist_capacity)
+                keys.append(key)
+                part = self.load(key)
+                if part is not None:
+                    reused += 1
+                    parts.append(part)
+                    continue
+                computed += 1
+                if executor is None:
+                    part = _summarize_partition(header, block, top_n, artist_capacity)
+                    self.save(key, part)
+                    parts.append(part)
+                    continue
+                # Keep at most two partitions per worker in flight to bound memory
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future, pending.pop(future), parts)
+                parts.append(None)
+                pending[executor.submit(_summarize_partition, header, block, top_n, artist_capacity)] = (key, len(parts) - 1)
+            for future in list(pending):
+                self._collect(future, pending.pop(future), parts)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        increment('eda_store.partitions_reused', reused)
+        increment('eda_store.partitions_computed', computed)
+        report.update(reused=reused, computed=computed)
+        return keys, parts
+
+    def _collect(self, future, slot, parts):
+        key, position = slot
+        parts[position] = future.result()
+        # Saved before merging shifts the top-track offsets
+        self.save(key, parts[position])
+
+    def prune(self):
+        """
+        Delete pickles no manifest entry refers to.
+
+        Returns:
+            int: Number of files removed.
+        """
+        keep = set()
+        for entry in self.manifest.values():
+            keep.add(entry['key'])
+            keep.update(entry['partitions'])
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl') and name[:-len('.pkl')] not in keep:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+
+def dataset_statistics(data_path, directory=DEFAULT_STORE_DIR, **options):
+    """
+    Stored statistics of a dataset, e.g. to give recommenders popularity priors
+    (`EDAAccumulator.popularity_prior`) or feature scaling (`feature_scaling`).
+
+    Args:
+        data_path (str): Path to the dataset CSV.
+        directory (str): Store directory.
+        **options: Options of `StatisticsStore.statistics`.
+
+    Returns:
+        EDAAccumulator: Statistics of the whole file.
+    """
+    return StatisticsStore(directory).statistics(data_path, **options)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from basic_recommender import ContentBasedRecommender
+
+    parser = argparse.ArgumentParser(description="Build or refresh the stored EDA statistics of the dataset.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Store directory")
+    parser.add_argument('--rows', type=int, default=200_000, help="Minimum lines per partition")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for new partitions")
+    parser.add_argument('--prune', action='store_true', help="Delete pickles of partitions no longer in use")
+    args = parser.parse_args()
+
+    data_path = args.data or ContentBasedRecommender._find_dataset(None)
+    store = StatisticsStore(args.store)
+    report = {}
+    start = time.perf_counter()
+    stats = store.statistics(data_path, rows=args.rows, workers=args.workers, report=report)
+    seconds = time.perf_counter() - start
+
+    source = 'whole-file cache' if report['cached'] else f"{report['reused']} reused, {report['computed']} computed"
+    print(f"{stats.rows:,} rows in {report['partitions']} partitions ({source}) in {seconds:.2f} s")
+    print(f"\n{'feature':<18}{'mean':>10}{'std':>10}")
+    for feature, row in stats.feature_scaling().iterrows():
+        print(f"{feature:<18}{row['mean']:>10.3f}{row['std']:>10.3f}")
+    print(f"\nPopularity prior of the 5 largest genres:")
+    prior = stats.popularity_prior()
+    for genre in stats.genre_counts.nlargest(5).index:
+        print(f"  {genre:<20}{prior[genre]:6.1f} ({int(stats.genre_counts[genre]):,} tracks)")
+    if args.prune:
+        print(f"\nPruned {store.prune()} unused pickles")
@@ -0,0 +1,340 @@
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from concurrent.futures import ProcessPoolExecutor
+import time
+import os
+from collaborative_filtering import CollaborativeFiltering
+from top_k import top_k_rows
+
+METHODS = ['svd', 'user_based', 'item_based']
+
+# Per-process model state, set once by the pool initializer so that the
+# train matrix and factors are pickled once per worker instead of per task.
+_worker_state = None
+
+
+def _init_worker(state):
+    """Store the shared evaluation state in a pool worker."""
+    global _worker_state
+    _worker_state = state
+
+
+def score_block(method, user_indices, state):
+    """
+    Score every item for a block of users with one CF method.
+
+    The scorers mirror the `recommend_*` methods of CollaborativeFiltering,
+    but work on a whole block of users with a single matrix product.
+    Also used by recommendation_tables to precompute top-N tables.
+
+    Returns:
+        np.ndarray: Dense (len(user_indices), n_items) score matrix.
+    """
+    train = state['train']
+    if method == 'svd':
+        return state['svd_factors'][user_indices] @ state['svd_components']
+    if method == 'user_based':
+        # Weighted sum of the neighbours' rows, self excluded (as in recommend_user_based)
+        distances = state['neighbor_distances'][user_indices]
+        neighbors = state['neighbor_indices'][user_indices]
+        rows = np.repeat(np.arange(len(user_indices)), neighbors.shape[1])
+        weights = csr_matrix((1 - distances.ravel(), (rows, neighbors.ravel())),
+                             shape=(len(user_indices), train.shape[0]))
+        return np.asarray((weights @ train).todense())
+    if method == 'nmf':
+        return state['nmf_factors'][user_indices] @ state['nmf_components']
+    if method == 'item_knn':
+        # Aggregation over each rated item's k nearest items only
+        return np.asarray((train[user_indices] @ state['item_similarity']).todense())
+    if method == 'item_based':
+        # Item-item cosine aggregation r_u · S with S = Xn^T Xn, factorised
+        # through the (small) user dimension so S is never materialised
+        normalized = state['item_normalized']
+        return np.asarray(((train[user_indices] @ normalized.T) @ normalized).todense())
+    raise ValueError(f"Unknown method: {method}")
+
+
+def evaluate_block(method, user_indices, state=None):
+    """
+    Compute ranking metrics for one block of users (also the unit of work
+    of hyperparameter_sweep).
+
+    Returns:
+        dict: Per-user metric arrays, the recommended item matrix and the
+              time spent scoring and ranking the block.
+    """
+    state = state if state is not None else _worker_state
+    k = state['k']
+    start = time.perf_counter()
+
+    scores = score_block(method, user_indices, state)
+
+    # Never recommend items seen in training
+    train_rows = state['train'][user_indices]
+    scores[train_rows.nonzero()] = -np.inf
+
+    # Top-k per user, ties by the lower item index as in serving
+    top_k = top_k_rows(scores, k)
+    elapsed = time.perf_counter() - start
+
+    test_rows = state['test'][user_indices]
+    n_relevant = np.diff(test_rows.indptr)
+    hits = np.asarray(test_rows[np.arange(len(user_indices))[:, None], top_k].todense()) > 0
+
+    ranks = np.arange(1, k + 1)
+    discounts = 1.0 / np.log2(ranks + 1)
+
+    n_hits = hits.sum(axis=1)
+    precision = n_hits / k
+    recall = np.divide(n_hits, n_relevant, out=np.zeros(len(user_indices)), where=n_relevant > 0)
+
+    dcg = (hits * discounts).sum(axis=1)
+    ideal_hits = np.minimum(n_relevant, k)
+    idcg = np.cumsum(discounts)[np.maximum(ideal_hits - 1, 0)] * (ideal_hits > 0)
+    ndcg = np.divide(dcg, idcg, out=np.zeros(len(user_indices)), where=idcg > 0)
+
+    precision_at_rank = np.cumsum(hits, axis=1) / ranks
+    ap = np.divide((precision_at_rank * hits).sum(axis=1), ideal_hits,
+                   out=np.zeros(len(user_indices)), where=ideal_hits > 0)
+
+    novelty = state['self_information'][top_k].mean(axis=1)
+
+    return {
+        'precision': precision,
+        'recall': recall,
+        'ndcg': ndcg,
+        'ap': ap,
+        'novelty': novelty,
+        'has_test': n_relevant > 0,
+        'top_k': top_k,
+        'elapsed': elapsed,
+    }
+
+
+class RankingEvaluator:
+    """
+    Offline ranking evaluation of the collaborative filtering methods.
+
+    Holds out a fraction of every user's items from `user_item_matrix`, fits
+    the models on the remaining interactions and measures how well each
+    method ranks the held-out items.
+    """
+
+    def __init__(self, recommender, holdout_fraction=0.2, k=10, n_components=20,
+                 n_neighbors=10, random_state=42):
+        """
+        Initialize the evaluator.
+
+        Args:
+            recommender (CollaborativeFiltering): Recommender whose user-item matrix is evaluated.
+            holdout_fraction (float): Fraction of each user's items held out for testing.
+            k (int): Cut-off for the ranking metrics.
+            n_components (int): Number of SVD components to fit on the train split.
+            n_neighbors (int): Number of neighbours for the user-based model.
+            random_state (int): Seed for the holdout split and the SVD.
+        """
+        self.recommender = recommender
+        self.holdout_fraction = holdout_fraction
+        self.k = k
+        self.n_components = n_components
+        self.n_neighbors = n_neighbors
+        self.random_state = random_state
+        self.train_matrix = None
+        self.test_matrix = None
+        self.state = None
+
+    def split(self):
+        """Create a per-user holdout split of the user-item matrix."""
+        print(f"Creating per-user holdout split ({self.holdout_fraction:.0%} held out)...")
+        matrix = self.recommender.user_item_matrix.tocsr()
+        matrix.sum_duplicates()
+        rng = np.random.default_rng(self.random_state)
+
+        # Random key per interaction; within each user row the lowest keys are held out
+        keys = rng.random(matrix.nnz)
+        row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        order = np.lexsort((keys, row_ids))
+        position = np.empty(matrix.nnz, dtype=np.int64)
+        position[order] = np.arange(matrix.nnz) - matrix.indptr[row_ids[order]]
+        n_holdout = np.floor(np.diff(matrix.indptr) * self.holdout_fraction).astype(np.int64)
+        is_test = position < n_holdout[row_ids]
+
+        coo = matrix.tocoo()
+        self.train_matrix = csr_matrix((coo.data[~is_test], (coo.row[~is_test], coo.col[~is_test])),
+                                       shape=matrix.shape)
+        self.test_matrix = csr_matrix((coo.data[is_test], (coo.row[is_test], coo.col[is_test])),
+                                      shape=matrix.shape)
+        print(f"Train interactions: {self.train_matrix.nnz}, Test interactions: {self.test_matrix.nnz}")
+
+    def base_state(self):
+        """
+        Model-independent evaluation state: the split, the cut-off and the
+        item self-information used for novelty.
+        """
+        if self.train_matrix is None:
+            self.split()
+        train = self.train_matrix
+
+        # Popularity-based self-information for novelty, smoothed for unseen items
+        item_popularity = (np.diff(train.tocsc().indptr) + 1) / (train.shape[0] + 1)
+        return {
+            'train': train,
+            'test': self.test_matrix,
+            'k': self.k,
+            'self_information': -np.log2(item_popularity),
+        }
+
+    def fit(self):
+        """Fit every evaluated model on the train split."""
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.neighbors import NearestNeighbors
+
+        state = self.base_state()
+        train = self.train_matrix
+        n_users = train.shape[0]
+        # TruncatedSVD needs n_components >= 1 and < n_users; neighbours need another user
+        if n_users < 2:
+            raise ValueError(f"Evaluation needs at least 2 users in the train split, got {n_users}.")
+
+        print(f"Fitting SVD model with {self.n_components} components on train split...")
+        svd = TruncatedSVD(n_components=min(self.n_components, n_users - 1), random_state=self.random_state)
+        svd_factors = svd.fit_transform(train)
+
+        print(f"Fitting user-based CF with {self.n_neighbors} neighbors on train split...")
+        n_query = min(6, n_users)
+        user_neighbors = NearestNeighbors(n_neighbors=min(self.n_neighbors, n_users),
+                                          metric='cosine', algorithm='brute').fit(train)
+        distances, indices = user_neighbors.kneighbors(train, n_neighbors=n_query)
+
+        print("Normalizing item vectors for item-based CF...")
+        item_norms = np.sqrt(np.asarray(train.multiply(train).sum(axis=0))).ravel()
+        inverse_norms = np.divide(1.0, item_norms, out=np.zeros_like(item_norms), where=item_norms > 0)
+        item_normalized = (train @ diags(inverse_norms)).tocsr()
+
+        state.update({
+            'svd_factors': svd_factors,
+            'svd_components': svd.components_,
+            'neighbor_distances': distances[:, 1:],
+            'neighbor_indices': indices[:, 1:],
+            'item_normalized': item_normalized,
+        })
+        self.state = state
+
+    def _measure_live_latency(self, method, user_ids):
+        """Time the recommender's own `recommend_*` call for a sample of users."""
+        recommend = getattr(self.recommender, f"recommend_{method}")
+        latencies = []
+        for user_id in user_ids:
+            start = time.perf_counter()
+            try:
+                recommend(user_id, self.k)
+            except Exception as e:
+                print(f"Error timing {method} for user {user_id}: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def evaluate(self, methods=None, n_jobs=None, block_size=64, live_sample=0):
+        """
+        Evaluate all users for each method on a process pool.
+
+        Args:
+            methods (list, optional): Methods to evaluate. Defaults to svd, user_based and item_based.
+            n_jobs (int, optional): Number of worker processes. Defaults to the CPU count;
+                                    1 evaluates in the current process.
+            block_size (int): Number of users scored per task.
+            live_sample (int): Number of users for which the recommender's own
+                               `recommend_*` methods are also timed (requires fitted models).
+
+        Returns:
+            dict: Metrics, latency and throughput per method.
+        """
+        if self.state is None:
+            self.fit()
+        methods = methods or METHODS
+        n_jobs = n_jobs or os.cpu_count() or 1
+
+        n_users, n_items = self.train_matrix.shape
+        blocks = [np.arange(start, min(start + block_size, n_users))
+                  for start in range(0, n_users, block_size)]
+
+        report = {}
+        executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                       initargs=(self.state,)) if n_jobs > 1 else None
+        try:
+            for method in methods:
+                print(f"Evaluating {method} over {n_users} users with {n_jobs} worker(s)...")
+                start = time.perf_counter()
+                if executor is not None:
+                    futures = [executor.submit(evaluate_block, method, block) for block in blocks]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [evaluate_block(method, block, self.state) for block in blocks]
+                wall_time = time.perf_counter() - start
+
+                metrics = summarize_blocks(results, self.k, n_items)
+                metrics['wall_time_s'] = wall_time
+                metrics['latency_ms_per_user'] = 1000 * metrics.pop('scoring_time_s') / n_users
+                metrics['throughput_users_per_s'] = n_users / wall_time if wall_time > 0 else float('inf')
+
+                if live_sample:
+                    sample_users = [self.recommender.idx_to_user[i] for i in range(min(live_sample, n_users))]
+                    latencies = self._measure_live_latency(method, sample_users)
+                    if latencies:
+                        metrics['live_latency_ms_p50'] = 1000 * float(np.percentile(latencies, 50))
+                        metrics['live_latency_ms_p95'] = 1000 * float(np.percentile(latencies, 95))
+
+                report[method] = metrics
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return report
+
+
+def summarize_blocks(results, k, n_items):
+    """
+    Combine the `evaluate_block` results of one method into mean metrics.
+
+    Returns:
+        dict: Ranking metrics over users with held-out items, catalogue
+              coverage, novelty, evaluated users and total scoring time.
+    """
+    has_test = np.concatenate([r['has_test'] for r in results])
+    top_k = np.concatenate([r['top_k'] for r in results])
+
+    metrics = {}
+    for name in ['precision', 'recall', 'ndcg', 'ap']:
+        values = np.concatenate([r[name] for r in results])
+        metric_name = 'map' if name == 'ap' else name
+        metrics[f'{metric_name}@{k}'] = float(values[has_test].mean()) if has_test.any() else 0.0
+    metrics['coverage'] = float(len(np.unique(top_k)) / n_items)
+    metrics['novelty'] = float(np.concatenate([r['novelty'] for r in results]).mean())
+    metrics['evaluated_users'] = int(has_test.sum())
+    metrics['scoring_time_s'] = sum(r['elapsed'] for r in results)
+    return metrics
+
+
+def print_report(report):
+    """Print an evaluation report as a table."""
+    print("\nEvaluation Results:")
+    for method, metrics in report.items():
+        print(f"\n--- {method} ---")
+        for name, value in metrics.items():
+            print(f"  {name:<26} {value:.4f}" if isinstance(value, float) else f"  {name:<26} {value}")
+
+
+def main():
+    """Run the offline ranking evaluation on the default dataset."""
+    recommender = CollaborativeFiltering()
+    recommender.fit_svd(n_components=20)
+    recommender.fit_user_based_cf(n_neighbors=10)
+    recommender.fit_item_based_cf(n_neighbors=10)
+
+    evaluator = RankingEvaluator(recommender, holdout_fraction=0.2, k=10)
+    report = evaluator.evaluate(live_sample=5)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
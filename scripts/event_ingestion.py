@@ -0,0 +1,288 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import csr_matrix
+import tempfile
+import shutil
+import time
+import os
+from instrumentation import span, timed, increment
+
+EVENT_COLUMNS = ['user_id', 'track_id', 'ms_played']
+JSON_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+
+
+class IdMapping:
+    """Incremental mapping from external ids to dense integer indices."""
+
+    def __init__(self):
+        self.to_idx = {}
+
+    def __len__(self):
+        return len(self.to_idx)
+
+    def encode(self, values):
+        """
+        Indices of `values`, assigning new indices to unseen ids.
+
+        Only the distinct ids of the chunk go through the dictionary.
+        """
+        codes, uniques = pd.factorize(values)
+        to_idx = self.to_idx
+        mapped = np.fromiter((to_idx.setdefault(value, len(to_idx)) for value in uniques),
+                             dtype=np.int64, count=len(uniques))
+        return mapped[codes]
+
+    def ids(self):
+        """Ids in index order."""
+        return np.array(list(self.to_idx), dtype=object)
+
+
+def _reduce(keys, counts):
+    """Sum `counts` per distinct key; returns sorted keys and their totals."""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return unique_keys, np.bincount(inverse, weights=counts).astype(np.float32)
+
+
+def _is_json_lines(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return name.endswith(JSON_SUFFIXES)
+
+
+def read_event_chunks(path, chunksize=500_000):
+    """
+    Yield (user_id, track_id, ms_played) chunks of a CSV or JSON-lines event log.
+
+    Only the three needed columns are kept; other fields such as `timestamp`
+    are dropped as soon as a chunk is parsed. Gzipped files are read as is.
+    """
+    if _is_json_lines(path):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        reader = pd.read_csv(path, usecols=EVENT_COLUMNS, chunksize=chunksize,
+                             dtype={'user_id': str, 'track_id': str})
+    with reader:
+        for chunk in reader:
+            yield chunk[EVENT_COLUMNS]
+
+
+class EventIngestor:
+    """
+    Streams listening-event logs into a CSR user-item confidence matrix.
+
+    Events are read in chunks. Each chunk is reduced to one play count per
+    (user, item) pair, keyed by a single int64 (user index << 32 | item index),
+    and kept in an in-memory buffer of at most `max_pairs` pairs. When the
+    buffer is full it is compacted and, if still too large, written to disk
+    as sorted runs hash-partitioned by user. The final merge reads one
+    partition at a time, so peak memory stays near the size of the output
+    matrix rather than the size of the log.
+
+    A play counts when `ms_played >= min_ms_played`; shorter plays are
+    skips and are ignored. Confidence is 1 + alpha * log(1 + plays).
+    """
+
+    def __init__(self, chunksize=500_000, max_pairs=5_000_000, n_partitions=16,
+                 min_ms_played=30_000, alpha=1.0, spill_dir=None):
+        """
+        Args:
+            chunksize (int): Events parsed per chunk.
+            max_pairs (int): Distinct (user, item) pairs held in memory before spilling.
+            n_partitions (int): User partitions of the spilled runs.
+            min_ms_played (int): Minimum play time counted as a play.
+            alpha (float): Confidence scale.
+            spill_dir (str, optional): Directory for spill files (default: a temporary directory).
+        """
+        self.chunksize = chunksize
+        self.max_pairs = max_pairs
+        self.n_partitions = n_partitions
+        self.min_ms_played = min_ms_played
+        self.alpha = alpha
+        self.spill_dir = spill_dir
+
+        self.users = IdMapping()
+        self.items = IdMapping()
+        self.user_item_matrix = None
+        self.stats = {}
+
+    def _aggregate_chunk(self, chunk):
+        """Play counts per pair key for one chunk."""
+        chunk = chunk.dropna(subset=['user_id', 'track_id'])
+        plays = chunk['ms_played'].to_numpy(dtype=np.float64) >= self.min_ms_played
+        chunk = chunk[plays]
+        if chunk.empty:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        user_idx = self.users.encode(chunk['user_id'].to_numpy())
+        item_idx = self.items.encode(chunk['track_id'].to_numpy())
+        keys = (user_idx << 32) | item_idx
+        return _reduce(keys, np.ones(len(keys)))
+
+    def _partition(self, keys):
+        return (keys >> 32) % self.n_partitions
+
+    def _spill(self, keys, counts, run_dir, run):
+        """Write one sorted run, split into user partitions."""
+        with span('events.spill'):
+            partitions = self._partition(keys)
+            for p in range(self.n_partitions):
+                mask = partitions == p
+                np.save(os.path.join(run_dir, f"run{run:05d}_p{p:03d}_keys.npy"), keys[mask])
+                np.save(os.path.join(run_dir, f"run{run:05d}_p{p:03d}_counts.npy"), counts[mask])
+        increment('events.spills')
+
+    def _merge(self, buffer, run_dir, n_runs):
+        """Merge in-memory pairs and spilled runs partition by partition into CSR."""
+        rows, cols, values = [], [], []
+        keys = np.concatenate(buffer[0]) if buffer[0] else np.empty(0, dtype=np.int64)
+        counts = np.concatenate(buffer[1]) if buffer[1] else np.empty(0, dtype=np.float32)
+        partitions = self._partition(keys)
+
+        for p in range(self.n_partitions):
+            part_keys = [keys[partitions == p]]
+            part_counts = [counts[partitions == p]]
+            for run in range(n_runs):
+                prefix = os.path.join(run_dir, f"run{run:05d}_p{p:03d}")
+                part_keys.append(np.load(prefix + '_keys.npy'))
+                part_counts.append(np.load(prefix + '_counts.npy'))
+            merged_keys, merged_counts = _reduce(np.concatenate(part_keys), np.concatenate(part_counts))
+            rows.append((merged_keys >> 32).astype(np.int32))
+            cols.append((merged_keys & 0xFFFFFFFF).astype(np.int32))
+            values.append((1 + self.alpha * np.log1p(merged_counts)).astype(np.float32))
+
+        shape = (len(self.users), len(self.items))
+        return csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=shape, dtype=np.float32)
+
+    @timed('events.ingest')
+    def ingest(self, paths):
+        """
+        Ingest one or more event logs.
+
+        Args:
+            paths (str or list): CSV or JSON-lines files with user_id, track_id and
+                                 ms_played fields.
+
+        Returns:
+            EventIngestor: self, with `user_item_matrix`, `user_ids`, `item_ids`,
+                           `user_to_idx`, `item_to_idx` and `stats` set.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        run_dir = tempfile.mkdtemp(prefix='events_', dir=self.spill_dir)
+        buffer = ([], [])
+        buffered_pairs = 0
+        n_runs = 0
+        n_events = 0
+        start = time.perf_counter()
+
+        try:
+            for path in paths:
+                print(f"Ingesting listening events from: {path}")
+                for chunk in read_event_chunks(path, self.chunksize):
+                    n_events += len(chunk)
+                    with span('events.aggregate'):
+                        keys, counts = self._aggregate_chunk(chunk)
+                    buffer[0].append(keys)
+                    buffer[1].append(counts)
+                    buffered_pairs += len(keys)
+
+                    if buffered_pairs > self.max_pairs:
+                        # Compact first: repeated pairs across chunks often fit again
+                        keys, counts = _reduce(np.concatenate(buffer[0]), np.concatenate(buffer[1]))
+                        buffer = ([keys], [counts])
+                        buffered_pairs = len(keys)
+                        if buffered_pairs > self.max_pairs // 2:
+                            self._spill(keys, counts, run_dir, n_runs)
+                            n_runs += 1
+                            buffer = ([], [])
+                            buffered_pairs = 0
+
+            with span('events.merge'):
+                self.user_item_matrix = self._merge(buffer, run_dir, n_runs)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - start
+        self.user_ids = self.users.ids()
+        self.item_ids = self.items.ids()
+        self.user_to_idx = self.users.to_idx
+        self.item_to_idx = self.items.to_idx
+        self.stats = {
+            'events': n_events,
+            'users': len(self.user_ids),
+            'items': len(self.item_ids),
+            'pairs': int(self.user_item_matrix.nnz),
+            'spilled_runs': n_runs,
+            'seconds': elapsed,
+            'events_per_s': n_events / elapsed if elapsed > 0 else 0.0,
+        }
+        increment('events.ingested', n_events)
+        print(f"Ingested {n_events:,} events -> {self.stats['pairs']:,} user-item pairs "
+              f"({self.stats['users']:,} users, {self.stats['items']:,} items) in {elapsed:.2f}s "
+              f"[{self.stats['events_per_s']:,.0f} events/s, {n_runs} spilled runs]")
+        return self
+
+
+def benchmark_ingestion(n_events=2_000_000, n_users=50_000, track_ids=None, formats=('csv', 'jsonl'),
+                        max_pairs=(5_000_000, 200_000), work_dir=None):
+    """
+    Measure ingestion throughput on synthetic event logs.
+
+    Args:
+        n_events (int): Events per generated log.
+        n_users (int): Distinct users in the log.
+        track_ids (array-like, optional): Track ids to draw from (default: synthetic ids).
+        formats (tuple): Log formats to generate ('csv', 'jsonl').
+        max_pairs (tuple): In-memory pair budgets to compare; small budgets force spilling.
+        work_dir (str, optional): Where the logs are written and kept for reuse
+                                  (default: a temporary directory, removed afterwards).
+
+    Returns:
+        list: One result row per (format, budget).
+    """
+    from synthetic_data import SyntheticListeningEvents
+
+    temporary = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='events_benchmark_')
+    events = SyntheticListeningEvents(n_events, n_users=n_users, track_ids=track_ids)
+    rows = []
+    try:
+        for fmt in formats:
+            path = os.path.join(work_dir, f"events_{n_events}.{fmt}")
+            if not os.path.exists(path):
+                print(f"Writing {n_events:,} synthetic events to: {path}")
+                events.write(path)
+            for budget in max_pairs:
+                ingestor = EventIngestor(max_pairs=budget).ingest(path)
+                rows.append({'format': fmt, 'max_pairs': budget, **ingestor.stats})
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{'format':<7}{'max_pairs':>11}{'events':>12}{'pairs':>11}{'runs':>6}{'seconds':>9}{'events/s':>13}")
+    for row in rows:
+        print(f"{row['format']:<7}{row['max_pairs']:>11,}{row['events']:>12,}{row['pairs']:>11,}"
+              f"{row['spilled_runs']:>6}{row['seconds']:>9.2f}{row['events_per_s']:>13,.0f}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest listening-event logs or benchmark ingestion throughput.")
+    parser.add_argument('paths', nargs='*', help="CSV or JSON-lines event logs")
+    parser.add_argument('--max-pairs', type=int, default=5_000_000, help="In-memory pair budget before spilling")
+    parser.add_argument('--benchmark', type=int, metavar='EVENTS', help="Benchmark on this many synthetic events")
+    parser.add_argument('--data', help="Dataset CSV whose track ids the synthetic events use")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        track_ids = None
+        if args.data:
+            track_ids = pd.read_csv(args.data, usecols=['track_id'])['track_id'].unique()
+        benchmark_ingestion(args.benchmark, track_ids=track_ids)
+    elif args.paths:
+        EventIngestor(max_pairs=args.max_pairs).ingest(args.paths)
+    else:
+        parser.error("give event log paths or --benchmark EVENTS")
@@ -0,0 +1,101 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+import tracemalloc
+import argparse
+import time
+from collaborative_filtering import CollaborativeFiltering
+
+DEFAULT_SIZES = [(1_000, 20_000, 0.01), (10_000, 50_000, 0.002), (50_000, 100_000, 0.0005)]
+
+# Name, fit method, options; the first of each kind is today's default
+CONFIGURATIONS = [
+    ('svd default', 'fit_svd', {}),
+    ('svd float32', 'fit_svd', {'dtype': np.float32}),
+    ('svd float32 n_iter=2', 'fit_svd', {'dtype': np.float32, 'n_iter': 2}),
+    ('svd arpack float32', 'fit_svd', {'algorithm': 'arpack', 'dtype': np.float32}),
+    ('nmf default', 'fit_nmf', {}),
+    ('nmf float32 tol=1e-3', 'fit_nmf', {'dtype': np.float32, 'tol': 1e-3}),
+]
+
+
+def synthetic_interactions(n_users, n_items, density, seed=42):
+    """Implicit-feedback matrix with power-law item popularity and log-scaled play counts."""
+    rng = np.random.default_rng(seed)
+    nnz = int(n_users * n_items * density)
+    popularity = 1.0 / np.arange(1, n_items + 1) ** 0.8
+    items = rng.choice(n_items, nnz, p=popularity / popularity.sum())
+    users = rng.integers(0, n_users, nnz)
+    plays = rng.geometric(0.3, nnz)
+    matrix = csr_matrix((1 + np.log1p(plays), (users, items)), shape=(n_users, n_items))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def _recommender_for(matrix):
+    """A CollaborativeFiltering holding only a user-item matrix, enough for the fit methods."""
+    recommender = CollaborativeFiltering.__new__(CollaborativeFiltering)
+    recommender.user_item_matrix = matrix
+    return recommender
+
+
+def measure_fit(matrix, method, n_components=20, **options):
+    """
+    Fit once and measure it.
+
+    Returns:
+        dict: Fit seconds, peak traced memory in MB, and the model's quality
+              (explained variance ratio for SVD, reconstruction error for NMF).
+    """
+    recommender = _recommender_for(matrix)
+    tracemalloc.start()
+    start = time.perf_counter()
+    getattr(recommender, method)(n_components=n_components, **options)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if method == 'fit_svd':
+        quality = float(recommender.svd_model.explained_variance_ratio_.sum())
+    else:
+        quality = float(recommender.nmf_model.reconstruction_err_)
+    return {'seconds': seconds, 'peak_mb': peak / 1024**2, 'quality': quality}
+
+
+def run(sizes=DEFAULT_SIZES, n_components=20, configurations=CONFIGURATIONS):
+    """Benchmark every fit configuration at every matrix size and print a table."""
+    # Warm up imports and BLAS so the first measured fit does not pay for them
+    warm_up = synthetic_interactions(50, 200, 0.1)
+    for _, method, options in configurations:
+        getattr(_recommender_for(warm_up), method)(n_components=5, **options)
+
+    rows = []
+    for n_users, n_items, density in sizes:
+        matrix = synthetic_interactions(n_users, n_items, density)
+        print(f"\n{n_users:,} users x {n_items:,} items, {matrix.nnz:,} interactions, rank {n_components}")
+        print(f"{'configuration':<24}{'fit s':>8}{'peak MB':>10}{'speed-up':>10}  quality")
+        baseline = {}
+        for name, method, options in configurations:
+            result = measure_fit(matrix, method, n_components, **options)
+            baseline.setdefault(method, result['seconds'])
+            label = 'explained variance' if method == 'fit_svd' else 'reconstruction error'
+            print(f"{name:<24}{result['seconds']:>8.2f}{result['peak_mb']:>10.1f}"
+                  f"{baseline[method] / result['seconds']:>9.2f}x  {label} {result['quality']:.4f}")
+            rows.append({'users': n_users, 'items': n_items, 'nnz': matrix.nnz, 'configuration': name, **result})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SVD/NMF fit options against the defaults.")
+    parser.add_argument('--sizes', nargs='+', metavar='USERSxITEMSxDENSITY',
+                        help="Matrix sizes, e.g. 1000x20000x0.01 (default: three sizes up to 50k x 100k)")
+    parser.add_argument('--rank', type=int, default=20, help="n_components")
+    args = parser.parse_args()
+
+    sizes = DEFAULT_SIZES
+    if args.sizes:
+        sizes = [(int(u), int(i), float(d)) for u, i, d in (size.split('x') for size in args.sizes)]
+    run(sizes, args.rank)
+
+
+if __name__ == "__main__":
+    main()
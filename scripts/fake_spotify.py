@@ -0,0 +1,182 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import threading
+import hashlib
+import json
+import pandas as pd
+
+
+def _artist_id(name):
+    """Stable 22-character id for an artist name, shaped like a Spotify id."""
+    return hashlib.sha1(name.encode('utf-8')).hexdigest()[:22]
+
+
+class FakeSpotify:
+    """
+    Local stand-in for the Spotify Web API endpoints the app and the cache
+    use, serving tracks and artists made from a dataset.
+
+    Endpoints: GET /v1/search (type artist or track), /v1/tracks?ids=,
+    /v1/artists?ids=, /v1/artists/{id}/top-tracks and /v1/me, and
+    PUT /v1/me/player/play. Any bearer token is accepted. Every
+    `throttle_every`-th request is answered 429 with a Retry-After header,
+    to exercise the client's rate-limit handling. Request counts per
+    endpoint are kept in `requests`.
+    """
+
+    def __init__(self, df, host='127.0.0.1', port=0, throttle_every=None, retry_after=0):
+        """
+        Args:
+            df (pd.DataFrame): Dataset rows (`track_id`, `track_name`, `artists`,
+                               `track_genre`, `popularity`, `duration_ms`, `explicit`).
+            host (str): Interface to listen on.
+            port (int): Port; 0 picks a free one.
+            throttle_every (int, optional): Answer every n-th request with 429.
+            retry_after (int): Seconds sent in Retry-After.
+        """
+        items = df.drop_duplicates('track_id')
+        self.tracks, self.artists = {}, {}
+        for row in items.itertuples(index=False):
+            names = [name for name in str(row.artists).split(';') if name] if pd.notna(row.artists) else []
+            artists = [{'id': _artist_id(name), 'name': name, 'type': 'artist'} for name in names]
+            self.tracks[row.track_id] = {
+                'id': row.track_id, 'name': row.track_name, 'uri': f"spotify:track:{row.track_id}",
+                'type': 'track', 'artists': artists, 'popularity': int(row.popularity),
+                'duration_ms': int(row.duration_ms), 'explicit': bool(row.explicit),
+            }
+            for artist in artists:
+                entry = self.artists.setdefault(artist['id'], {**artist, 'uri': f"spotify:artist:{artist['id']}",
+                                                               'genres': [], 'popularity': 0, 'tracks': []})
+                entry['tracks'].append(row.track_id)
+                entry['popularity'] = max(entry['popularity'], int(row.popularity))
+                for genre in str(row.track_genre).split():
+                    if genre not in entry['genres']:
+                        entry['genres'].append(genre)
+
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.requests = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        """API base URL, e.g. for `spotify_cache.pooled_client(api_url=...)`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def _artist(self, artist_id):
+        artist = self.artists.get(artist_id)
+        return None if artist is None else {k: v for k, v in artist.items() if k != 'tracks'}
+
+    def _search(self, query, kind, limit):
+        if kind == 'artist':
+            name = query.split('artist:', 1)[-1].strip().casefold()
+            ranked = sorted(self.artists.values(), key=lambda a: -a['popularity'])
+            matches = ([a for a in ranked if a['name'].casefold() == name]
+                       or [a for a in ranked if name in a['name'].casefold()])
+            return {'artists': {'items': [self._artist(a['id']) for a in matches[:limit]]}}
+        name = query.strip().casefold()
+        matches = sorted((t for t in self.tracks.values() if str(t['name']).casefold() == name),
+                         key=lambda t: -t['popularity'])
+        return {'tracks': {'items': matches[:limit]}}
+
+    def _route(self, method, path, query):
+        """(status, body) for one request."""
+        parts = path.strip('/').split('/')[1:]
+        if method == 'PUT' and parts == ['me', 'player', 'play']:
+            return 204, None
+        if parts == ['me']:
+            return 200, {'id': 'local', 'display_name': 'Local tester'}
+        if parts == ['search']:
+            return 200, self._search(query.get('q', [''])[0], query.get('type', ['track'])[0],
+                                     int(query.get('limit', ['10'])[0]))
+        if parts == ['tracks']:
+            ids = query.get('ids', [''])[0].split(',')
+            return 200, {'tracks': [self.tracks.get(track_id) for track_id in ids]}
+        if parts == ['artists']:
+            ids = query.get('ids', [''])[0].split(',')
+            return 200, {'artists': [self._artist(artist_id) for artist_id in ids]}
+        if len(parts) == 3 and parts[0] == 'artists' and parts[2] == 'top-tracks':
+            artist = self.artists.get(parts[1])
+            if artist is None:
+                return 404, {'error': {'status': 404, 'message': 'non existing id'}}
+            tracks = sorted((self.tracks[t] for t in artist['tracks']), key=lambda t: -t['popularity'])
+            return 200, {'tracks': tracks[:10]}
+        return 404, {'error': {'status': 404, 'message': 'Service not found'}}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, method):
+                url = urlsplit(self.path)
+                parts = url.path.strip('/').split('/')
+                endpoint = parts[-1] if parts[-1] == 'top-tracks' else '/'.join(parts[1:2])
+                with fake._lock:
+                    fake._count += 1
+                    fake.requests[endpoint] = fake.requests.get(endpoint, 0) + 1
+                    throttled = fake.throttle_every and fake._count % fake.throttle_every == 0
+                if throttled:
+                    status, body = 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}}
+                else:
+                    status, body = fake._route(method, url.path, parse_qs(url.query))
+
+                payload = b'' if body is None else json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                if throttled:
+                    self.send_header('Retry-After', str(fake.retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_PUT(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self._respond('PUT')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve on a background thread; returns the API base URL."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    from basic_recommender import ContentBasedRecommender
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Spotify Web API from the dataset.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--throttle-every', type=int, help="Answer every n-th request with 429")
+    args = parser.parse_args()
+
+    fake = FakeSpotify(pd.read_csv(args.data or ContentBasedRecommender._find_dataset(None)),
+                       port=args.port, throttle_every=args.throttle_every)
+    print(f"Fake Spotify API at {fake.url} (Ctrl+C to stop)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
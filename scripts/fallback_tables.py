@@ -0,0 +1,147 @@
+import pandas as pd
+import numpy as np
+from candidate_generation import _entity_matrix
+from instrumentation import timed, increment
+
+
+def _genre_key(genre):
+    """Dataset spelling of a genre: Spotify's 'hard rock' is the dataset's 'hard-rock'."""
+    return str(genre).strip().casefold().replace(' ', '-').replace('_', '-')
+
+
+def _heads(postings, order, size):
+    """
+    The first `size` entries of every posting list, as compact arrays.
+
+    Returns:
+        tuple: (int64 offsets, one per key plus one; int32 item rows)
+    """
+    counts = np.minimum(np.diff(postings.indptr), size)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    within = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    take = np.repeat(postings.indptr[:-1], counts) + within
+    return offsets, order[postings.indices[take]].astype(np.int32)
+
+
+def seed_metadata(track=None, artist=None):
+    """
+    Artist names and genres of a Spotify search result, in the form
+    `FallbackTables.recommend` takes.
+
+    Args:
+        track (dict, optional): Spotify track object (its `artists` are used).
+        artist (dict, optional): Spotify artist object (its `name` and `genres` are used).
+
+    Returns:
+        dict: {'artists': [...], 'genres': [...]}
+    """
+    artists = [a['name'] for a in (track or {}).get('artists', [])]
+    if artist and artist.get('name') and artist['name'].casefold() not in {a.casefold() for a in artists}:
+        artists.append(artist['name'])
+    return {'artists': artists, 'genres': list((artist or {}).get('genres', []))}
+
+
+class FallbackTables:
+    """
+    Popularity heads for seeds and users the models do not know.
+
+    At fit time every genre and every artist keeps the rows of its most
+    popular tracks. The heads of one kind are stored back to back in one
+    int32 array, with int64 offsets per key, next to a global head. A lookup
+    maps Spotify metadata (artist names, artist genres) onto these keys and
+    merges their heads, so an unknown seed gets an answer without scoring
+    anything.
+    """
+
+    @timed('fallback.build')
+    def __init__(self, items, genre_size=50, artist_size=20, global_size=100, statistics=None):
+        """
+        Args:
+            items (pd.DataFrame): Tracks with `track_name`, `artists`, `track_genre` and
+                                  `popularity` columns (row order = track index).
+            genre_size (int): Tracks kept per genre.
+            artist_size (int): Tracks kept per artist.
+            global_size (int): Tracks in the global head.
+            statistics (EDAAccumulator, optional): Dataset statistics (e.g. from
+                `eda_store.dataset_statistics`); tracks without a popularity are
+                ranked by their genre's prior instead of as 0.
+        """
+        if statistics is not None:
+            popularity = statistics.fill_popularity(items)
+        else:
+            popularity = items['popularity'].fillna(0).to_numpy(dtype=np.float64)
+        order = np.argsort(-popularity, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self.rank = rank.astype(np.int32)
+        self.names = items['track_name'].to_numpy(dtype=object)
+
+        genres, _, genre_postings = _entity_matrix(items['track_genre'].fillna('').str.casefold(), None, rank)
+        artists, _, artist_postings = _entity_matrix(items['artists'].fillna('').str.casefold(), ';', rank)
+        self.genres = pd.Index(genres, dtype=object)
+        self.artists = pd.Index(artists, dtype=object)
+        self.genre_offsets, self.genre_items = _heads(genre_postings, order, genre_size)
+        self.artist_offsets, self.artist_items = _heads(artist_postings, order, artist_size)
+        self.global_items = order[:global_size].astype(np.int32)
+
+    @staticmethod
+    def _gather(vocabulary, offsets, items, keys):
+        """Concatenated heads of the keys found in `vocabulary`."""
+        positions = vocabulary.get_indexer(pd.Index(keys, dtype=object))
+        positions = positions[positions >= 0]
+        if len(positions) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([items[offsets[p]:offsets[p + 1]] for p in positions])
+
+    def rows_for(self, artists=(), genres=()):
+        """
+        Candidate rows for a seed described by its artists and genres.
+
+        The artists' heads come first, then the genres' heads; each tier is
+        ordered by popularity. A Spotify genre missing from the dataset is
+        also tried word by word ('album rock' -> 'rock'). The global head
+        closes the list.
+
+        Returns:
+            np.ndarray: int32 rows, possibly repeated.
+        """
+        genre_keys = [_genre_key(g) for g in genres]
+        genre_keys += [word for g in genre_keys if g not in self.genres for word in g.split('-')]
+        tiers = [self._gather(self.artists, self.artist_offsets, self.artist_items,
+                              [str(a).strip().casefold() for a in artists]),
+                 self._gather(self.genres, self.genre_offsets, self.genre_items, genre_keys)]
+        tiers = [tier[np.argsort(self.rank[tier], kind='stable')] for tier in tiers]
+        return np.concatenate(tiers + [self.global_items])
+
+    def recommend(self, artists=(), genres=(), n=5, exclude=()):
+        """
+        Most popular tracks for the given artists and genres.
+
+        Args:
+            artists (list): Artist names, e.g. from `seed_metadata`.
+            genres (list): Genres; Spotify spellings are mapped onto the dataset's.
+            n (int): Number of tracks.
+            exclude (list): Track names never returned (e.g. the seed).
+
+        Returns:
+            list: Up to `n` distinct track names.
+        """
+        if artists or genres:
+            increment('fallback.metadata')
+        seen = set(exclude)
+        picks = []
+        for name in self.names[self.rows_for(artists, genres)]:
+            if name in seen or pd.isna(name):
+                continue
+            seen.add(name)
+            picks.append(name)
+            if len(picks) == n:
+                break
+        return picks
+
+    def nbytes(self):
+        """Bytes held by the head arrays (excluding the vocabularies and names)."""
+        arrays = (self.rank, self.genre_offsets, self.genre_items,
+                  self.artist_offsets, self.artist_items, self.global_items)
+        return sum(array.nbytes for array in arrays)
@@ -0,0 +1,266 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import time
+import os
+from instrumentation import span
+
+EXECUTORS = ['thread', 'process']
+
+
+def _run_task(func, args, blas_threads):
+    """Run one task under a BLAS/OpenMP thread limit; returns (result, start, end)."""
+    start = time.time()
+    if blas_threads:
+        from threadpoolctl import threadpool_limits
+        with threadpool_limits(limits=blas_threads):
+            result = func(*args)
+    else:
+        result = func(*args)
+    return result, start, time.time()
+
+
+class FitReport:
+    """Per-task timings of one orchestrated run."""
+
+    def __init__(self, tasks, timings, wall):
+        self.tasks = tasks
+        self.timings = timings
+        self.wall = wall
+
+    @property
+    def sequential_total(self):
+        """
+        Sum of all task durations: the wall time of running them one after
+        another, if concurrency did not slow the tasks down.
+        """
+        return sum(end - start for start, end in self.timings.values())
+
+    def critical_path(self):
+        """
+        Longest dependency chain by measured duration.
+
+        Returns:
+            tuple: (task names along the path, its total duration in seconds)
+        """
+        finish, previous = {}, {}
+        for name in self.tasks:
+            start, end = self.timings[name]
+            deps = self.tasks[name]['deps']
+            before = max(deps, key=lambda dep: finish[dep]) if deps else None
+            finish[name] = (end - start) + (finish[before] if before else 0.0)
+            previous[name] = before
+        if not finish:
+            return [], 0.0
+        name = max(finish, key=finish.get)
+        path = []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], finish[path[0]]
+
+    def print(self):
+        """Print the timeline, the critical path and the sequential total."""
+        origin = min((start for start, _ in self.timings.values()), default=0.0)
+        path, length = self.critical_path()
+        print(f"\n{'task':<22}{'start s':>9}{'end s':>8}{'duration s':>12}  depends on")
+        for name, task in self.tasks.items():
+            start, end = self.timings[name]
+            marker = '*' if name in path else ' '
+            print(f"{marker}{name:<21}{start - origin:>9.2f}{end - origin:>8.2f}{end - start:>12.2f}  "
+                  f"{', '.join(task['deps']) or '-'}")
+        print(f"Critical path (*): {length:.2f} s | sequential total: {self.sequential_total:.2f} s | "
+              f"wall: {self.wall:.2f} s on {os.cpu_count()} CPU(s)")
+
+
+class FitOrchestrator:
+    """
+    Runs a dependency graph of fit tasks, starting every task as soon as the
+    tasks it depends on have finished.
+
+    A task is a function called with the results of its dependencies followed
+    by its own arguments. With the 'process' executor functions, arguments
+    and results are pickled, so tasks should be module-level functions and
+    return what they fitted rather than only mutating their inputs.
+
+    BLAS and OpenMP pools are limited so concurrent tasks do not
+    oversubscribe the cores: each task gets `blas_threads` (default: cores
+    divided by workers). threadpoolctl limits are process-wide, so with the
+    'thread' executor the default share applies to the whole run and
+    per-task values are ignored.
+    """
+
+    def __init__(self, max_workers=None, executor='thread'):
+        """
+        Args:
+            max_workers (int, optional): Concurrent tasks (default: CPU count).
+            executor (str): 'thread' or 'process'.
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}. Use one of {EXECUTORS}.")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self.tasks = {}
+        self.report = None
+
+    def add(self, name, func, *args, deps=(), blas_threads=None):
+        """
+        Add a task.
+
+        Args:
+            name (str): Unique task name, used by dependants and in the report.
+            func (callable): Called as func(*dependency_results, *args).
+            *args: Extra arguments.
+            deps (tuple): Names of tasks whose results are passed first, in order.
+            blas_threads (int, optional): BLAS/OpenMP threads for this task ('process' only).
+
+        Returns:
+            str: The task name.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' was already added.")
+        missing = [dep for dep in deps if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"Task '{name}' depends on unknown task(s): {', '.join(missing)}")
+        self.tasks[name] = {'func': func, 'args': args, 'deps': tuple(deps), 'blas_threads': blas_threads}
+        return name
+
+    def run(self):
+        """
+        Run every task.
+
+        Returns:
+            dict: Result of every task by name. Timings are in `self.report`.
+        """
+        workers = min(self.max_workers, max(len(self.tasks), 1))
+        share = max(1, (os.cpu_count() or 1) // workers)
+        results, timings = {}, {}
+        pending = dict(self.tasks)
+        running = {}
+
+        executor_class = ThreadPoolExecutor if self.executor == 'thread' else ProcessPoolExecutor
+        limits = None
+        if self.executor == 'thread':
+            from threadpoolctl import threadpool_limits
+            limits = threadpool_limits(limits=share)
+
+        start = time.time()
+        try:
+            with span('fit.orchestrated'), executor_class(max_workers=workers) as pool:
+                while pending or running:
+                    for name in [n for n, task in pending.items() if all(d in results for d in task['deps'])]:
+                        task = pending.pop(name)
+                        args = tuple(results[d] for d in task['deps']) + task['args']
+                        blas_threads = None if self.executor == 'thread' else (task['blas_threads'] or share)
+                        running[pool.submit(_run_task, task['func'], args, blas_threads)] = name
+                    if not running:
+                        raise ValueError(f"Unsatisfiable dependencies: {', '.join(pending)}")
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            results[name], task_start, task_end = future.result()
+                        except Exception:
+                            for other in running:
+                                other.cancel()
+                            raise
+                        timings[name] = (task_start, task_end)
+        finally:
+            if limits is not None:
+                limits.restore_original_limits()
+
+        self.report = FitReport(self.tasks, timings, time.time() - start)
+        return results
+
+
+def load_recommender(recommender_class, *args, **kwargs):
+    """Construct a recommender (reads its dataset)."""
+    return recommender_class(*args, **kwargs)
+
+
+def fit_whole(recommender, method, **kwargs):
+    """Call a fit method and return the fitted recommender."""
+    getattr(recommender, method)(**kwargs)
+    return recommender
+
+
+def fit_part(recommender, method, **kwargs):
+    """
+    Call a fit method and return only the attributes it (re)assigned, so
+    several fits of one recommender can run apart and be merged.
+    """
+    before = dict(vars(recommender))
+    getattr(recommender, method)(**kwargs)
+    return {key: value for key, value in vars(recommender).items()
+            if key not in before or value is not before[key]}
+
+
+def _fit_content(recommender):
+    return fit_whole(recommender, 'fit')
+
+
+def _fit_svd(recommender, n_components):
+    return fit_part(recommender, 'fit_svd', n_components=n_components)
+
+
+def _fit_user_based(recommender, n_neighbors):
+    return fit_part(recommender, 'fit_user_based_cf', n_neighbors=n_neighbors)
+
+
+def _fit_item_based(recommender, n_neighbors):
+    return fit_part(recommender, 'fit_item_based_cf', n_neighbors=n_neighbors)
+
+
+def fit_recommenders(data_path=None, deduplicate=True, n_components=20, n_neighbors=10,
+                     max_workers=None, executor='thread', verbose=True, statistics=None):
+    """
+    Load and fit the content and collaborative recommenders concurrently.
+
+    Graph: the two datasets load in parallel (the CF load also builds the
+    user-item matrix); TF-IDF fitting follows the content load, and SVD,
+    user-based and item-based fits each follow the CF load.
+
+    `statistics` (EDAAccumulator, e.g. from `eda_store.dataset_statistics`)
+    is given to both recommenders for their fallback tables.
+
+    Returns:
+        tuple: (ContentBasedRecommender, CollaborativeFiltering, FitReport)
+    """
+    from basic_recommender import ContentBasedRecommender
+    from collaborative_filtering import CollaborativeFiltering
+
+    orchestrator = FitOrchestrator(max_workers, executor)
+    orchestrator.add('content.load', load_recommender, ContentBasedRecommender, data_path, deduplicate, statistics)
+    # No events_path: the CF load builds its matrix from the dataset
+    orchestrator.add('cf.load', load_recommender, CollaborativeFiltering, data_path, deduplicate, None, statistics)
+    orchestrator.add('content.fit', _fit_content, deps=('content.load',))
+    orchestrator.add('cf.fit_svd', _fit_svd, n_components, deps=('cf.load',))
+    orchestrator.add('cf.fit_user_based', _fit_user_based, n_neighbors, deps=('cf.load',))
+    orchestrator.add('cf.fit_item_based', _fit_item_based, n_neighbors, deps=('cf.load',))
+    results = orchestrator.run()
+
+    cf = results['cf.load']
+    for part in ('cf.fit_svd', 'cf.fit_user_based', 'cf.fit_item_based'):
+        vars(cf).update(results[part])
+    if verbose:
+        orchestrator.report.print()
+    return results['content.fit'], cf, orchestrator.report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit all recommenders concurrently and report the critical path.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--workers', type=int, help="Concurrent tasks (default: CPU count)")
+    parser.add_argument('--executor', choices=EXECUTORS, default='thread', help="Run tasks on threads or processes")
+    parser.add_argument('--compare-sequential', action='store_true',
+                        help="Also fit with one worker; concurrent task durations include contention")
+    args = parser.parse_args()
+
+    _, _, report = fit_recommenders(args.data, max_workers=args.workers, executor=args.executor)
+    if args.compare_sequential:
+        print("\nSequential baseline (one worker):")
+        _, _, sequential = fit_recommenders(args.data, max_workers=1)
+        print(f"\nWall: {sequential.wall:.2f} s sequential -> {report.wall:.2f} s with the {args.executor} executor "
+              f"({sequential.wall / max(report.wall, 1e-9):.2f}x); "
+              f"critical path of the sequential timings: {sequential.critical_path()[1]:.2f} s")
@@ -1,9 +1,5 @@
 import customtkinter as ctk
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from basic_recommender import ContentBasedRecommender
-from collaborative_filtering import CollaborativeFiltering
-from hybrid_recommender import HybridRecommender
+from instrumentation import metrics, span
 import os
 from dotenv import load_dotenv
 
@@ -20,14 +16,22 @@ from dotenv import load_dotenv
 # Load environment variables from a .env file
 load_dotenv()
 
+# Collect timings for the live timing panel
+metrics.enable()
+TIMINGS_EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results')
+
+# Latency budget for hybrid recommendations; slower components are dropped
+HYBRID_DEADLINE_MS = 500
+
 class SpotifyRecommenderApp(ctk.CTk):
     def __init__(self):
         super().__init__()
 
-        self.recommenders = {}
-        self.current_recommender = None
+        self.models = None  # SnapshotManager; queries read its active snapshot
+        self.current_choice = "Content-Based"
         self.spotify_client = None
         self.search_results = {} # To store track URIs
+        self.search_metadata = {} # Artists and genres of every listed track, for unknown seeds
 
         # --- Window Setup ---
         self.title("Advanced Spotify Recommender")
@@ -58,6 +62,10 @@ class SpotifyRecommenderApp(ctk.CTk):
         )
         self.recommender_menu.pack(pady=5)
 
+        # Refits run in the background; queries keep using the active models until the swap
+        self.refit_button = ctk.CTkButton(self.recommender_frame, text="Refit Models", command=self.refit_models)
+        self.refit_button.pack(pady=5)
+
         # --- UI Widgets ---
         self.search_frame = ctk.CTkFrame(self)
         
@@ -88,30 +96,36 @@ class SpotifyRecommenderApp(ctk.CTk):
         self.play_button = ctk.CTkButton(self.recommendations_frame, text="Play Selected Recommendation", command=self.play_selected_recommendation, state="disabled")
         self.play_button.pack(pady=10)
 
+        # --- Live Timing Panel ---
+        self.timings_switch = ctk.CTkSwitch(self, text="Show Timings", command=self.toggle_timings_panel)
+        self.timings_switch.pack(pady=5)
+
+        self.timings_frame = ctk.CTkFrame(self)
+        self.timings_textbox = ctk.CTkTextbox(self.timings_frame, width=550, height=160, font=("Courier", 11))
+        self.timings_textbox.pack(pady=5, padx=10, fill="both", expand=True)
+        self.export_timings_button = ctk.CTkButton(self.timings_frame, text="Export Timings", command=self.export_timings)
+        self.export_timings_button.pack(pady=5)
+        # Pending `after` callback of the panel refresh, so only one loop ever runs
+        self.timings_refresh_job = None
+
     def init_recommenders(self):
         """Initialize all recommendation systems."""
         try:
+            # The recommenders (and pandas, scipy, sklearn behind them) are
+            # imported here rather than when front.py is imported
+            from model_snapshots import SnapshotManager, build_recommenders
+
             self.status_label.configure(text="Loading recommendation systems...")
             self.update_idletasks()
             
-            # Initialize Content-Based Recommender
-            print("Loading Content-Based Recommender...")
-            self.recommenders["Content-Based"] = ContentBasedRecommender()
-            self.recommenders["Content-Based"].fit()
-            
-            # Initialize Collaborative Filtering Recommender
-            print("Loading Collaborative Filtering Recommender...")
-            self.recommenders["Collaborative Filtering"] = CollaborativeFiltering()
-            self.recommenders["Collaborative Filtering"].fit_svd(n_components=20)
-            self.recommenders["Collaborative Filtering"].fit_user_based_cf(n_neighbors=10)
-            self.recommenders["Collaborative Filtering"].fit_item_based_cf(n_neighbors=10)
-            
-            # Initialize Hybrid Recommender
-            print("Loading Hybrid Recommender...")
-            self.recommenders["Hybrid"] = HybridRecommender()
-            
-            # Set default recommender
-            self.current_recommender = self.recommenders["Content-Based"]
+            # Fit the content-based and collaborative filtering recommenders
+            # concurrently; the hybrid reuses both. Precomputed tables are used
+            # when they exist (python recommendation_tables.py), and the stored
+            # EDA statistics (eda_store.py) rank the fallback tables. The
+            # fitted models are published as a read-only snapshot.
+            print("Loading Content-Based, Collaborative Filtering and Hybrid Recommenders...")
+            self.models = SnapshotManager(build_recommenders)
+            self.models.build_and_publish()
             self.status_label.configure(text="All recommendation systems loaded! Please connect to Spotify.")
             
         except Exception as e:
@@ -120,14 +134,15 @@ class SpotifyRecommenderApp(ctk.CTk):
 
     def change_recommender(self, choice):
         """Change the current recommendation system."""
-        if choice in self.recommenders:
-            self.current_recommender = self.recommenders[choice]
+        if self.models is not None and choice in self.models.current():
+            self.current_choice = choice
             self.status_label.configure(text=f"Switched to {choice} recommendation system", text_color="green")
             print(f"Switched to {choice} recommendation system")
             
             # Clear previous search results when switching systems
             if hasattr(self, 'search_results'):
                 self.search_results = {}
+                self.search_metadata = {}
             if hasattr(self, 'results_listbox'):
                 self.results_listbox.delete("1.0", "end")
                 self.results_listbox.insert("1.0", f"Now using {choice} recommendation system.\nEnter an artist name and click Search Artist.")
@@ -140,15 +155,49 @@ class SpotifyRecommenderApp(ctk.CTk):
         else:
             self.status_label.configure(text=f"Error: {choice} not found", text_color="red")
 
+    def refit_models(self):
+        """Refit all recommenders in the background and swap them in when done."""
+        if self.models is None:
+            return
+        self.models.refit_async()
+        self.refit_button.configure(state="disabled")
+        self.status_label.configure(text="Refitting models in the background...", text_color="white")
+        self.after(500, self.check_refit)
+
+    def check_refit(self):
+        """Poll the background refit from the UI thread."""
+        if self.models.refitting:
+            self.after(500, self.check_refit)
+            return
+        self.refit_button.configure(state="normal")
+        if self.models.last_error is not None:
+            self.status_label.configure(text=f"Refit failed: {self.models.last_error}", text_color="red")
+            self.models.last_error = None
+        else:
+            self.status_label.configure(text=f"Models refitted (version {self.models.current().version})",
+                                        text_color="green")
+
     def authenticate_spotify(self):
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+        from spotify_cache import CachedSpotify, SpotifyCache, pooled_client
+
         try:
-            # Scope needed to view and control playback
-            scope = "user-modify-playback-state user-read-playback-state"
-            
-            self.spotify_client = spotipy.Spotify(auth_manager=SpotifyOAuth(scope=scope))
+            # SPOTIFY_API_URL points the app at a local stand-in (python fake_spotify.py)
+            api_url = os.environ.get('SPOTIFY_API_URL')
+            if api_url:
+                client = pooled_client(api_url=api_url)
+            else:
+                # Scope needed to view and control playback
+                scope = "user-modify-playback-state user-read-playback-state"
+                client = spotipy.Spotify(auth_manager=SpotifyOAuth(scope=scope))
+
+            # Artist search, top tracks and track URIs are read through a local cache
+            self.spotify_client = CachedSpotify(client, SpotifyCache())
             
             # Check if authentication was successful
-            user = self.spotify_client.current_user()
+            with span('spotify.current_user'):
+                user = self.spotify_client.current_user()
             self.status_label.configure(text=f"Connected as {user['display_name']}", text_color="green")
             self.auth_button.pack_forget() # Hide auth button
             
@@ -169,21 +218,20 @@ class SpotifyRecommenderApp(ctk.CTk):
 
         self.results_listbox.delete("1.0", "end")
         self.search_results = {}
+        self.search_metadata = {}
         self.recommendations_dropdown.configure(values=["Select a song first"], state="disabled")
         self.play_button.configure(state="disabled")
 
-        # Search for artist first
-        artist_results = self.spotify_client.search(q=f"artist:{artist_query}", type='artist', limit=1)
-        if not artist_results['artists']['items']:
+        # Search for artist first (cached lookups only reach Spotify on a miss)
+        artist = self.spotify_client.search_artist(artist_query)
+        if artist is None:
             self.results_listbox.insert("1.0", f"No artist found for '{artist_query}' on Spotify.")
             return
 
-        artist = artist_results['artists']['items'][0]
         artist_name = artist['name']
         
         # Get top tracks for this artist
-        tracks_results = self.spotify_client.artist_top_tracks(artist['id'])
-        tracks = tracks_results['tracks']
+        tracks = self.spotify_client.artist_top_tracks(artist['id'])
 
         if not tracks:
             self.results_listbox.insert("1.0", f"No tracks found for {artist_name} on Spotify.")
@@ -194,9 +242,12 @@ class SpotifyRecommenderApp(ctk.CTk):
         self.results_listbox.insert("1.0", f"Using {current_system} recommendation system\n")
         self.results_listbox.insert("end", f"Top tracks by {artist_name} - Click a song to get recommendations:\n\n")
         
+        from fallback_tables import seed_metadata
+
         for track in tracks:
             display_name = f"{track['name']}"
             self.search_results[display_name] = track['uri']
+            self.search_metadata[display_name] = seed_metadata(track, artist)
             
             # Insert text and add a tag for binding
             tag_name = f"track_{track['id']}"
@@ -206,24 +257,31 @@ class SpotifyRecommenderApp(ctk.CTk):
 
     def select_track(self, display_name):
         self.selected_track_name = display_name.split(' - ')[0] # Get just the track name
+        metadata = self.search_metadata.get(display_name)
         self.status_label.configure(text=f"Selected: {self.selected_track_name} - Getting recommendations...")
         self.update_idletasks()
         
-        # Get recommendations from the current recommender
+        # Get recommendations from the current recommender, all from one snapshot
+        # (a refit swapping the models meanwhile does not affect this request)
         try:
-            if self.recommender_menu.get() == "Collaborative Filtering":
-                # For collaborative filtering, we need to find a user who has this track
-                track_data = self.current_recommender.user_item_df[
-                    self.current_recommender.user_item_df['track_name'] == self.selected_track_name
+            choice = self.current_choice
+            recommender = self.models.current()[choice]
+            if choice == "Collaborative Filtering":
+                # For collaborative filtering, we need to find a user who has this track;
+                # without one the recommender answers from its popularity tables
+                track_data = recommender.user_item_df[
+                    recommender.user_item_df['track_name'] == self.selected_track_name
                 ]
-                if track_data.empty:
-                    self.status_label.configure(text=f"Track '{self.selected_track_name}' not found in collaborative filtering data.")
-                    return
-                user_id = track_data['user_id'].iloc[0]
-                local_recs = self.current_recommender.recommend_svd(user_id, 5)
+                user_id = None if track_data.empty else track_data['user_id'].iloc[0]
+                local_recs = recommender.recommend_svd(user_id, 5, seed_metadata=metadata)
+            elif choice == "Hybrid":
+                local_recs = recommender.recommend(self.selected_track_name, num_recommendations=5,
+                                                   deadline_ms=HYBRID_DEADLINE_MS, seed_metadata=metadata)
+                print(f"Hybrid components: {recommender.format_report()}")
             else:
-                # For content-based and hybrid, use the standard recommend method
-                local_recs = self.current_recommender.recommend(self.selected_track_name, num_recommendations=5)
+                # For content-based, use the standard recommend method
+                local_recs = recommender.recommend(self.selected_track_name, num_recommendations=5,
+                                                   seed_metadata=metadata)
         except Exception as e:
             self.status_label.configure(text=f"Error getting recommendations: {e}", text_color="red")
             print(f"Error getting recommendations: {e}")
@@ -247,6 +305,7 @@ class SpotifyRecommenderApp(ctk.CTk):
         """Play the selected recommendation from the dropdown."""
         if not hasattr(self, 'current_recommendations') or not self.spotify_client:
             return
+        import spotipy
 
         selected_recommendation = self.recommendations_dropdown.get()
         if not selected_recommendation or selected_recommendation == "Select a song first":
@@ -257,12 +316,11 @@ class SpotifyRecommenderApp(ctk.CTk):
 
         # Search for the recommended track on Spotify
         try:
-            result = self.spotify_client.search(q=selected_recommendation, type='track', limit=1)
-            if result['tracks']['items']:
-                track_uri = result['tracks']['items'][0]['uri']
-                
+            track_uri = self.spotify_client.track_uri(selected_recommendation)
+            if track_uri:
                 # Play the track
-                self.spotify_client.start_playback(uris=[track_uri])
+                with span('spotify.start_playback'):
+                    self.spotify_client.start_playback(uris=[track_uri])
                 self.status_label.configure(text=f"Playing: {selected_recommendation}", text_color="green")
             else:
                 self.status_label.configure(text=f"Could not find '{selected_recommendation}' on Spotify.", text_color="red")
@@ -272,6 +330,36 @@ class SpotifyRecommenderApp(ctk.CTk):
             else:
                 self.status_label.configure(text=f"Error: {e.msg}", text_color="red")
 
+    def toggle_timings_panel(self):
+        """Show or hide the live timing panel."""
+        if self.timings_switch.get():
+            self.timings_frame.pack(pady=10, padx=10, fill="both", expand=True)
+            self.refresh_timings_panel()
+        else:
+            self.timings_frame.pack_forget()
+            self.cancel_timings_refresh()
+
+    def cancel_timings_refresh(self):
+        """Cancel the pending panel refresh, if any."""
+        if self.timings_refresh_job is not None:
+            self.after_cancel(self.timings_refresh_job)
+            self.timings_refresh_job = None
+
+    def refresh_timings_panel(self):
+        """Redraw the timing table and reschedule while the panel is visible."""
+        # Toggling off and on again within a second must not start a second loop
+        self.cancel_timings_refresh()
+        if not self.timings_switch.get():
+            return
+        self.timings_textbox.delete("1.0", "end")
+        self.timings_textbox.insert("1.0", metrics.format_table())
+        self.timings_refresh_job = self.after(1000, self.refresh_timings_panel)
+
+    def export_timings(self):
+        """Write the current timings as JSON and Prometheus text."""
+        json_path = metrics.write_snapshot(os.path.join(TIMINGS_EXPORT_DIR, 'timings.json'))
+        metrics.write_snapshot(os.path.join(TIMINGS_EXPORT_DIR, 'timings.prom'))
+        self.status_label.configure(text=f"Timings exported to {os.path.dirname(json_path)}", text_color="green")
 
 
 if __name__ == '__main__':
@@ -1,50 +1,325 @@
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-from collaborative_filtering import CollaborativeFiltering  
-from basic_recommender import ContentBasedRecommender  
+import numpy as np
+import threading
+import time
+from deadline_scheduler import ComponentScheduler
+from instrumentation import timed, increment
+
+# Prior latency per component for deadline scheduling, refined as calls are measured.
+# All below the UI's budget, so every component gets measured at least once.
+COMPONENT_COSTS_MS = {'content': 20.0, 'svd': 5.0, 'user_based': 50.0, 'item_based': 200.0}
+
+
+def interleave(ranked_lists, n, exclude=()):
+    """
+    Fuse ranked lists round-robin: first places of every list, then second
+    places, and so on, keeping the first occurrence of every item.
+
+    The fused top `n` only depends on the top `n` of every list, so a table
+    of longer fused rows answers shorter requests exactly.
+
+    Args:
+        ranked_lists (list): Ranked lists of track names (or any hashable ids).
+        n (int): Number of items returned.
+        exclude (set): Items never returned, e.g. the seeds.
+
+    Returns:
+        list: Up to `n` items.
+    """
+    seen = set(exclude)
+    fused = []
+    for rank in range(max((len(ranked) for ranked in ranked_lists), default=0)):
+        for ranked in ranked_lists:
+            if rank < len(ranked) and ranked[rank] not in seen:
+                seen.add(ranked[rank])
+                fused.append(ranked[rank])
+                if len(fused) == n:
+                    return fused
+    return fused
 
 class HybridRecommender:
     """
     A hybrid recommendation system that combines content-based and collaborative filtering approaches.
     """
-    def __init__(self, spotify_data_path=None):
-        self.content_recommender = ContentBasedRecommender(spotify_data_path)
-        self.collaborative_recommender = CollaborativeFiltering(spotify_data_path)
-        
-        # Fit the content-based recommender
-        self.content_recommender.fit()
-        
-        # Fit collaborative filtering models
-        print("Fitting collaborative filtering models...")
-        self.collaborative_recommender.fit_svd(n_components=20)
-        self.collaborative_recommender.fit_user_based_cf(n_neighbors=10)
-        self.collaborative_recommender.fit_item_based_cf(n_neighbors=10)
+    @timed('hybrid.fit')
+    def __init__(self, spotify_data_path=None, deduplicate=True, max_workers=None, executor='thread', statistics=None):
+        """
+        Loads the data and fits both approaches; independent fits run concurrently.
+
+        Args:
+            spotify_data_path (str, optional): Dataset CSV (default: auto-detect).
+            deduplicate (bool): Collapse repeated track_ids into one catalogue item.
+            max_workers (int, optional): Concurrent fit tasks (default: CPU count; 1 fits sequentially).
+            executor (str): 'thread' or 'process', see fit_orchestrator.FitOrchestrator.
+            statistics (EDAAccumulator, optional): Stored dataset statistics for both
+                recommenders' fallback tables (`eda_store.dataset_statistics`).
+        """
+        from fit_orchestrator import fit_recommenders
+
+        print("Fitting content-based and collaborative filtering models...")
+        self.content_recommender, self.collaborative_recommender, self.fit_report = fit_recommenders(
+            spotify_data_path, deduplicate, n_components=20, n_neighbors=10,
+            max_workers=max_workers, executor=executor, statistics=statistics)
+        self.tables = None
+        self.scheduler = ComponentScheduler(COMPONENT_COSTS_MS)
+        self._reports = threading.local()
+        self._track_users = None
+        self._popular_names = None
+
+    @classmethod
+    def from_components(cls, content_recommender, collaborative_recommender):
+        """Hybrid over already fitted recommenders, without refitting."""
+        hybrid = cls.__new__(cls)
+        hybrid.content_recommender = content_recommender
+        hybrid.collaborative_recommender = collaborative_recommender
+        hybrid.fit_report = None
+        hybrid.tables = None
+        hybrid.scheduler = ComponentScheduler(COMPONENT_COSTS_MS)
+        hybrid._reports = threading.local()
+        hybrid._track_users = None
+        hybrid._popular_names = None
+        return hybrid
+
+    @property
+    def last_report(self):
+        """Report of this thread's latest deadline call (see `_recommend_within`), or None."""
+        return getattr(self._reports, 'report', None)
 
-    def recommend(self, track_name, user_id=None, num_recommendations=5):
+    @last_report.setter
+    def last_report(self, report):
+        self._reports.report = report
+
+    def use_tables(self, tables):
+        """
+        Answer recommendations from precomputed top-N tables where possible.
+
+        The hybrid table covers calls without a `user_id`; the component
+        recommenders use their own tables otherwise. It mixes content and
+        collaborative picks, so it is used only when the tables match both
+        the catalogue and the CF users and items.
+
+        Args:
+            tables (RecommendationTables or None): Tables from `recommendation_tables.build_tables`.
+        """
+        self.content_recommender.use_tables(tables)
+        self.collaborative_recommender.use_tables(tables)
+        matched = self.content_recommender.tables is not None and self.collaborative_recommender.tables is not None
+        self.tables = tables if matched else None
+
+    @timed('hybrid.recommend')
+    def recommend(self, track_name, user_id=None, num_recommendations=5, reranker=None, deadline_ms=None,
+                  seed_metadata=None):
         """
         Provides recommendations by combining results from both content-based and collaborative filtering methods.
         
         Args:
             track_name (str): The name of the track to get recommendations for.
             num_recommendations (int): The number of recommendations to return.
+            reranker (DiversityReranker, optional): Fuse a larger candidate pool from both
+                                                    approaches and diversify it.
+            deadline_ms (float, optional): Latency budget; return the components that
+                                           finished in time (see `last_report`).
+            seed_metadata (dict, optional): 'artists' and 'genres' of the track (e.g. from
+                                            `fallback_tables.seed_metadata`), used if it is not
+                                            in the dataset.
             
         Returns:
             list: A list of recommended track names.
         """
+        if deadline_ms is not None:
+            return self._recommend_within(track_name, user_id, num_recommendations, deadline_ms, seed_metadata)
+
+        if reranker is not None:
+            return self._diversified_recommendations(track_name, user_id, num_recommendations, reranker)
+
+        if self.tables is not None and user_id is None:
+            idx = self.content_recommender.track_rows([track_name])[0]
+            if idx >= 0:
+                cached = self.tables.lookup('hybrid', idx, num_recommendations)
+                if cached is not None:
+                    increment('hybrid.recommend.table_hit')
+                    return self.content_recommender.track_names[cached].tolist()
+
         # Get content-based recommendations
-        content_recommendations = self.content_recommender.recommend(track_name, num_recommendations)
+        content_recommendations = self.content_recommender.recommend(track_name, num_recommendations,
+                                                                     seed_metadata=seed_metadata)
         
         # Get collaborative filtering recommendations
         # We need to find a user who has listened to this track
         collaborative_recommendations = self._get_collaborative_recommendations(track_name, user_id, num_recommendations)
 
-        # Combine recommendations and remove duplicates
-        combined_recommendations = list(set(content_recommendations + collaborative_recommendations))
-
-        # Return the top N recommendations
-        return combined_recommendations[:num_recommendations]
+        # Interleave the two lists, so both contribute to the top N
+        return interleave([content_recommendations, collaborative_recommendations],
+                          num_recommendations, exclude={track_name})
     
+    @timed('hybrid.recommend_for_tracks')
+    def recommend_for_tracks(self, seeds, weights=None, n=5, user_id=None):
+        """
+        Provides recommendations for a playlist of seed tracks.
+
+        The content part scores one aggregated TF-IDF query; the collaborative
+        part folds the seeds into the SVD space as a single pseudo-user. Each
+        is one matrix product regardless of the number of seeds.
+
+        Args:
+            seeds (list): Track names of the playlist.
+            weights (list, optional): Weight per seed; defaults to equal weights.
+            n (int): The number of recommendations to return.
+            user_id (str, optional): Known user whose history is added to the profile.
+
+        Returns:
+            list: Recommended track names, content and collaborative picks
+                  interleaved, without repeats or seeds.
+        """
+        content_recommendations = self.content_recommender.recommend_for_tracks(seeds, weights, n)
+
+        collaborative_recommendations = []
+        cf = self.collaborative_recommender
+        seed_weights = np.ones(len(seeds)) if weights is None else np.asarray(weights, dtype=np.float64)
+        name_weights = pd.Series(seed_weights, index=seeds).groupby(level=0).sum()
+        is_seed = pd.Series(cf.item_names).isin(name_weights.index).to_numpy()
+        if is_seed.any():
+            item_indices = np.flatnonzero(is_seed)
+            collaborative_recommendations = cf.recommend_svd_for_items(
+                item_indices, name_weights[cf.item_names[item_indices]].to_numpy(), n, user_id=user_id)
+        else:
+            print("None of the seed tracks were found in collaborative filtering data.")
+
+        return interleave([content_recommendations, collaborative_recommendations], n, exclude=set(seeds))
+
+    @timed('hybrid.diversified')
+    def _diversified_recommendations(self, track_name, user_id, num_recommendations, reranker):
+        """
+        Fuse content and collaborative candidates by reciprocal rank, then diversify.
+
+        The content pool holds `reranker.pool_size` neighbours; the collaborative
+        methods contribute a few times `num_recommendations` picks each.
+        """
+        content = self.content_recommender
+        content_rows, _ = content.candidate_pool(track_name, reranker.pool_size)
+        collaborative = self._get_collaborative_recommendations(track_name, user_id, 4 * num_recommendations)
+        collaborative_rows = content.track_rows(np.asarray(collaborative, dtype=object))
+        collaborative_rows = collaborative_rows[collaborative_rows >= 0]
+
+        # Reciprocal rank fusion (k=60) over the two ranked lists
+        fused = {}
+        for ranked in (content_rows, collaborative_rows):
+            for rank, row in enumerate(ranked):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (60 + rank)
+        if not fused:
+            return []
+        rows = np.fromiter(fused, dtype=np.int64, count=len(fused))
+        relevance = np.fromiter(fused.values(), dtype=np.float64, count=len(fused))
+
+        # Never return the seed itself
+        keep = content.track_names[rows] != track_name
+        return content.diversify(rows[keep], relevance[keep], num_recommendations, reranker)
+
+    @timed('hybrid.deadline')
+    def _recommend_within(self, track_name, user_id, num_recommendations, deadline_ms, seed_metadata=None):
+        """
+        Recommendations from the components that finish within `deadline_ms`.
+
+        Content and the three CF methods run concurrently, cheapest expected
+        cost first (see ComponentScheduler). Finished lists are fused by
+        reciprocal rank, content first on ties. Missing places are filled from
+        the precomputed content table, then from the artists' and genres' most
+        popular tracks when `seed_metadata` is given (a seed outside the
+        dataset), then from the most popular tracks.
+        What contributed and how long each component took is stored in
+        `last_report`.
+        """
+        start = time.perf_counter()
+        content = self.content_recommender
+        cf = self.collaborative_recommender
+        n = num_recommendations
+
+        # The vectorized single-seed scorer: same neighbours as content.recommend, far cheaper
+        components = [('content', lambda: content.recommend_for_tracks([track_name], n=n))]
+        if user_id is None:
+            user_id = self._user_for_track(track_name)
+        if user_id is not None and user_id in cf.user_to_idx:
+            components += [('svd', lambda: cf.recommend_svd(user_id, n)),
+                           ('user_based', lambda: cf.recommend_user_based(user_id, n)),
+                           ('item_based', lambda: cf.recommend_item_based(user_id, n))]
+
+        remaining = deadline_ms - 1000 * (time.perf_counter() - start)
+        results, report = self.scheduler.run(components, remaining)
+
+        # Reciprocal rank fusion (k=60) in component order, never the seed itself
+        fused = {}
+        for name, _ in components:
+            for rank, track in enumerate(results.get(name) or []):
+                if track != track_name:
+                    fused[track] = fused.get(track, 0.0) + 1.0 / (60 + rank)
+        recommendations = sorted(fused, key=fused.get, reverse=True)[:n]
+        contributed = [name for name, _ in components if results.get(name)]
+
+        fallbacks = []
+        if len(recommendations) < n and 'content' not in results and content.tables is not None:
+            row = content.track_rows([track_name])[0]
+            cached = content.tables.lookup('content', row, n) if row >= 0 else None
+            if cached is not None:
+                fallbacks.append('content_table')
+                recommendations += [track for track in content.track_names[cached]
+                                    if track not in fused and track != track_name]
+        if len(recommendations) < n and seed_metadata and content.fallback is not None:
+            fallbacks.append('metadata')
+            seen = set(recommendations) | {track_name}
+            recommendations += content.fallback.recommend(**seed_metadata, n=n - len(recommendations), exclude=seen)
+        if len(recommendations) < n:
+            fallbacks.append('popularity')
+            seen = set(recommendations) | {track_name}
+            recommendations += [track for track in self._popular_tracks(n + len(seen)) if track not in seen]
+        for fallback in fallbacks:
+            increment(f'hybrid.deadline.fallback.{fallback}')
+
+        self.last_report = {
+            'deadline_ms': deadline_ms,
+            'elapsed_ms': 1000 * (time.perf_counter() - start),
+            'contributed': contributed,
+            'fallbacks': fallbacks,
+            'components': report,
+        }
+        return recommendations[:n]
+
+    def prepare_for_serving(self):
+        """
+        Build the lookups otherwise computed on first use, so that queries only
+        read state and can run on many threads (see model_snapshots).
+        """
+        self.content_recommender.prepare_for_serving()
+        self._user_for_track(None)
+        self._popular_tracks(100)
+
+    def _user_for_track(self, track_name):
+        """First user who listened to the track (as in the collaborative path), or None."""
+        if self._track_users is None:
+            user_item_df = self.collaborative_recommender.user_item_df
+            first = user_item_df.drop_duplicates('track_name')
+            self._track_users = pd.Series(first['user_id'].to_numpy(), index=first['track_name'].to_numpy())
+        return self._track_users.get(track_name)
+
+    def _popular_tracks(self, n):
+        """Names of the `n` most popular catalogue tracks, computed once."""
+        if self._popular_names is None or len(self._popular_names) < n:
+            spotify_df = self.content_recommender.spotify_df
+            order = np.argsort(-spotify_df['popularity'].fillna(0).to_numpy(), kind='stable')
+            self._popular_names = list(dict.fromkeys(spotify_df['track_name'].to_numpy()[order[:max(n, 100)]]))
+        return self._popular_names[:n]
+
+    def format_report(self):
+        """One-line summary of `last_report`, e.g. for the UI."""
+        report = self.last_report
+        if report is None:
+            return ''
+        parts = [f"{name} {info['status']}" + (f" {info['ms']:.0f} ms" if 'ms' in info else '')
+                 for name, info in report['components'].items()]
+        if report['fallbacks']:
+            parts.append(f"fallback: {', '.join(report['fallbacks'])}")
+        return f"{report['elapsed_ms']:.0f}/{report['deadline_ms']:.0f} ms | " + ', '.join(parts)
+
+    @timed('hybrid.collaborative')
     def _get_collaborative_recommendations(self, track_name, user_id, num_recommendations):
         """
         Get collaborative filtering recommendations for a track by finding users who listened to it.
@@ -64,14 +339,14 @@ class HybridRecommender:
                 # Get a user who has listened to this track
                 user_id = track_data['user_id'].iloc[0]
             
-            # Get recommendations using different methods and combine them
+            # Get recommendations using different methods and interleave them
             recommendations = []
             
             # Try SVD recommendations
             try:
                 svd_recs = self.collaborative_recommender.recommend_svd(user_id, num_recommendations)
                 print(f"SVD recommendations: {svd_recs}")
-                recommendations.extend(svd_recs)
+                recommendations.append(svd_recs)
             except Exception as e:
                 print(f"SVD recommendation error: {e}")
             
@@ -79,7 +354,7 @@ class HybridRecommender:
             try:
                 user_recs = self.collaborative_recommender.recommend_user_based(user_id, num_recommendations)
                 print(f"User-based recommendations: {user_recs}")
-                recommendations.extend(user_recs)
+                recommendations.append(user_recs)
             except Exception as e:
                 print(f"User-based recommendation error: {e}")
             
@@ -87,18 +362,19 @@ class HybridRecommender:
             try:
                 item_recs = self.collaborative_recommender.recommend_item_based(user_id, num_recommendations)
                 print(f"Item-based recommendations: {item_recs}")
-                recommendations.extend(item_recs)
+                recommendations.append(item_recs)
             except Exception as e:
                 print(f"Item-based recommendation error: {e}")
             
-            # Remove duplicates and return
-            return list(set(recommendations))[:num_recommendations]
+            return interleave(recommendations, num_recommendations)
             
         except Exception as e:
             print(f"Error getting collaborative recommendations: {e}")
             return []
 
-if __name__ == '__main__':
+
+def main():
+    """Demo function to test the hybrid recommender."""
     # Example usage
     hybrid_recommender = HybridRecommender()
 
@@ -134,7 +410,7 @@ if __name__ == '__main__':
     print("-" * 40)
 
 
-# Test same song for different users
+    # Test same song for different users
     print("\n" + "="*40)
     print("Testing with the same track for different users")
     print("="*40)
@@ -156,4 +432,12 @@ if __name__ == '__main__':
         else:
             print(f"Could not find recommendations for user '{user_id}'.")
 
-    print("-" * 40)
\ No newline at end of file
+    print("-" * 40)
+
+
+if __name__ == '__main__':
+    from profiling import parse_profile_args, profile_run
+    args = parse_profile_args("Hybrid recommender demo")
+
+    with profile_run('hybrid_recommender', args):
+        main()
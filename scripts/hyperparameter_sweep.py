@@ -0,0 +1,297 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from concurrent.futures import ProcessPoolExecutor
+import time
+import os
+from evaluation import RankingEvaluator, evaluate_block, summarize_blocks
+
+SWEEP_METHODS = ['svd', 'nmf', 'user_based', 'item_knn']
+RANK_METHODS = ['svd', 'nmf']
+
+# Per-process sweep state (largest models), set once by the pool initializer,
+# and the per-configuration views derived from it in that process
+_sweep_state = None
+_config_cache = {}
+
+
+def _init_sweep_worker(state):
+    """Store the shared sweep state in a pool worker."""
+    global _sweep_state
+    _sweep_state = state
+    _config_cache.clear()
+
+
+def _knn_similarity(distances, indices, k):
+    """Sparse item x item matrix holding each item's k nearest neighbours (self excluded)."""
+    n_items = indices.shape[0]
+    rows = np.repeat(np.arange(n_items), k)
+    return csr_matrix((1 - distances[:, 1:k + 1].ravel(), (rows, indices[:, 1:k + 1].ravel())),
+                      shape=(n_items, n_items))
+
+
+def _config_state(state, method, value):
+    """
+    Evaluation state of one configuration, derived from the largest models:
+    leading SVD components, the NMF fit of that rank, or the first `value`
+    neighbours of every user or item.
+    """
+    key = (id(state), method, value)
+    if key in _config_cache:
+        return _config_cache[key]
+
+    config = {name: state[name] for name in ('train', 'test', 'k', 'self_information')}
+    if method == 'svd':
+        config['svd_factors'] = np.ascontiguousarray(state['svd_factors'][:, :value])
+        config['svd_components'] = np.ascontiguousarray(state['svd_components'][:value])
+    elif method == 'nmf':
+        config['nmf_factors'], config['nmf_components'] = state['nmf'][value]
+    elif method == 'user_based':
+        config['neighbor_distances'] = state['user_distances'][:, 1:value + 1]
+        config['neighbor_indices'] = state['user_indices'][:, 1:value + 1]
+    elif method == 'item_knn':
+        config['item_similarity'] = _knn_similarity(state['item_distances'], state['item_indices'], value)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    _config_cache[key] = config
+    return config
+
+
+def _evaluate_config_block(method, value, user_indices, state=None):
+    """`evaluate_block` for one configuration of the sweep."""
+    state = state if state is not None else _sweep_state
+    return evaluate_block(method, user_indices, _config_state(state, method, value))
+
+
+class HyperparameterSweep:
+    """
+    Sweep of model sizes over one holdout split, sharing the expensive fits.
+
+    SVD is fitted once at the largest rank; smaller ranks use its leading
+    components. NMF ranks are fitted in increasing order, each starting from
+    the previous solution plus small random columns, which needs far fewer
+    iterations than a cold start for a similar error. User and item
+    neighbour lists are computed once at the largest k and sliced. Every
+    configuration is then scored by the RankingEvaluator metrics, with all
+    (configuration, user block) pairs spread over a process pool.
+    """
+
+    def __init__(self, recommender, ranks=(10, 20, 50), neighbors=(5, 10, 20, 50), methods=None,
+                 k=10, holdout_fraction=0.2, random_state=42, nmf_max_iter=200, nmf_warm_max_iter=50):
+        """
+        Args:
+            recommender (CollaborativeFiltering): Recommender whose user-item matrix is evaluated.
+            ranks (tuple): n_components values for svd and nmf.
+            neighbors (tuple): n_neighbors values for user_based and item_knn.
+            methods (list, optional): Subset of SWEEP_METHODS (default: all).
+            k (int): Cut-off for the ranking metrics.
+            holdout_fraction (float): Fraction of each user's items held out for testing.
+            random_state (int): Seed for the split and the fits.
+            nmf_max_iter (int): NMF iterations for the smallest rank (and for naive refits).
+            nmf_warm_max_iter (int): NMF iterations for warm-started ranks.
+        """
+        self.evaluator = RankingEvaluator(recommender, holdout_fraction, k, random_state=random_state)
+        self.ranks = sorted(ranks)
+        self.neighbors = sorted(neighbors)
+        self.methods = methods or SWEEP_METHODS
+        self.random_state = random_state
+        self.nmf_max_iter = nmf_max_iter
+        self.nmf_warm_max_iter = nmf_warm_max_iter
+        self.state = None
+        self.fit_times = {}
+
+    def configurations(self, n_users=None):
+        """
+        (method, value) pairs of the sweep, in table order.
+
+        Args:
+            n_users (int, optional): Users in the train split; SVD ranks are then
+                                     capped as in `_capped_ranks`.
+        """
+        svd_ranks = self.ranks if n_users is None else self._capped_ranks(n_users)
+        return [(method, value) for method in self.methods
+                for value in (svd_ranks if method == 'svd' else
+                              self.ranks if method in RANK_METHODS else self.neighbors)]
+
+    def _capped_ranks(self, n_users):
+        """SVD ranks capped at n_users - 1, the most TruncatedSVD can fit, without repeats."""
+        if n_users < 2:
+            raise ValueError(f"SVD needs at least 2 users in the train split, got {n_users}.")
+        return sorted({min(rank, n_users - 1) for rank in self.ranks})
+
+    def precompute(self):
+        """
+        Fit the shared models on the train split.
+
+        Returns:
+            dict: Fit seconds per (method, value); shared fits are under (method, 'shared').
+        """
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.neighbors import NearestNeighbors
+
+        state = self.evaluator.base_state()
+        train = state['train']
+        n_users, n_items = train.shape
+
+        if 'svd' in self.methods:
+            max_rank = max(self._capped_ranks(n_users))
+            print(f"Fitting SVD once at rank {max_rank}...")
+            start = time.perf_counter()
+            svd = TruncatedSVD(n_components=max_rank, random_state=self.random_state)
+            state['svd_factors'] = svd.fit_transform(train)
+            state['svd_components'] = svd.components_
+            self.fit_times[('svd', 'shared')] = time.perf_counter() - start
+
+        if 'nmf' in self.methods:
+            state['nmf'] = self._fit_nmf_warm(train)
+
+        if 'user_based' in self.methods:
+            n_query = min(max(self.neighbors) + 1, n_users)
+            print(f"Computing {n_query - 1} user neighbours once...")
+            start = time.perf_counter()
+            model = NearestNeighbors(n_neighbors=n_query, metric='cosine', algorithm='brute').fit(train)
+            state['user_distances'], state['user_indices'] = model.kneighbors(train, n_neighbors=n_query)
+            self.fit_times[('user_based', 'shared')] = time.perf_counter() - start
+
+        if 'item_knn' in self.methods:
+            n_query = min(max(self.neighbors) + 1, n_items)
+            print(f"Computing {n_query - 1} item neighbours once...")
+            start = time.perf_counter()
+            item_user = train.T.tocsr()
+            model = NearestNeighbors(n_neighbors=n_query, metric='cosine', algorithm='brute').fit(item_user)
+            state['item_distances'], state['item_indices'] = model.kneighbors(item_user, n_neighbors=n_query)
+            self.fit_times[('item_knn', 'shared')] = time.perf_counter() - start
+
+        self.state = state
+        return self.fit_times
+
+    def _fit_nmf_warm(self, train):
+        """NMF at every rank, each initialised from the previous rank's factors."""
+        from sklearn.decomposition import NMF
+
+        rng = np.random.default_rng(self.random_state)
+        scale = np.sqrt(train.mean() / max(self.ranks))
+        fits, W, H = {}, None, None
+        for rank in self.ranks:
+            print(f"Fitting NMF at rank {rank}" + (" (warm start)..." if W is not None else "..."))
+            start = time.perf_counter()
+            if W is None:
+                model = NMF(n_components=rank, random_state=self.random_state, max_iter=self.nmf_max_iter)
+                W = model.fit_transform(train)
+            else:
+                extra = rank - W.shape[1]
+                W = np.hstack([W, scale * rng.random((W.shape[0], extra))])
+                H = np.vstack([H, scale * rng.random((extra, H.shape[1]))])
+                model = NMF(n_components=rank, init='custom', random_state=self.random_state,
+                            max_iter=self.nmf_warm_max_iter)
+                W = model.fit_transform(train, W=W, H=H)
+            H = model.components_
+            fits[rank] = (W, H)
+            self.fit_times[('nmf', rank)] = time.perf_counter() - start
+        return fits
+
+    def naive_fit_times(self):
+        """
+        Fit every configuration from scratch, as a separate sweep would.
+
+        Returns:
+            dict: Fit seconds per (method, value).
+        """
+        from sklearn.decomposition import TruncatedSVD, NMF
+        from sklearn.neighbors import NearestNeighbors
+
+        train = self.evaluator.base_state()['train']
+        n_users = train.shape[0]
+        times = {}
+        for method, value in self.configurations():
+            start = time.perf_counter()
+            if method == 'svd':
+                TruncatedSVD(n_components=min(value, n_users - 1), random_state=self.random_state).fit(train)
+            elif method == 'nmf':
+                NMF(n_components=value, random_state=self.random_state, max_iter=self.nmf_max_iter).fit(train)
+            else:
+                data = train if method == 'user_based' else train.T.tocsr()
+                n_query = min(value + 1, data.shape[0])
+                NearestNeighbors(n_neighbors=n_query, metric='cosine', algorithm='brute').fit(data).kneighbors(data)
+            times[(method, value)] = time.perf_counter() - start
+        return times
+
+    def run(self, n_jobs=None, block_size=64):
+        """
+        Evaluate every configuration.
+
+        Args:
+            n_jobs (int, optional): Worker processes (default: CPU count; 1 evaluates in-process).
+            block_size (int): Users scored per task.
+
+        Returns:
+            list: One row of metrics, fit time and scoring latency per configuration.
+        """
+        if self.state is None:
+            self.precompute()
+        n_jobs = n_jobs or os.cpu_count() or 1
+        n_users, n_items = self.state['train'].shape
+        blocks = [np.arange(start, min(start + block_size, n_users))
+                  for start in range(0, n_users, block_size)]
+        configurations = self.configurations(n_users)
+        if 'svd' in self.methods and self._capped_ranks(n_users) != self.ranks:
+            print(f"SVD ranks capped at {n_users - 1} (users - 1): {self._capped_ranks(n_users)}")
+
+        print(f"Evaluating {len(configurations)} configurations over {n_users} users "
+              f"with {n_jobs} worker(s)...")
+        start = time.perf_counter()
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_sweep_worker,
+                                     initargs=(self.state,)) as executor:
+                futures = {config: [executor.submit(_evaluate_config_block, *config, block) for block in blocks]
+                           for config in configurations}
+                results = {config: [future.result() for future in found] for config, found in futures.items()}
+        else:
+            results = {config: [_evaluate_config_block(*config, block, self.state) for block in blocks]
+                       for config in configurations}
+        self.wall_time = time.perf_counter() - start
+
+        rows = []
+        for method, value in configurations:
+            metrics = summarize_blocks(results[(method, value)], self.evaluator.k, n_items)
+            metrics['latency_ms_per_user'] = 1000 * metrics.pop('scoring_time_s') / n_users
+            metrics['fit_s'] = self.fit_times.get((method, value), 0.0)
+            rows.append({'method': method, 'value': value, **metrics})
+        return rows
+
+
+def print_sweep(rows, fit_times, k, naive_times=None):
+    """Print the quality-vs-latency table and the shared against naive fit time."""
+    print(f"\n{'method':<12}{'param':>7}{f'ndcg@{k}':>9}{f'recall@{k}':>11}{f'map@{k}':>8}"
+          f"{'coverage':>10}{'fit s':>8}{'ms/user':>9}")
+    for row in rows:
+        print(f"{row['method']:<12}{row['value']:>7}{row[f'ndcg@{k}']:>9.4f}{row[f'recall@{k}']:>11.4f}"
+              f"{row[f'map@{k}']:>8.4f}{row['coverage']:>10.4f}{row['fit_s']:>8.2f}{row['latency_ms_per_user']:>9.3f}")
+    for (method, value), seconds in fit_times.items():
+        if value == 'shared':
+            print(f"Shared {method} fit (largest size, sliced for the others): {seconds:.2f} s")
+    if naive_times:
+        print(f"Fit time: {sum(fit_times.values()):.2f} s shared vs {sum(naive_times.values()):.2f} s "
+              f"refitting every configuration")
+
+
+def main():
+    import argparse
+    from collaborative_filtering import CollaborativeFiltering
+
+    parser = argparse.ArgumentParser(description="Sweep CF model sizes with shared precomputation.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--ranks', type=int, nargs='+', default=[10, 20, 50], help="SVD/NMF ranks")
+    parser.add_argument('--neighbors', type=int, nargs='+', default=[5, 10, 20, 50], help="KNN sizes")
+    parser.add_argument('--methods', nargs='+', choices=SWEEP_METHODS, help="Methods to sweep (default: all)")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--compare-naive', action='store_true', help="Also time refitting every configuration")
+    args = parser.parse_args()
+
+    sweep = HyperparameterSweep(CollaborativeFiltering(args.data), args.ranks, args.neighbors, args.methods)
+    rows = sweep.run(n_jobs=args.jobs)
+    naive_times = sweep.naive_fit_times() if args.compare_naive else None
+    print_sweep(rows, sweep.fit_times, sweep.evaluator.k, naive_times)
+
+
+if __name__ == "__main__":
+    main()
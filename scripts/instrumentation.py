@@ -0,0 +1,258 @@
+import threading
+import functools
+import json
+import time
+import re
+import os
+
+# Histogram bucket upper bounds in seconds (Prometheus convention)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+
+class _NullSpan:
+    """Shared no-op context manager returned while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times one block of code and records it in the registry."""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        for listener in self.registry.listeners:
+            listener.span_started(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.registry.observe(self.name, elapsed)
+        if exc_type is not None:
+            self.registry.increment(f"{self.name}.errors")
+        for listener in self.registry.listeners:
+            listener.span_finished(self.name, elapsed)
+        return False
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum, min, max and last value."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value):
+        """Record one observation in seconds."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.last = value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket containing it, capped at max."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Serialisable summary of the histogram."""
+        return {
+            'count': self.count,
+            'sum_s': self.total,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'min_s': self.min if self.count else 0.0,
+            'max_s': self.max,
+            'last_s': self.last,
+            'p50_s': self.quantile(0.5),
+            'p95_s': self.quantile(0.95),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process collection of timing spans and counters.
+
+    While disabled, `span` returns a shared no-op context manager and `timed`
+    calls straight through, so instrumented hot paths pay only a flag check.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self.listeners = []
+
+    def enable(self):
+        """Start collecting metrics."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop collecting metrics (already collected data is kept)."""
+        self.enabled = False
+
+    def add_listener(self, listener):
+        """
+        Register an object notified around every span.
+
+        The listener must implement `span_started(name)` and
+        `span_finished(name, seconds)`; it is only called while enabled.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Unregister a span listener."""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def reset(self):
+        """Drop all collected metrics."""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def span(self, name):
+        """
+        Context manager timing the enclosed block under `name`.
+
+        Example:
+            with metrics.span('content.fit'):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of the wrapped function under `name`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds):
+        """Record a duration in seconds for `name`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, value=1):
+        """Increase the counter `name` by `value`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Return a point-in-time copy of all metrics.
+
+        Returns:
+            dict: {'timestamp', 'spans': {name: histogram summary}, 'counters': {name: value}}
+        """
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'spans': {name: h.to_dict() for name, h in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self, indent=2):
+        """Snapshot as a JSON string."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix='recommender'):
+        """Snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        if snapshot['spans']:
+            metric = f"{prefix}_span_duration_seconds"
+            lines.append(f"# HELP {metric} Duration of instrumented spans.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, summary in snapshot['spans'].items():
+                cumulative = 0
+                for bound, count in summary['buckets'].items():
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {summary["sum_s"]}')
+                lines.append(f'{metric}_count{{span="{name}"}} {summary["count"]}')
+
+        for name, value in snapshot['counters'].items():
+            metric = f"{prefix}_{_sanitize(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path):
+        """Write a snapshot to `path`; `.prom`/`.txt` give Prometheus text, anything else JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        content = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def format_table(self):
+        """Human readable table of all spans and counters."""
+        snapshot = self.snapshot()
+        lines = [f"{'span':<28} {'count':>6} {'last ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for name, s in snapshot['spans'].items():
+            lines.append(f"{name:<28} {s['count']:>6} {s['last_s'] * 1000:>9.1f} {s['p50_s'] * 1000:>9.1f} "
+                         f"{s['p95_s'] * 1000:>9.1f} {s['max_s'] * 1000:>9.1f}")
+        for name, value in snapshot['counters'].items():
+            lines.append(f"{name:<28} {value:>6}")
+        return "\n".join(lines)
+
+
+def _sanitize(name):
+    """Turn a dotted metric name into a valid Prometheus identifier."""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+# Process-wide registry; enabled with RECOMMENDER_METRICS=1 or metrics.enable()
+metrics = MetricsRegistry(enabled=os.environ.get('RECOMMENDER_METRICS', '0') not in ('', '0'))
+span = metrics.span
+timed = metrics.timed
+increment = metrics.increment
@@ -0,0 +1,325 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+import threading
+import itertools
+import weakref
+import time
+import numpy as np
+import pandas as pd
+from instrumentation import span, increment
+
+RECOMMENDER_NAMES = ("Content-Based", "Collaborative Filtering", "Hybrid")
+
+
+def _freeze(value, depth=3, seen=None):
+    """
+    Mark the numpy arrays reachable from `value` read-only: arrays held
+    directly, in lists, tuples and dicts, and in the attributes of objects
+    (fitted sklearn models, sparse matrices) up to `depth` levels down.
+    pandas objects are left alone.
+
+    Returns:
+        int: Number of arrays frozen.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen or isinstance(value, (pd.DataFrame, pd.Series, pd.Index, str, bytes, type)):
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+        return 1
+    if depth == 0:
+        return 0
+    if isinstance(value, dict):
+        children = value.values()
+    elif isinstance(value, (list, tuple)):
+        children = value
+    elif hasattr(value, '__dict__') and not callable(value):
+        children = vars(value).values()
+    else:
+        return 0
+    return sum(_freeze(child, depth - 1, seen) for child in children)
+
+
+class ModelSnapshot:
+    """
+    Read-only set of fitted recommenders, published for serving.
+
+    A snapshot is built once from recommenders nobody else holds. Lazily
+    computed lookups are built up front (`prepare_for_serving`), and every
+    numpy array reachable from the recommenders, including those inside
+    sparse matrices and fitted sklearn models, is marked read-only. An
+    accidental in-place write, e.g. `add_tracks` on a served model, then
+    fails loudly instead of changing results under concurrent queries.
+    Query paths therefore keep their scratch space per call (as
+    QuantizedItemFactors does) and per-call diagnostics per thread (as
+    HybridRecommender.last_report does). Queries need no lock; the
+    snapshot itself cannot be reassigned.
+    """
+
+    def __init__(self, recommenders, version=0, info=None):
+        """
+        Args:
+            recommenders (dict): Fitted recommenders by name.
+            version (int): Version number, increasing with every publish.
+            info (dict, optional): Free-form details, e.g. the dataset path.
+        """
+        for recommender in recommenders.values():
+            prepare = getattr(recommender, 'prepare_for_serving', None)
+            if prepare is not None:
+                prepare()
+        frozen = _freeze(list(recommenders.values()))
+        object.__setattr__(self, 'recommenders', MappingProxyType(dict(recommenders)))
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'created_at', time.time())
+        object.__setattr__(self, 'info', MappingProxyType({**(info or {}), 'frozen_arrays': frozen}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelSnapshot is read-only; publish a new snapshot instead.")
+
+    def __delattr__(self, name):
+        raise AttributeError("ModelSnapshot is read-only; publish a new snapshot instead.")
+
+    def __getitem__(self, name):
+        return self.recommenders[name]
+
+    def __contains__(self, name):
+        return name in self.recommenders
+
+    def __repr__(self):
+        return f"ModelSnapshot(version={self.version}, recommenders={list(self.recommenders)})"
+
+
+class SnapshotManager:
+    """
+    Holds the active ModelSnapshot and replaces it after background refits.
+
+    Readers take `current()` once per request and use that snapshot until
+    the request ends; reading it is a single attribute load, without a lock.
+    A refit builds new recommenders on a background thread, wraps them in a
+    snapshot and swaps the active reference. Requests already running keep
+    the snapshot they took, and a retired snapshot is freed as soon as the
+    last of them drops it; `retired()` lists those still held.
+    """
+
+    def __init__(self, build, snapshot=None):
+        """
+        Args:
+            build (callable): Returns a dict of freshly fitted recommenders by name;
+                              keyword arguments of `refit_async` are passed on.
+            snapshot (ModelSnapshot, optional): Snapshot to serve from the start.
+        """
+        self.build = build
+        self._active = snapshot
+        self._versions = itertools.count(1 if snapshot is None else snapshot.version + 1)
+        self._lock = threading.Lock()
+        self._retired = {}
+        self._refit = None
+        self._executor = None
+        self.last_error = None
+
+    def current(self):
+        """The active snapshot; hold on to it for the whole request."""
+        snapshot = self._active
+        if snapshot is None:
+            raise RuntimeError("No model snapshot has been published yet.")
+        return snapshot
+
+    def publish(self, recommenders, **info):
+        """
+        Make freshly fitted recommenders the active snapshot.
+
+        Args:
+            recommenders (dict or ModelSnapshot): Recommenders by name, or a built snapshot.
+            **info: Details stored on the snapshot.
+
+        Returns:
+            ModelSnapshot: The published snapshot.
+        """
+        if isinstance(recommenders, ModelSnapshot):
+            snapshot = recommenders
+        else:
+            with span('snapshots.freeze'):
+                snapshot = ModelSnapshot(recommenders, next(self._versions), info)
+        with self._lock:
+            previous, self._active = self._active, snapshot
+            if previous is not None:
+                version = previous.version
+                self._retired[version] = weakref.ref(previous, lambda _, v=version: self._released(v))
+        increment('snapshots.published')
+        return snapshot
+
+    def _released(self, version):
+        self._retired.pop(version, None)
+        increment('snapshots.released')
+
+    def retired(self):
+        """Versions of replaced snapshots that in-flight requests still hold."""
+        with self._lock:
+            return sorted(version for version, ref in self._retired.items() if ref() is not None)
+
+    def build_and_publish(self, **options):
+        """Fit new recommenders and publish them (blocking)."""
+        with span('snapshots.build'):
+            recommenders = self.build(**options)
+        return self.publish(recommenders, **options)
+
+    def refit_async(self, **options):
+        """
+        Refit and publish on a background thread; queries continue on the
+        active snapshot meanwhile. A call while a refit is running returns
+        that refit instead of starting another.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the published ModelSnapshot.
+        """
+        with self._lock:
+            if self._refit is not None and not self._refit.done():
+                increment('snapshots.refit_coalesced')
+                return self._refit
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='refit')
+            self._refit = self._executor.submit(self._refit_and_publish, options)
+            return self._refit
+
+    def _refit_and_publish(self, options):
+        try:
+            return self.build_and_publish(**options)
+        except Exception as e:
+            # The active snapshot stays in place when a refit fails
+            self.last_error = e
+            increment('snapshots.refit_failed')
+            raise
+
+    @property
+    def refitting(self):
+        """True while a background refit is running."""
+        refit = self._refit
+        return refit is not None and not refit.done()
+
+    def close(self):
+        """Stop the refit thread once a running refit finishes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def build_recommenders(data_path=None, deduplicate=True, n_components=20, n_neighbors=10, tables=True,
+                       statistics=True, verbose=False):
+    """
+    Fit the content, collaborative and hybrid recommenders from scratch.
+
+    Args:
+        data_path (str, optional): Dataset CSV (default: auto-detect).
+        deduplicate (bool): Collapse repeated track_ids into one catalogue item.
+        n_components (int): SVD rank.
+        n_neighbors (int): Neighbours of the user- and item-based models.
+        tables (bool): Serve from the precomputed tables when they exist.
+        statistics (bool or EDAAccumulator): Dataset statistics for the fallback
+            tables; True reads them from the EDA store (computing only partitions
+            it has not seen), False fits without them.
+        verbose (bool): Print the fit report.
+
+    Returns:
+        dict: Recommenders by name (see RECOMMENDER_NAMES).
+    """
+    from fit_orchestrator import fit_recommenders
+    from hybrid_recommender import HybridRecommender
+
+    if statistics is True:
+        from basic_recommender import ContentBasedRecommender
+        from eda_store import dataset_statistics
+        with span('snapshots.statistics'):
+            statistics = dataset_statistics(data_path or ContentBasedRecommender._find_dataset(None))
+    content, collaborative, _ = fit_recommenders(data_path, deduplicate, n_components=n_components,
+                                                 n_neighbors=n_neighbors, verbose=verbose,
+                                                 statistics=statistics or None)
+    recommenders = dict(zip(RECOMMENDER_NAMES, (content, collaborative,
+                                                HybridRecommender.from_components(content, collaborative))))
+    if tables:
+        from recommendation_tables import RecommendationTables
+        loaded = RecommendationTables.load_default()
+        if loaded is not None:
+            for recommender in recommenders.values():
+                recommender.use_tables(loaded)
+    return recommenders
+
+
+if __name__ == "__main__":
+    import argparse
+    import gc
+
+    parser = argparse.ArgumentParser(description="Serve queries from many threads while the models refit and swap.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--threads', type=int, default=4, help="Query threads")
+    parser.add_argument('--seconds', type=float, default=2.0, help="Queries after the swap, in seconds")
+    parser.add_argument('--deadline-ms', type=float, default=500, help="Budget of the hybrid queries")
+    args = parser.parse_args()
+
+    def build():
+        recommenders = build_recommenders(args.data, tables=False)
+        # Exercise the quantized first pass of recommend_svd as well
+        recommenders["Collaborative Filtering"].quantize_svd('int8')
+        return recommenders
+
+    manager = SnapshotManager(build)
+    first = manager.build_and_publish()
+    track_names = list(first["Content-Based"].first_track_rows.index[:200])
+    user_ids = list(first["Collaborative Filtering"].user_to_idx)[:200]
+    del first
+
+    # Content, quantized SVD and deadline-bound hybrid queries, round-robin
+    queries = [
+        ('content', lambda snapshot, i: snapshot["Content-Based"].recommend(track_names[i % len(track_names)], 5)),
+        ('svd int8', lambda snapshot, i: snapshot["Collaborative Filtering"].recommend_svd(user_ids[i % len(user_ids)], 5)),
+        ('hybrid', lambda snapshot, i: snapshot["Hybrid"].recommend(track_names[i % len(track_names)], num_recommendations=5,
+                                                                    deadline_ms=args.deadline_ms)),
+    ]
+    latencies = {name: [] for name, _ in queries}
+    versions, errors, statuses = {}, [], {}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def serve(worker):
+        i = worker
+        while not stop.is_set():
+            snapshot = manager.current()
+            name, query = queries[i % len(queries)]
+            start = time.perf_counter()
+            try:
+                query(snapshot, i)
+            except Exception as e:
+                errors.append(f"{name}: {e!r}")
+            elapsed = 1000 * (time.perf_counter() - start)
+            with lock:
+                latencies[name].append(elapsed)
+                versions[snapshot.version] = versions.get(snapshot.version, 0) + 1
+                if name == 'hybrid' and snapshot["Hybrid"].last_report is not None:
+                    for info in snapshot["Hybrid"].last_report['components'].values():
+                        statuses[info['status']] = statuses.get(info['status'], 0) + 1
+            i += args.threads
+
+    threads = [threading.Thread(target=serve, args=(w,)) for w in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    refit = manager.refit_async()
+    second = refit.result()
+    swap_s = time.perf_counter() - start
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    del second
+    gc.collect()
+
+    print(f"Refit and swap in {swap_s:.2f} s while {args.threads} threads served queries")
+    print(f"Queries per snapshot version: {dict(sorted(versions.items()))}")
+    for name, values in latencies.items():
+        if values:
+            print(f"  {name:<10} {len(values):>5} queries, p50 {np.percentile(values, 50):7.2f} ms, "
+                  f"p99 {np.percentile(values, 99):7.2f} ms")
+    print(f"Hybrid component statuses: {dict(sorted(statuses.items()))}")
+    print(f"{len(errors)} errors" + (f", e.g. {errors[0]}" if errors else ''))
+    print(f"Active version {manager.current().version}; retired versions still held: {manager.retired() or 'none'}")
+    manager.close()
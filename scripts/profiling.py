@@ -0,0 +1,307 @@
+import collections
+import contextlib
+import tracemalloc
+import threading
+import argparse
+import cProfile
+import pstats
+import time
+import sys
+import io
+import os
+from instrumentation import metrics
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/profiles')
+PROFILE_MODES = ['cprofile', 'sample', 'tracemalloc']
+
+# Spans around which tracemalloc snapshots are taken
+FIT_SPAN_MARKERS = ('.load', '.fit', 'create_matrix')
+
+
+def _frame_label(code):
+    """`file:function:line` label used in reports and collapsed stacks."""
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+def _function_label(func):
+    """Same label format for a pstats function key (file, line, name)."""
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+class CProfileRecorder:
+    """
+    Deterministic profiling with cProfile, on every thread.
+
+    Before Python 3.12 a profiler only sees the thread that enabled it, so
+    every thread started while recording (e.g. the fit_orchestrator workers)
+    enables its own profiler; their stats are merged when written.
+    """
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.thread_profilers = []
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, frame, event, arg):
+        """`threading.setprofile` hook, run once by each new thread before its target."""
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.thread_profilers.append(profiler)
+        profiler.enable()
+
+    def start(self):
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        threading.setprofile(None)
+
+    def stats(self, stream=None):
+        """pstats.Stats of all threads."""
+        stats = pstats.Stats(self.profiler, stream=stream)
+        with self._lock:
+            profilers = list(self.thread_profilers)
+        for profiler in profilers:
+            profiler.create_stats()
+            if profiler.stats:
+                stats.add(profiler)
+        return stats
+
+    def write(self, prefix):
+        """Write the raw stats, a sorted hotspot report and collapsed stacks."""
+        report = io.StringIO()
+        stats = self.stats(stream=report)
+        stats.dump_stats(f"{prefix}.prof")
+
+        for sort_key in ('cumulative', 'tottime'):
+            report.write(f"\n=== Top 40 functions by {sort_key} time ===\n")
+            stats.sort_stats(sort_key).print_stats(40)
+        with open(f"{prefix}_hotspots.txt", 'w') as f:
+            f.write(report.getvalue())
+
+        with open(f"{prefix}_collapsed.txt", 'w') as f:
+            for stack, microseconds in sorted(self._collapse(stats.stats).items()):
+                f.write(f"{stack} {microseconds}\n")
+
+    @staticmethod
+    def _collapse(raw_stats, max_depth=64, min_microseconds=1):
+        """
+        Reconstruct flamegraph stacks from cProfile's caller/callee edges.
+
+        cProfile keeps only one level of callers, so time is split over call
+        paths in proportion to each edge's cumulative time.
+
+        Returns:
+            dict: 'root;...;leaf' -> self time in microseconds.
+        """
+        callees = collections.defaultdict(list)
+        for func, (_, _, _, _, callers) in raw_stats.items():
+            for caller in callers:
+                callees[caller].append(func)
+        roots = [func for func, entry in raw_stats.items() if not entry[4]]
+
+        stacks = collections.Counter()
+
+        def walk(func, path, share):
+            own_time = raw_stats[func][2] * share
+            if own_time * 1e6 >= min_microseconds:
+                stacks[';'.join(path)] += int(own_time * 1e6)
+            if len(path) >= max_depth:
+                return
+            for child in callees[func]:
+                if _function_label(child) in path:
+                    continue
+                child_total = raw_stats[child][3]
+                edge_total = raw_stats[child][4][func][3]
+                if child_total <= 0 or edge_total * share * 1e6 < min_microseconds:
+                    continue
+                walk(child, path + [_function_label(child)], share * edge_total / child_total)
+
+        for root in roots:
+            walk(root, [_function_label(root)], 1.0)
+        return stacks
+
+
+class SamplingRecorder:
+    """
+    Statistical profiler sampling the stacks of all threads at a fixed interval.
+
+    Samples are wall-clock: a thread waiting (e.g. the main thread on the
+    fit_orchestrator workers) is counted in its waiting frame.
+    """
+
+    def __init__(self, interval_ms=5):
+        self.interval = interval_ms / 1000
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    self.stacks[';'.join(reversed(labels))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, prefix):
+        """Write collapsed stacks and a hotspot report by self and total samples."""
+        with open(f"{prefix}_collapsed.txt", 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        total_samples = sum(self.stacks.values())
+        self_samples = collections.Counter()
+        inclusive_samples = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_samples[frames[-1]] += count
+            for label in set(frames):
+                inclusive_samples[label] += count
+
+        with open(f"{prefix}_hotspots.txt", 'w') as f:
+            f.write(f"Samples: {total_samples} at {self.interval * 1000:.1f} ms interval\n")
+            for title, counter in (('self', self_samples), ('total', inclusive_samples)):
+                f.write(f"\n=== Top 40 functions by {title} samples ===\n")
+                for label, count in counter.most_common(40):
+                    f.write(f"{count:>8} {100 * count / max(total_samples, 1):6.1f}%  {label}\n")
+
+
+class TracemallocRecorder:
+    """
+    Allocation tracing with snapshots around the fit steps.
+
+    Fit steps run concurrently (fit_orchestrator), so every thread keeps
+    its own stack of open spans.
+    """
+
+    def __init__(self, n_frames=25, top=15):
+        self.n_frames = n_frames
+        self.top = top
+        self._local = threading.local()
+        self.span_reports = []
+        self.final_snapshot = None
+
+    @property
+    def open_spans(self):
+        """Spans opened on the calling thread and not finished yet, innermost last."""
+        if not hasattr(self._local, 'spans'):
+            self._local.spans = []
+        return self._local.spans
+
+    def span_started(self, name):
+        if name.endswith(FIT_SPAN_MARKERS) or any(marker + '_' in name for marker in FIT_SPAN_MARKERS):
+            self.open_spans.append((name, tracemalloc.take_snapshot()))
+
+    def span_finished(self, name, seconds):
+        open_spans = self.open_spans
+        if not open_spans or open_spans[-1][0] != name:
+            return
+        _, before = open_spans.pop()
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        differences = after.compare_to(before, 'lineno')[:self.top]
+        self.span_reports.append((name, seconds, current, peak, differences))
+
+    def start(self):
+        tracemalloc.start(self.n_frames)
+        self._was_enabled = metrics.enabled
+        metrics.enable()
+        metrics.add_listener(self)
+
+    def stop(self):
+        metrics.remove_listener(self)
+        if not self._was_enabled:
+            metrics.disable()
+        self.final_snapshot = tracemalloc.take_snapshot()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def write(self, prefix):
+        """Write per-fit-step allocation diffs, top allocators and collapsed allocation stacks."""
+        with open(f"{prefix}_memory.txt", 'w') as f:
+            f.write(f"Peak traced memory: {self.peak / 1024**2:.1f} MB\n")
+            for name, seconds, current, peak, differences in self.span_reports:
+                f.write(f"\n=== {name} ({seconds:.2f} s, current {current / 1024**2:.1f} MB, "
+                        f"peak {peak / 1024**2:.1f} MB) ===\n")
+                for stat in differences:
+                    f.write(f"  {stat}\n")
+            f.write(f"\n=== Top {self.top} live allocations at exit ===\n")
+            for stat in self.final_snapshot.statistics('lineno')[:self.top]:
+                f.write(f"  {stat}\n")
+
+        with open(f"{prefix}_collapsed.txt", 'w') as f:
+            for stat in self.final_snapshot.statistics('traceback'):
+                stack = ';'.join(f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                                 for frame in stat.traceback)
+                f.write(f"{stack} {stat.size}\n")
+
+
+RECORDERS = {
+    'cprofile': CProfileRecorder,
+    'sample': SamplingRecorder,
+    'tracemalloc': TracemallocRecorder,
+}
+
+
+def add_profile_arguments(parser):
+    """Add the shared `--profile` options to an entry point's argument parser."""
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help="Profile the run: cprofile, sample (statistical) or tracemalloc (memory)")
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR,
+                        help="Directory for profiling reports")
+    parser.add_argument('--sample-interval', type=float, default=5.0,
+                        help="Sampling interval in milliseconds for --profile sample")
+    return parser
+
+
+def parse_profile_args(description=None):
+    """Parse the profiling options of an entry point."""
+    return add_profile_arguments(argparse.ArgumentParser(description=description)).parse_args()
+
+
+@contextlib.contextmanager
+def profile_run(name, args):
+    """
+    Profile the enclosed block when `args.profile` is set.
+
+    Reports are written to `args.profile_dir` as `<name>_<mode>_<timestamp>*`:
+    a sorted hotspot (or memory) report and flamegraph-compatible collapsed
+    stacks, usable with flamegraph.pl or speedscope.
+    """
+    mode = getattr(args, 'profile', None)
+    if mode is None:
+        yield
+        return
+
+    if mode == 'sample':
+        recorder = SamplingRecorder(interval_ms=args.sample_interval)
+    else:
+        recorder = RECORDERS[mode]()
+
+    os.makedirs(args.profile_dir, exist_ok=True)
+    prefix = os.path.join(args.profile_dir, f"{name}_{mode}_{time.strftime('%Y%m%d-%H%M%S')}")
+
+    recorder.start()
+    try:
+        yield
+    finally:
+        recorder.stop()
+        recorder.write(prefix)
+        print(f"Profiling reports written to: {prefix}_*")
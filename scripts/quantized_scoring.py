@@ -0,0 +1,169 @@
+import numpy as np
+import time
+from top_k import top_k
+
+DTYPES = ['int8', 'float16']
+
+
+class QuantizedItemFactors:
+    """
+    Reduced-precision copy of the SVD item factors for a first scoring pass.
+
+    int8 stores every item row as codes in [-127, 127] with one float32
+    scale per item; float16 stores the rows as half floats. Scoring walks
+    the items in cache-sized blocks that are widened into a float32
+    buffer, so a query reads 1 (int8) or 2 (float16) bytes per factor
+    instead of 8. The buffer is allocated per call, so concurrent queries
+    never share it. The best `shortlist` items are then re-scored with the
+    exact factors.
+    """
+
+    def __init__(self, item_factors, dtype='int8', block_size=4096):
+        """
+        Args:
+            item_factors (np.ndarray): (n_items, n_components) exact factors,
+                                       e.g. `svd_model.components_.T`.
+            dtype (str): 'int8' or 'float16'.
+            block_size (int): Items widened to float32 at a time.
+        """
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype: {dtype}. Use one of {DTYPES}.")
+        self.dtype = dtype
+        self.block_size = block_size
+        item_factors = np.asarray(item_factors)
+        self.n_items, self.n_components = item_factors.shape
+
+        if dtype == 'int8':
+            scales = np.abs(item_factors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self.codes = np.round(item_factors / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        else:
+            self.codes = np.ascontiguousarray(item_factors, dtype=np.float16)
+            self.scales = None
+
+    @property
+    def nbytes(self):
+        """Bytes held by the quantized factors."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def approximate_scores(self, query):
+        """Approximate dot product of `query` with every item, as float32."""
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(self.n_items, dtype=np.float32)
+        buffer = np.empty((min(self.block_size, self.n_items), self.n_components), dtype=np.float32)
+        for start in range(0, self.n_items, self.block_size):
+            stop = min(start + self.block_size, self.n_items)
+            block = buffer[:stop - start]
+            np.copyto(block, self.codes[start:stop], casting='unsafe')
+            np.dot(block, query, out=scores[start:stop])
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def top_k(self, query, k, exact_factors, exclude=None, shortlist=None):
+        """
+        Top-k items: approximate pass over all items, exact re-rank of a shortlist.
+
+        Args:
+            query (np.ndarray): User factors.
+            k (int): Number of items.
+            exact_factors (np.ndarray): (n_items, n_components) exact factors; only
+                                        shortlist rows are read.
+            exclude (array-like, optional): Item indices never returned.
+            shortlist (int, optional): Candidates re-ranked exactly (default: max(10 * k, 100)).
+
+        Returns:
+            np.ndarray: Item indices, best first.
+        """
+        scores = self.approximate_scores(query)
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        candidates = top_k(scores, shortlist or max(10 * k, 100))
+        exact = exact_factors[candidates] @ np.asarray(query, dtype=exact_factors.dtype)
+        return candidates[top_k(exact, k, keys=candidates)]
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return 1000 * float(np.median(timings))
+
+
+def compare_quantized(item_factors, queries, k=10, shortlists=(None,), excludes=None, repeat=3):
+    """
+    Memory, latency and recall@k of quantized scoring against the exact float64 path.
+
+    Args:
+        item_factors (np.ndarray): (n_items, n_components) exact factors.
+        queries (np.ndarray): (n_queries, n_components) user factors.
+        k (int): Cut-off.
+        shortlists (tuple): Shortlist sizes to try (None = default).
+        excludes (list, optional): Per query, item indices never returned.
+        repeat (int): Timed runs per query.
+
+    Returns:
+        list: One row per configuration.
+    """
+    excludes = excludes or [None] * len(queries)
+
+    def exact(query, exclude):
+        scores = item_factors @ query
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        return top_k(scores, k)
+
+    reference = [exact(q, e) for q, e in zip(queries, excludes)]
+    exact_ms = np.median([_median_ms(lambda: exact(q, e), repeat) for q, e in zip(queries, excludes)])
+    rows = [{'mode': 'float64 exact', 'shortlist': '-', 'memory_mb': item_factors.nbytes / 1024**2,
+             'latency_ms': exact_ms, 'recall': 1.0}]
+
+    for dtype in DTYPES:
+        quantized = QuantizedItemFactors(item_factors, dtype)
+        for shortlist in shortlists:
+            results = [quantized.top_k(q, k, item_factors, e, shortlist) for q, e in zip(queries, excludes)]
+            recall = np.mean([len(np.intersect1d(r, ref)) / max(len(ref), 1)
+                              for r, ref in zip(results, reference)])
+            latency = np.median([_median_ms(lambda: quantized.top_k(q, k, item_factors, e, shortlist), repeat)
+                                 for q, e in zip(queries, excludes)])
+            rows.append({'mode': dtype, 'shortlist': shortlist or max(10 * k, 100),
+                         'memory_mb': quantized.nbytes / 1024**2, 'latency_ms': latency, 'recall': recall})
+
+    print(f"\nSVD scoring over {item_factors.shape[0]:,} items x {item_factors.shape[1]} factors, top-{k}")
+    print(f"{'mode':<15}{'shortlist':>10}{'memory MB':>11}{'latency ms':>12}{'recall@k':>10}")
+    for row in rows:
+        print(f"{row['mode']:<15}{str(row['shortlist']):>10}{row['memory_mb']:>11.1f}"
+              f"{row['latency_ms']:>12.2f}{row['recall']:>10.3f}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare quantized SVD scoring with the exact path.")
+    parser.add_argument('--data', help="Fit SVD on this dataset instead of using synthetic factors")
+    parser.add_argument('--items', type=int, default=1_000_000, help="Synthetic items")
+    parser.add_argument('--rank', type=int, default=32, help="Synthetic factor rank")
+    parser.add_argument('--queries', type=int, default=20, help="Users queried")
+    parser.add_argument('-k', type=int, default=10, help="Cut-off")
+    args = parser.parse_args()
+
+    if args.data:
+        from collaborative_filtering import CollaborativeFiltering
+        cf = CollaborativeFiltering(args.data)
+        cf.fit_svd(n_components=args.rank)
+        factors = np.ascontiguousarray(cf.svd_model.components_.T)
+        users = np.arange(min(args.queries, len(cf.svd_factors)))
+        queries = cf.svd_factors[users]
+        excludes = [cf.user_item_matrix[u].indices for u in users]
+    else:
+        # Decaying spectrum, like real SVD factors
+        rng = np.random.default_rng(42)
+        factors = rng.standard_normal((args.items, args.rank)) / np.sqrt(np.arange(1, args.rank + 1))
+        queries = rng.standard_normal((args.queries, args.rank))
+        excludes = None
+
+    compare_quantized(factors, queries, args.k, shortlists=(args.k * 2, None, args.k * 50), excludes=excludes)
@@ -0,0 +1,321 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import diags, issparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import time
+import os
+from evaluation import score_block
+from top_k import top_k_rows
+
+DEFAULT_TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/tables')
+
+CF_METHODS = ['svd', 'user_based', 'item_based']
+
+# Per-process scoring state, set once by the pool initializer
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _fingerprint(ids):
+    """Order-sensitive hash of an id array, to detect tables built for other data."""
+    hashes = pd.util.hash_array(np.asarray(ids, dtype=object))
+    positions = np.arange(len(hashes), dtype=np.uint64)
+    return str(int(((hashes ^ (positions * np.uint64(0x9E3779B97F4A7C15))).sum())))
+
+
+def top_n(scores, n):
+    """
+    Best `n` columns of every score row, best first, ties by lower column.
+
+    Returns:
+        tuple: (int32 columns, float32 scores), both (n_rows, n); rows with
+               fewer than n finite scores are padded with -1 / -inf.
+    """
+    n_width = min(n, scores.shape[1])
+    top = top_k_rows(scores, n_width)
+    top_scores = np.take_along_axis(scores, top, axis=1).astype(np.float32)
+    top = top.astype(np.int32)
+    top[~np.isfinite(top_scores)] = -1
+
+    items = np.full((scores.shape[0], n), -1, dtype=np.int32)
+    values = np.full((scores.shape[0], n), -np.inf, dtype=np.float32)
+    items[:, :n_width], values[:, :n_width] = top, top_scores
+    return items, values
+
+
+def _table_paths(directory, method):
+    return (os.path.join(directory, f"{method}_items.npy"),
+            os.path.join(directory, f"{method}_scores.npy"))
+
+
+def _score_rows(method, rows, state):
+    """Dense scores of one block of keys (users for CF methods, tracks for content)."""
+    if method == 'content':
+        tfidf = state['tfidf']
+        scores = tfidf[rows] @ tfidf.T
+        scores = (scores.toarray() if issparse(scores) else np.asarray(scores)).astype(np.float32)
+        # Never recommend a track with the seed's name (as in ContentBasedRecommender.recommend)
+        scores[state['name_codes'][rows][:, None] == state['name_codes'][None, :]] = -np.inf
+        return scores
+
+    scores = np.asarray(score_block(method, rows, state), dtype=np.float64)
+    if method == 'item_based':
+        # Only the neighbours of rated items are candidates (as in recommend_item_based)
+        train_rows = state['train'][rows]
+        candidates = np.zeros_like(scores, dtype=bool)
+        for i in range(len(rows)):
+            rated = train_rows.indices[train_rows.indptr[i]:train_rows.indptr[i + 1]]
+            candidates[i, state['item_neighbor_indices'][rated].ravel()] = True
+        scores[~candidates] = -np.inf
+    scores[state['train'][rows].nonzero()] = -np.inf
+    return scores
+
+
+def _fill_block(method, rows, directory, n, state=None):
+    """Score one block and write its top-N rows into the memory-mapped table."""
+    state = state if state is not None else _worker_state
+    start = time.perf_counter()
+    items, scores = top_n(_score_rows(method, rows, state), n)
+
+    items_path, scores_path = _table_paths(directory, method)
+    items_table = np.load(items_path, mmap_mode='r+')
+    scores_table = np.load(scores_path, mmap_mode='r+')
+    items_table[rows] = items
+    scores_table[rows] = scores
+    items_table.flush()
+    scores_table.flush()
+    return time.perf_counter() - start
+
+
+def _cf_state(cf):
+    """Everything the CF scorers need, computed once from the fitted models."""
+    matrix = cf.user_item_matrix.tocsr()
+    state = {'train': matrix}
+    if cf.svd_model is not None:
+        state['svd_factors'] = cf.svd_factors
+        state['svd_components'] = cf.svd_model.components_
+    if cf.user_neighbors is not None:
+        # Same neighbours as recommend_user_based: 6 nearest, self dropped
+        distances, indices = cf.user_neighbors.kneighbors(matrix, n_neighbors=min(6, matrix.shape[0]))
+        state['neighbor_distances'] = distances[:, 1:]
+        state['neighbor_indices'] = indices[:, 1:]
+    if cf.item_neighbors is not None:
+        item_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+        inverse_norms = np.divide(1.0, item_norms, out=np.zeros_like(item_norms), where=item_norms > 0)
+        state['item_normalized'] = (matrix @ diags(inverse_norms)).tocsr()
+        _, indices = cf.item_neighbors.kneighbors(matrix.T, n_neighbors=min(6, matrix.shape[1]))
+        state['item_neighbor_indices'] = indices[:, 1:]
+    return state
+
+
+def _fitted_cf_methods(cf):
+    fitted = {'svd': cf.svd_model, 'user_based': cf.user_neighbors, 'item_based': cf.item_neighbors}
+    return [method for method in CF_METHODS if fitted[method] is not None]
+
+
+def _hybrid_table(content, cf, tables, n):
+    """
+    Hybrid rows from the other tables, mirroring HybridRecommender.recommend
+    without a user: the SVD, user-based and item-based picks for the first
+    user who rated the seed are interleaved, and that list is interleaved
+    with the content neighbours. Scores are reciprocal ranks.
+    """
+    from hybrid_recommender import interleave
+
+    content_ids = content.spotify_df['track_id'].to_numpy()
+    cf_ids = np.array([cf.idx_to_item[i] for i in range(len(cf.idx_to_item))], dtype=object)
+    first_rows = pd.Series(np.arange(len(content_ids)), index=content_ids)
+    first_rows = first_rows[~first_rows.index.duplicated()]
+    cf_to_content = first_rows.reindex(cf_ids).fillna(-1).to_numpy(dtype=np.int64)
+    content_to_cf = pd.Index(cf_ids).get_indexer(content_ids)
+
+    by_item = cf.user_item_matrix.tocsc()
+    by_item.sort_indices()
+    has_user = np.diff(by_item.indptr) > 0
+    first_user = np.full(by_item.shape[1], -1, dtype=np.int64)
+    first_user[has_user] = by_item.indices[by_item.indptr[:-1][has_user]]
+
+    cf_tables = [tables[method] for method in CF_METHODS if method in tables]
+    items = np.full((len(content_ids), n), -1, dtype=np.int32)
+    for track in range(len(content_ids)):
+        content_rows = tables['content'][track]
+        collaborative = []
+        cf_item = content_to_cf[track]
+        user = first_user[cf_item] if cf_item >= 0 else -1
+        if user >= 0:
+            picks = [cf_to_content[table[user][table[user] >= 0]] for table in cf_tables]
+            collaborative = interleave([p[p >= 0].tolist() for p in picks], n)
+        merged = interleave([content_rows[content_rows >= 0].tolist(), collaborative], n, exclude={track})
+        items[track, :len(merged)] = merged
+
+    scores = np.where(items >= 0, 1.0 / np.arange(1, n + 1), -np.inf).astype(np.float32)
+    return items, scores
+
+
+def build_tables(content=None, cf=None, directory=DEFAULT_TABLES_DIR, n=20, n_jobs=None, block_size=64):
+    """
+    Precompute top-N tables for every user (CF methods) and every track (content, hybrid).
+
+    Blocks of keys are scored on a process pool; each worker writes its rows
+    straight into the fixed-width on-disk tables.
+
+    Args:
+        content (ContentBasedRecommender, optional): Fitted content recommender.
+        cf (CollaborativeFiltering, optional): Fitted CF recommender; its fitted methods are tabulated.
+        directory (str): Output directory.
+        n (int): Recommendations stored per key.
+        n_jobs (int, optional): Worker processes (default: CPU count; 1 scores inline).
+        block_size (int): Keys scored per task.
+
+    Returns:
+        dict: Build time in seconds per method.
+    """
+    os.makedirs(directory, exist_ok=True)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    meta = {'n': n, 'methods': {}}
+    timings = {}
+
+    jobs = []
+    if cf is not None:
+        state = _cf_state(cf)
+        meta['users'] = _fingerprint([cf.idx_to_user[i] for i in range(len(cf.idx_to_user))])
+        meta['cf_items'] = _fingerprint([cf.idx_to_item[i] for i in range(len(cf.idx_to_item))])
+        jobs += [(method, cf.user_item_matrix.shape[0], state) for method in _fitted_cf_methods(cf)]
+    if content is not None:
+        names = content.spotify_df['track_name'].to_numpy()
+        state = {'tfidf': content.tfidf_matrix.tocsr(), 'name_codes': pd.factorize(names)[0]}
+        meta['tracks'] = _fingerprint(content.spotify_df['track_id'])
+        jobs.append(('content', len(names), state))
+
+    for method, n_keys, state in jobs:
+        print(f"Building {method} table: {n_keys:,} keys x top-{n} with {n_jobs} worker(s)...")
+        start = time.perf_counter()
+        items_path, scores_path = _table_paths(directory, method)
+        np.lib.format.open_memmap(items_path, mode='w+', dtype=np.int32, shape=(n_keys, n)).flush()
+        np.lib.format.open_memmap(scores_path, mode='w+', dtype=np.float32, shape=(n_keys, n)).flush()
+
+        blocks = [np.arange(s, min(s + block_size, n_keys)) for s in range(0, n_keys, block_size)]
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(state,)) as executor:
+                futures = [executor.submit(_fill_block, method, rows, directory, n) for rows in blocks]
+                for future in futures:
+                    future.result()
+        else:
+            for rows in blocks:
+                _fill_block(method, rows, directory, n, state)
+
+        timings[method] = time.perf_counter() - start
+        meta['methods'][method] = {'key': 'track' if method == 'content' else 'user', 'rows': n_keys}
+
+    if content is not None and cf is not None:
+        print("Building hybrid table from the content and CF tables...")
+        start = time.perf_counter()
+        loaded = {method: np.load(_table_paths(directory, method)[0], mmap_mode='r')
+                  for method in meta['methods']}
+        items, scores = _hybrid_table(content, cf, loaded, n)
+        items_path, scores_path = _table_paths(directory, 'hybrid')
+        np.save(items_path, items)
+        np.save(scores_path, scores)
+        timings['hybrid'] = time.perf_counter() - start
+        meta['methods']['hybrid'] = {'key': 'track', 'rows': len(items)}
+
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    for method, seconds in timings.items():
+        print(f"  {method:<12} {seconds:8.2f}s")
+    print(f"Tables written to: {os.path.abspath(directory)}")
+    return timings
+
+
+class RecommendationTables:
+    """
+    Read-only, memory-mapped top-N tables written by `build_tables`.
+
+    Every method has an int32 item table and a float32 score table of shape
+    (n_keys, n); a lookup is one row read from the mapped file.
+    """
+
+    def __init__(self, directory=DEFAULT_TABLES_DIR):
+        """
+        Args:
+            directory (str): Directory written by `build_tables`.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.n = self.meta['n']
+        self.methods = list(self.meta['methods'])
+        self._items = {}
+        self._scores = {}
+        for method in self.methods:
+            items_path, scores_path = _table_paths(directory, method)
+            self._items[method] = np.load(items_path, mmap_mode='r')
+            self._scores[method] = np.load(scores_path, mmap_mode='r')
+
+    @classmethod
+    def load_default(cls):
+        """Tables from the default location, or None if none were built."""
+        if not os.path.exists(os.path.join(DEFAULT_TABLES_DIR, 'meta.json')):
+            return None
+        return cls(DEFAULT_TABLES_DIR)
+
+    def matches_cf(self, cf):
+        """Whether the CF tables were built for this recommender's users and items."""
+        return ('users' in self.meta
+                and self.meta['users'] == _fingerprint([cf.idx_to_user[i] for i in range(len(cf.idx_to_user))])
+                and self.meta['cf_items'] == _fingerprint([cf.idx_to_item[i] for i in range(len(cf.idx_to_item))]))
+
+    def matches_content(self, content):
+        """Whether the track tables were built for this recommender's catalogue."""
+        return 'tracks' in self.meta and self.meta['tracks'] == _fingerprint(content.spotify_df['track_id'])
+
+    def lookup(self, method, key, n):
+        """
+        Item indices stored for `key`, best first.
+
+        Returns:
+            np.ndarray or None: Up to `n` item indices, or None when the method
+                                is not tabulated or `n` exceeds the table width.
+        """
+        if method not in self._items or n > self.n:
+            return None
+        row = np.asarray(self._items[method][key, :n])
+        return row[row >= 0]
+
+    def scores(self, method, key, n):
+        """Scores matching `lookup`."""
+        row = np.asarray(self._scores[method][key, :n])
+        return row[np.isfinite(row)]
+
+
+def main():
+    """Fit the recommenders on the default dataset and build all tables."""
+    import argparse
+    from basic_recommender import ContentBasedRecommender
+    from collaborative_filtering import CollaborativeFiltering
+
+    parser = argparse.ArgumentParser(description="Precompute top-N recommendation tables.")
+    parser.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    parser.add_argument('--output', default=DEFAULT_TABLES_DIR, help="Output directory")
+    parser.add_argument('-n', type=int, default=20, help="Recommendations per key")
+    parser.add_argument('--jobs', type=int, help="Worker processes")
+    args = parser.parse_args()
+
+    content = ContentBasedRecommender(args.data)
+    content.fit()
+    cf = CollaborativeFiltering(args.data)
+    cf.fit_svd(n_components=20)
+    cf.fit_user_based_cf(n_neighbors=10)
+    cf.fit_item_based_cf(n_neighbors=10)
+
+    build_tables(content, cf, args.output, n=args.n, n_jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
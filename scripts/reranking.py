@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+from scipy.sparse import issparse
+from instrumentation import timed
+
+
+def primary_entity(values, separator=None):
+    """First artist (';'-separated) or first genre (space-separated) of every value."""
+    return pd.Series(values, dtype=object).fillna('').str.split(separator).str[0].fillna('').to_numpy()
+
+
+def pairwise_similarity(features):
+    """Dense pool x pool similarity of L2-normalised feature rows."""
+    similarity = features @ features.T
+    return np.asarray(similarity.todense() if issparse(similarity) else similarity, dtype=np.float64)
+
+
+def intra_list_similarity(features):
+    """Mean pairwise similarity of a recommendation list (lower is more diverse)."""
+    if features.shape[0] < 2:
+        return 0.0
+    similarity = pairwise_similarity(features)
+    n = similarity.shape[0]
+    return float((similarity.sum() - np.trace(similarity)) / (n * (n - 1)))
+
+
+class DiversityReranker:
+    """
+    Greedy diversity re-ranking of a candidate pool.
+
+    Maximal marginal relevance picks, at every step, the candidate with the
+    best lambda * relevance - (1 - lambda) * (max similarity to the picks so
+    far). Per-artist and per-genre caps remove a group from the pool once it
+    has filled its quota. The pool similarity matrix is computed once, and
+    every step is a vector update, so a top-N list costs O(pool x N).
+    """
+
+    def __init__(self, lambda_=0.7, max_per_artist=None, max_per_genre=None, pool_size=200):
+        """
+        Args:
+            lambda_ (float): Relevance weight; 1 keeps the relevance order (caps still apply).
+            max_per_artist (int, optional): Most picks sharing a primary artist.
+            max_per_genre (int, optional): Most picks sharing a primary genre.
+            pool_size (int): Candidates recommenders should hand to `rerank`.
+        """
+        self.lambda_ = lambda_
+        self.max_per_artist = max_per_artist
+        self.max_per_genre = max_per_genre
+        self.pool_size = pool_size
+
+    @timed('rerank.diversify')
+    def rerank(self, relevance, n, features=None, artists=None, genres=None):
+        """
+        Choose `n` candidates from the pool.
+
+        Args:
+            relevance (array-like): Relevance of every pool candidate (higher is better).
+            n (int): Number of candidates to pick.
+            features (optional): L2-normalised feature rows of the pool for MMR.
+            artists (array-like, optional): Artists value of every candidate, for the artist cap.
+            genres (array-like, optional): Genre value of every candidate, for the genre cap.
+
+        Returns:
+            np.ndarray: Pool positions of the picks, in pick order.
+        """
+        relevance = np.asarray(relevance, dtype=np.float64)
+        pool = len(relevance)
+        n = min(n, pool)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Bring relevance to [0, 1] so lambda trades off against cosine similarity
+        finite = np.isfinite(relevance)
+        low, high = relevance[finite].min(initial=0.0), relevance[finite].max(initial=0.0)
+        relevance = np.where(finite, (relevance - low) / (high - low) if high > low else 1.0, -np.inf)
+
+        use_mmr = features is not None and self.lambda_ < 1
+        similarity = pairwise_similarity(features) if use_mmr else None
+        max_similarity = np.zeros(pool)
+
+        caps = []
+        if artists is not None and self.max_per_artist:
+            caps.append((pd.factorize(primary_entity(artists, ';'))[0], self.max_per_artist))
+        if genres is not None and self.max_per_genre:
+            caps.append((pd.factorize(primary_entity(genres))[0], self.max_per_genre))
+        counts = [np.zeros(codes.max() + 1, dtype=np.int64) for codes, _ in caps]
+
+        available = finite.copy()
+        picks = []
+        for _ in range(n):
+            if not available.any():
+                break
+            if use_mmr:
+                score = self.lambda_ * relevance - (1 - self.lambda_) * max_similarity
+            else:
+                score = relevance.copy()
+            score[~available] = -np.inf
+            pick = int(np.argmax(score))
+            picks.append(pick)
+            available[pick] = False
+
+            if use_mmr:
+                np.maximum(max_similarity, similarity[pick], out=max_similarity)
+            for (codes, cap), count in zip(caps, counts):
+                group = codes[pick]
+                count[group] += 1
+                if count[group] >= cap:
+                    available &= codes != group
+
+        return np.asarray(picks, dtype=np.int64)
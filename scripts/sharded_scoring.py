@@ -0,0 +1,318 @@
+import numpy as np
+from scipy.sparse import csr_matrix, issparse, vstack
+from concurrent.futures import ProcessPoolExecutor
+import tempfile
+import shutil
+import json
+import time
+import os
+from top_k import top_k_rows
+
+# Per-process shard, set once by the pool initializer
+_shard = None
+
+
+def _block_prefix(directory, block):
+    return os.path.join(directory, f"block_{block:04d}")
+
+
+def write_item_blocks(matrix, directory=None, n_blocks=16):
+    """
+    Split item rows into contiguous blocks stored as .npy files.
+
+    Args:
+        matrix (np.ndarray or scipy.sparse matrix): One row per item, e.g. SVD item
+                                                    factors or L2-normalised TF-IDF rows.
+        directory (str, optional): Destination (default: a new temporary directory).
+        n_blocks (int): Number of blocks; shards are formed from whole blocks.
+
+    Returns:
+        str: The directory.
+    """
+    directory = directory or tempfile.mkdtemp(prefix='item_blocks_')
+    os.makedirs(directory, exist_ok=True)
+    n_items = matrix.shape[0]
+    offsets = np.linspace(0, n_items, max(1, min(n_blocks, n_items)) + 1).astype(np.int64)
+    kind = 'sparse' if issparse(matrix) else 'dense'
+    if kind == 'sparse':
+        matrix = csr_matrix(matrix)
+
+    for block, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+        _save_block(directory, block, matrix[start:stop], kind)
+
+    _write_meta(directory, kind, offsets, matrix.shape[1])
+    return directory
+
+
+def _save_block(directory, block, rows, kind):
+    prefix = _block_prefix(directory, block)
+    if kind == 'sparse':
+        np.save(prefix + '_data.npy', rows.data)
+        np.save(prefix + '_indices.npy', rows.indices)
+        np.save(prefix + '_indptr.npy', rows.indptr)
+    else:
+        np.save(prefix + '.npy', np.ascontiguousarray(rows))
+
+
+def _write_meta(directory, kind, offsets, n_features):
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'kind': kind, 'offsets': [int(o) for o in offsets], 'n_features': int(n_features)}, f)
+
+
+def _read_meta(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        return json.load(f)
+
+
+def _load_block(directory, meta, block):
+    prefix = _block_prefix(directory, block)
+    if meta['kind'] == 'sparse':
+        n_rows = meta['offsets'][block + 1] - meta['offsets'][block]
+        return csr_matrix((np.load(prefix + '_data.npy'), np.load(prefix + '_indices.npy'),
+                           np.load(prefix + '_indptr.npy')), shape=(n_rows, meta['n_features']))
+    return np.load(prefix + '.npy')
+
+
+def _init_shard(directory, blocks):
+    """Load the blocks owned by this worker."""
+    global _shard
+    meta = _read_meta(directory)
+    parts = [_load_block(directory, meta, block) for block in blocks]
+    matrix = vstack(parts, format='csr') if meta['kind'] == 'sparse' else np.concatenate(parts)
+    _shard = {'matrix': matrix, 'offset': meta['offsets'][blocks[0]]}
+
+
+def local_top_k(matrix, offset, queries, k, exclude=None):
+    """
+    Top-k items of one shard for a batch of queries, by dot product.
+
+    Args:
+        matrix: Shard rows (dense array or CSR).
+        offset (int): Global index of the shard's first row.
+        queries: (n_queries, n_features) query vectors.
+        k (int): Number of items per query.
+        exclude (list, optional): Per query, global item indices never returned.
+
+    Returns:
+        tuple: (global item indices, scores), both (n_queries, min(k, n_rows)).
+    """
+    scores = queries @ matrix.T
+    scores = scores.toarray() if issparse(scores) else np.asarray(scores)
+    scores = scores.astype(np.float32, copy=False)
+
+    if exclude is not None:
+        for row, items in enumerate(exclude):
+            local = np.asarray(items, dtype=np.int64) - offset
+            local = local[(local >= 0) & (local < matrix.shape[0])]
+            scores[row, local] = -np.inf
+
+    # Ties are broken by the lower index within the shard, so merge_top_k can
+    # break them by the lower global index
+    top = top_k_rows(scores, k)
+    return top + offset, np.take_along_axis(scores, top, axis=1)
+
+
+def _shard_top_k(queries, k, exclude):
+    return local_top_k(_shard['matrix'], _shard['offset'], queries, k, exclude)
+
+
+def merge_top_k(parts, k):
+    """
+    Exact global top-k from per-shard top-k lists.
+
+    Ties are broken by the lower item index, so the result does not depend on
+    the number of shards.
+    """
+    indices = np.hstack([part[0] for part in parts])
+    scores = np.hstack([part[1] for part in parts])
+    order = np.lexsort((indices, -scores), axis=1)[:, :k]
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class ShardedScorer:
+    """
+    Scatter-gather top-k over item rows partitioned across worker processes.
+
+    Every shard is a contiguous range of items held by its own single-process
+    pool, so each worker loads only its slice once and answers queries with
+    a local top-k. The coordinator merges the N * k candidates exactly.
+    """
+
+    def __init__(self, directory, n_shards, owns_directory=False):
+        """
+        Args:
+            directory (str): Blocks written by `write_item_blocks`.
+            n_shards (int): Number of shards/worker processes (at most the number of blocks).
+            owns_directory (bool): Remove the directory on `close()`.
+        """
+        self.directory = directory
+        self.owns_directory = owns_directory
+        meta = _read_meta(directory)
+        self.n_items = meta['offsets'][-1]
+        n_blocks = len(meta['offsets']) - 1
+        self.n_shards = max(1, min(n_shards, n_blocks))
+
+        self.shard_blocks = [blocks.tolist() for blocks in np.array_split(np.arange(n_blocks), self.n_shards)]
+        self.executors = [ProcessPoolExecutor(max_workers=1, initializer=_init_shard,
+                                              initargs=(directory, blocks))
+                          for blocks in self.shard_blocks]
+
+    @classmethod
+    def from_matrix(cls, matrix, n_shards):
+        """Shard an in-memory item matrix through a temporary block directory."""
+        directory = write_item_blocks(matrix, n_blocks=n_shards)
+        return cls(directory, n_shards, owns_directory=True)
+
+    def top_k(self, queries, k, exclude=None):
+        """
+        Exact top-k items for a batch of queries.
+
+        Args:
+            queries: (n_queries, n_features) dense array or sparse matrix; a 1D
+                     array is treated as a single query.
+            k (int): Number of items per query.
+            exclude (list, optional): Per query, global item indices never returned.
+
+        Returns:
+            tuple: (item indices, scores), both (n_queries, k); excluded items
+                   only appear, with score -inf, when fewer than k remain.
+        """
+        if not issparse(queries):
+            queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        futures = [executor.submit(_shard_top_k, queries, k, exclude) for executor in self.executors]
+        return merge_top_k([future.result() for future in futures], k)
+
+    def close(self):
+        """Stop the workers (and remove the blocks if owned)."""
+        for executor in self.executors:
+            executor.shutdown()
+        self.executors = []
+        if self.owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_synthetic_blocks(directory, n_items, kind='dense', n_features=64, n_blocks=16,
+                           nnz_per_row=4, seed=42):
+    """
+    Write a synthetic item catalogue block by block, so 10M items never sit in memory at once.
+
+    Dense catalogues look like SVD item factors; sparse ones like L2-normalised
+    TF-IDF rows with a few genre/artist terms each.
+
+    Returns:
+        str: The directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    offsets = np.linspace(0, n_items, n_blocks + 1).astype(np.int64)
+    for block, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+        rng = np.random.default_rng([seed, block])
+        n = stop - start
+        if kind == 'sparse':
+            columns = (rng.zipf(1.3, (n, nnz_per_row)) - 1) % n_features
+            values = rng.random((n, nnz_per_row), dtype=np.float32)
+            values /= np.linalg.norm(values, axis=1, keepdims=True)
+            rows = csr_matrix((values.ravel(), columns.ravel(), np.arange(0, n * nnz_per_row + 1, nnz_per_row)),
+                              shape=(n, n_features))
+            rows.sum_duplicates()
+            _save_block(directory, block, rows, kind)
+        else:
+            _save_block(directory, block, rng.standard_normal((n, n_features), dtype=np.float32), kind)
+    _write_meta(directory, kind, offsets, n_features)
+    return directory
+
+
+def benchmark_sharding(n_items=1_000_000, kind='dense', n_features=64, shard_counts=None,
+                       k=10, n_queries=20, batch_size=32, n_blocks=16, work_dir=None):
+    """
+    Measure single-query latency and batched throughput from 1 to N shards.
+
+    Args:
+        n_items (int): Synthetic catalogue size.
+        kind (str): 'dense' (SVD factors) or 'sparse' (TF-IDF rows).
+        n_features (int): Factor rank or vocabulary size.
+        shard_counts (list, optional): Shard counts to compare (default: 1, 2, 4, ... up to the cores).
+        k (int): Items per query.
+        n_queries (int): Single queries timed per configuration.
+        batch_size (int): Queries per batched request for throughput.
+        n_blocks (int): Blocks the catalogue is stored in.
+        work_dir (str, optional): Block directory, kept for reuse (default: temporary).
+
+    Returns:
+        list: One result row per shard count.
+    """
+    cores = os.cpu_count() or 1
+    if shard_counts is None:
+        shard_counts = sorted({min(2 ** i, n_blocks) for i in range(int(np.log2(max(cores, 1))) + 1)} | {min(cores, n_blocks)})
+
+    temporary = work_dir is None
+    directory = work_dir or tempfile.mkdtemp(prefix='sharded_benchmark_')
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        print(f"Writing {n_items:,} synthetic {kind} items to: {directory}")
+        write_synthetic_blocks(directory, n_items, kind, n_features, n_blocks)
+
+    rng = np.random.default_rng(0)
+    if kind == 'sparse':
+        queries = csr_matrix(rng.random((batch_size, n_features), dtype=np.float32)
+                             * (rng.random((batch_size, n_features)) < 0.05))
+    else:
+        queries = rng.standard_normal((batch_size, n_features), dtype=np.float32)
+
+    rows = []
+    reference = None
+    try:
+        for n_shards in shard_counts:
+            with ShardedScorer(directory, n_shards) as scorer:
+                scorer.top_k(queries[:1], k)  # start workers and load shards
+
+                latencies = []
+                for i in range(n_queries):
+                    start = time.perf_counter()
+                    scorer.top_k(queries[i % batch_size:i % batch_size + 1], k)
+                    latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                indices, _ = scorer.top_k(queries, k)
+                batch_time = time.perf_counter() - start
+
+            if reference is None:
+                reference = indices
+            rows.append({
+                'shards': scorer.n_shards,
+                'p50_ms': 1000 * float(np.median(latencies)),
+                'p95_ms': 1000 * float(np.percentile(latencies, 95)),
+                'queries_per_s': batch_size / batch_time,
+                'exact': bool(np.array_equal(indices, reference)),
+            })
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    base = rows[0]['p50_ms']
+    print(f"\nSharded top-{k} over {n_items:,} {kind} items ({cores} cores)")
+    print(f"{'shards':>6}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>9}{'queries/s':>12}{'exact':>7}")
+    for row in rows:
+        print(f"{row['shards']:>6}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{base / row['p50_ms']:>8.2f}x"
+              f"{row['queries_per_s']:>12.1f}{str(row['exact']):>7}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark sharded scatter-gather top-k scoring.")
+    parser.add_argument('--items', type=int, default=1_000_000, help="Synthetic catalogue size")
+    parser.add_argument('--kind', choices=['dense', 'sparse'], default='dense',
+                        help="Item factors (dense) or TF-IDF rows (sparse)")
+    parser.add_argument('--features', type=int, help="Factor rank or vocabulary size (default: 64 / 5000)")
+    parser.add_argument('--shards', type=int, nargs='+', help="Shard counts to compare")
+    parser.add_argument('--work-dir', help="Keep the synthetic blocks here for reuse")
+    args = parser.parse_args()
+
+    n_features = args.features or (64 if args.kind == 'dense' else 5000)
+    benchmark_sharding(args.items, args.kind, n_features, args.shards, work_dir=args.work_dir)
@@ -0,0 +1,396 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import sqlite3
+import json
+import time
+import os
+from instrumentation import span, increment
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../results/spotify_cache.sqlite')
+
+# Seconds a cached answer stays fresh, per kind of lookup
+DEFAULT_TTLS = {
+    'artist': 30 * 86400,      # artist name -> artist object (with genres)
+    'top_tracks': 7 * 86400,   # artist id -> top tracks
+    'uri': 30 * 86400,         # track name -> track URI
+    'track': 90 * 86400,       # track id -> track object
+}
+# "Not on Spotify" answers are cached too, but retried sooner
+MISSING_TTL = 86400
+
+# Ids per call of the bulk endpoints (GET /tracks, GET /artists)
+BULK_SIZE = 50
+
+
+def _key(name):
+    return str(name).strip().casefold()
+
+
+class SpotifyCache:
+    """
+    Persistent cache of Spotify lookups in one SQLite file.
+
+    Every answer is stored as JSON under (kind, key) with the time it was
+    fetched, and is fresh for the kind's TTL. A None answer records that
+    Spotify had nothing for the key. The connection is shared by threads
+    behind a lock; WAL mode lets the UI read while a prefetch writes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None):
+        """
+        Args:
+            path (str): SQLite file; created with its directory if missing.
+            ttls (dict, optional): Seconds per kind, overriding DEFAULT_TTLS.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS entries (kind TEXT NOT NULL, key TEXT NOT NULL, "
+                                     "value TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (kind, key))")
+
+    def _fresh(self, kind, value, fetched_at, now):
+        ttl = self.ttls[kind] if value is not None else min(self.ttls[kind], MISSING_TTL)
+        return now - fetched_at < ttl
+
+    def get_many(self, kind, keys, now=None):
+        """
+        Fresh cached answers.
+
+        Returns:
+            dict: Answer by key, None for keys Spotify had nothing for;
+                  missing and expired keys are left out.
+        """
+        now = time.time() if now is None else now
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, value, fetched_at FROM entries WHERE kind = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [kind, *chunk]).fetchall()
+                for key, value, fetched_at in rows:
+                    if self._fresh(kind, value, fetched_at, now):
+                        found[key] = None if value is None else json.loads(value)
+        return found
+
+    def lookup(self, kind, key):
+        """
+        Returns:
+            tuple: (whether a fresh answer is cached, the answer)
+        """
+        found = self.get_many(kind, [key])
+        return key in found, found.get(key)
+
+    def put_many(self, kind, answers, now=None):
+        """Store answers (dict key -> JSON-serialisable value or None)."""
+        now = time.time() if now is None else now
+        rows = [(kind, key, None if value is None else json.dumps(value), now) for key, value in answers.items()]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows)
+
+    def put(self, kind, key, value):
+        self.put_many(kind, {key: value})
+
+    def purge_expired(self, now=None):
+        """Delete expired entries; returns how many were removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock, self._connection:
+            for kind, ttl in self.ttls.items():
+                cursor = self._connection.execute(
+                    "DELETE FROM entries WHERE kind = ? AND fetched_at <= ? - (CASE WHEN value IS NULL THEN ? ELSE ? END)",
+                    (kind, now, min(ttl, MISSING_TTL), ttl))
+                removed += cursor.rowcount
+        return removed
+
+    def stats(self, now=None):
+        """Entries per kind: {'kind': {'entries', 'fresh', 'missing'}}."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._connection.execute("SELECT kind, value IS NULL, fetched_at FROM entries").fetchall()
+        stats = {}
+        for kind, is_missing, fetched_at in rows:
+            entry = stats.setdefault(kind, {'entries': 0, 'fresh': 0, 'missing': 0})
+            entry['entries'] += 1
+            entry['missing'] += int(is_missing)
+            if kind in self.ttls and self._fresh(kind, None if is_missing else True, fetched_at, now):
+                entry['fresh'] += 1
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CachedSpotify:
+    """
+    Read-through Spotify client for the lookups the app repeats.
+
+    Each lookup answers from the cache when it can and otherwise calls the
+    wrapped spotipy client and stores the answer. Anything else (playback,
+    current_user) is passed straight to the client.
+    """
+
+    def __init__(self, client, cache):
+        """
+        Args:
+            client (spotipy.Spotify): Authenticated client.
+            cache (SpotifyCache): Where answers are kept.
+        """
+        self.client = client
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _cached(self, kind, key):
+        found, value = self.cache.lookup(kind, key)
+        increment(f'spotify_cache.{kind}.{"hit" if found else "miss"}')
+        return found, value
+
+    def _store_tracks(self, tracks):
+        """Keep track objects and the name -> URI answers they give for free."""
+        tracks = [track for track in tracks if track]
+        self.cache.put_many('track', {track['id']: track for track in tracks})
+        self.cache.put_many('uri', {_key(track['name']): track['uri'] for track in tracks})
+
+    def search_artist(self, query):
+        """The best-matching artist object for a name, or None."""
+        found, artist = self._cached('artist', _key(query))
+        if found:
+            return artist
+        with span('spotify.search_artist'):
+            items = self.client.search(q=f"artist:{query}", type='artist', limit=1)['artists']['items']
+        artist = items[0] if items else None
+        answers = {_key(query): artist}
+        if artist is not None:
+            answers[_key(artist['name'])] = artist
+        self.cache.put_many('artist', answers)
+        return artist
+
+    def artist_top_tracks(self, artist_id):
+        """An artist's top track objects."""
+        found, tracks = self._cached('top_tracks', artist_id)
+        if found:
+            return tracks or []
+        with span('spotify.artist_top_tracks'):
+            tracks = self.client.artist_top_tracks(artist_id)['tracks']
+        self.cache.put('top_tracks', artist_id, tracks)
+        self._store_tracks(tracks)
+        return tracks
+
+    def track_uri(self, name):
+        """URI of the best-matching track for a name, or None."""
+        found, uri = self._cached('uri', _key(name))
+        if found:
+            return uri
+        with span('spotify.search_track'):
+            items = self.client.search(q=name, type='track', limit=1)['tracks']['items']
+        uri = items[0]['uri'] if items else None
+        self.cache.put('uri', _key(name), uri)
+        return uri
+
+    def tracks(self, track_ids):
+        """
+        Track objects by id, fetching the uncached ones in bulk.
+
+        Returns:
+            dict: Track object (None if unknown to Spotify) by id.
+        """
+        found = self.cache.get_many('track', track_ids)
+        increment('spotify_cache.track.hit', len(found))
+        missing = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in found]
+        for start in range(0, len(missing), BULK_SIZE):
+            batch = missing[start:start + BULK_SIZE]
+            increment('spotify_cache.track.miss', len(batch))
+            with span('spotify.tracks'):
+                fetched = self.client.tracks(batch)['tracks']
+            self._store_tracks(fetched)
+            answers = dict(zip(batch, fetched))
+            self.cache.put_many('track', {track_id: None for track_id, track in answers.items() if not track})
+            found.update(answers)
+        return found
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads: on average `rate` calls per second,
+    with bursts of up to `burst` calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def pooled_client(workers=4, api_url=None, retries=5):
+    """
+    A spotipy client whose HTTP connections are pooled for `workers` threads.
+
+    429 and 5xx responses are retried with backoff, honouring Retry-After.
+
+    Args:
+        workers (int): Connections kept open.
+        api_url (str, optional): API base URL of a local stand-in (see fake_spotify.py);
+                                 its token is not checked. Default: the real API with
+                                 client credentials from SPOTIPY_CLIENT_ID/SECRET.
+        retries (int): Retries per call.
+    """
+    import requests
+    import spotipy
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(total=retries, connect=retries, read=False, status=retries, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(['GET']),
+                  respect_retry_after_header=True)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if api_url:
+        client = spotipy.Spotify(auth='local', requests_session=session)
+        client.prefix = api_url.rstrip('/') + '/'
+        return client
+    from spotipy.oauth2 import SpotifyClientCredentials
+    return spotipy.Spotify(client_credentials_manager=SpotifyClientCredentials(),
+                           requests_session=session)
+
+
+def prefetch(client, cache, track_ids, workers=4, rate=10.0, top_tracks=False, verbose=True):
+    """
+    Warm the cache for a catalogue.
+
+    Fetches, in bulk calls of 50, every track not freshly cached (which
+    also caches name -> URI), then the artists of those tracks (for artist
+    search and genres), and optionally every artist's top tracks. Calls run
+    on `workers` threads and share one rate limit.
+
+    Args:
+        client (spotipy.Spotify): Client, e.g. from `pooled_client`.
+        cache (SpotifyCache): Cache to fill.
+        track_ids (list): Spotify track ids, e.g. the dataset's `track_id` column.
+        workers (int): Concurrent calls.
+        rate (float): Calls per second across all workers.
+        top_tracks (bool): Also fetch each artist's top tracks (one call per artist).
+
+    Returns:
+        dict: Calls made and answers stored per kind, and elapsed seconds.
+    """
+    limiter = RateLimiter(rate)
+    cached = CachedSpotify(client, cache)
+    report = {'calls': 0, 'tracks': 0, 'artists': 0, 'top_tracks': 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def call(func, *args):
+        limiter.acquire()
+        with lock:
+            report['calls'] += 1
+        return func(*args)
+
+    def fetch_tracks(batch):
+        tracks = call(client.tracks, batch)['tracks']
+        cached._store_tracks(tracks)
+        cache.put_many('track', {track_id: None for track_id, track in zip(batch, tracks) if not track})
+        return len(batch)
+
+    def fetch_artists(batch):
+        artists = [artist for artist in call(client.artists, batch)['artists'] if artist]
+        cache.put_many('artist', {_key(artist['name']): artist for artist in artists})
+        return len(batch)
+
+    def fetch_top_tracks(artist_id):
+        tracks = call(client.artist_top_tracks, artist_id)['tracks']
+        cache.put('top_tracks', artist_id, tracks)
+        cached._store_tracks(tracks)
+        return 1
+
+    def run(label, func, jobs):
+        with span(f'spotify_cache.prefetch.{label}'), ThreadPoolExecutor(max_workers=workers) as pool:
+            report[label] += sum(pool.map(func, jobs))
+        if verbose:
+            print(f"  {label}: {report[label]:,} fetched, {report['calls']:,} calls so far, "
+                  f"{time.perf_counter() - start:.1f} s")
+
+    track_ids = list(dict.fromkeys(track_ids))
+    known = cache.get_many('track', track_ids)
+    missing = [track_id for track_id in track_ids if track_id not in known]
+    if verbose:
+        print(f"Prefetching {len(missing):,} of {len(track_ids):,} tracks ({len(known):,} fresh in cache)")
+    run('tracks', fetch_tracks, [missing[i:i + BULK_SIZE] for i in range(0, len(missing), BULK_SIZE)])
+
+    tracks = [track for track in cache.get_many('track', track_ids).values() if track]
+    artist_names = {artist['id']: artist['name'] for track in tracks for artist in track['artists']}
+    fresh_artists = cache.get_many('artist', [_key(name) for name in artist_names.values()])
+    artist_ids = [artist_id for artist_id, name in artist_names.items() if _key(name) not in fresh_artists]
+    run('artists', fetch_artists, [artist_ids[i:i + BULK_SIZE] for i in range(0, len(artist_ids), BULK_SIZE)])
+
+    if top_tracks:
+        fresh_top = cache.get_many('top_tracks', list(artist_names))
+        run('top_tracks', fetch_top_tracks, [artist_id for artist_id in artist_names if artist_id not in fresh_top])
+
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Spotify metadata cache.")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="SQLite cache file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    warm = commands.add_parser('prefetch', help="Warm the cache for every track in the dataset")
+    warm.add_argument('--data', help="Dataset CSV (default: auto-detect)")
+    warm.add_argument('--workers', type=int, default=4, help="Concurrent API calls")
+    warm.add_argument('--rate', type=float, default=10.0, help="API calls per second")
+    warm.add_argument('--top-tracks', action='store_true', help="Also fetch every artist's top tracks")
+    warm.add_argument('--api-url', help="API base URL of a local stand-in, e.g. http://127.0.0.1:8765/v1/")
+    commands.add_parser('stats', help="Entries per kind")
+    commands.add_parser('purge', help="Delete expired entries")
+    args = parser.parse_args()
+
+    cache = SpotifyCache(args.cache)
+    if args.command == 'prefetch':
+        import pandas as pd
+        from dotenv import load_dotenv
+        from basic_recommender import ContentBasedRecommender
+
+        load_dotenv()
+        data_path = args.data or ContentBasedRecommender._find_dataset(None)
+        track_ids = pd.read_csv(data_path, usecols=['track_id'])['track_id'].dropna().unique().tolist()
+        client = pooled_client(args.workers, args.api_url)
+        report = prefetch(client, cache, track_ids, args.workers, args.rate, args.top_tracks)
+        print(f"Done: {report['calls']:,} calls in {report['seconds']:.1f} s")
+    elif args.command == 'purge':
+        print(f"Removed {cache.purge_expired():,} expired entries")
+    for kind, entry in sorted(cache.stats().items()):
+        print(f"{kind:<12}{entry['entries']:>10,} entries{entry['fresh']:>10,} fresh{entry['missing']:>8,} missing")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
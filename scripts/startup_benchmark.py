@@ -0,0 +1,123 @@
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SCRIPT_DIR, '../results/startup.json')
+
+ENTRY_POINTS = ['front', 'eda', 'streaming_eda', 'basic_recommender', 'collaborative_filtering',
+                'hybrid_recommender', 'evaluation', 'benchmark', 'recommendation_tables',
+                'event_ingestion', 'sharded_scoring']
+
+# Dependencies that should only load when the code path needing them runs
+HEAVY_MODULES = ['sklearn', 'matplotlib', 'seaborn', 'customtkinter', 'spotipy', 'scipy', 'pandas']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'wall_s': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _parse_importtime(stderr):
+    """Cumulative import time in microseconds per module from `-X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|').split('|')]
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure_import(module, repeat=5):
+    """
+    Import `module` in `repeat` fresh interpreters.
+
+    Returns:
+        dict: Median wall time, heavy modules loaded, and the slowest top-level
+              dependencies by cumulative import time, or the error if the
+              import failed.
+    """
+    walls, runs = [], []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                 _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=SCRIPT_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        walls.append(probe['wall_s'])
+        runs.append((probe, _parse_importtime(result.stderr)))
+
+    walls.sort()
+    median = walls[len(walls) // 2]
+    probe, times = runs[0]
+    top_level = {name: cumulative for name, (_, cumulative) in times.items() if '.' not in name and name != module}
+    slowest = sorted(top_level.items(), key=lambda item: -item[1])[:5]
+    return {
+        'wall_s': median,
+        'min_s': walls[0],
+        'heavy_modules': probe['heavy'],
+        'slowest_dependencies': {name: us / 1e6 for name, us in slowest},
+    }
+
+
+def run(modules=None, repeat=5):
+    """Measure every entry point and print a table."""
+    modules = modules or ENTRY_POINTS
+    report = {'python': sys.version.split()[0], 'repeat': repeat, 'modules': {}}
+    print(f"Import time per entry point (median of {repeat} fresh interpreters)")
+    print(f"{'module':<26}{'median s':>10}{'min s':>8}  heavy dependencies loaded")
+    for module in modules:
+        result = measure_import(module, repeat)
+        report['modules'][module] = result
+        if 'error' in result:
+            print(f"{module:<26}{'-':>10}{'-':>8}  import failed: {result['error']}")
+        else:
+            print(f"{module:<26}{result['wall_s']:>10.3f}{result['min_s']:>8.3f}  "
+                  f"{', '.join(result['heavy_modules']) or '-'}")
+    return report
+
+
+def compare(report, baseline, threshold=0.2):
+    """Print entry points whose import got slower than the baseline by more than `threshold`."""
+    print(f"\nCompared with baseline ({threshold:.0%} threshold):")
+    regressions = 0
+    for module, result in report['modules'].items():
+        before = baseline.get('modules', {}).get(module)
+        if not before or 'wall_s' not in before or 'wall_s' not in result:
+            continue
+        change = result['wall_s'] / before['wall_s'] - 1 if before['wall_s'] else 0.0
+        flag = 'REGRESSION' if change > threshold else ''
+        regressions += bool(flag)
+        print(f"  {module:<26}{before['wall_s']:>8.3f} -> {result['wall_s']:>8.3f}  {change:+.0%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible import-time benchmark of the entry points.")
+    parser.add_argument('modules', nargs='*', help=f"Modules to measure (default: {', '.join(ENTRY_POINTS)})")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the JSON report")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run(args.modules, args.repeat)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to: {os.path.abspath(args.output)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
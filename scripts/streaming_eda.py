@@ -0,0 +1,646 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+from eda import SpotifyEDA
+from instrumentation import span
+
+AUDIO_FEATURES = ['danceability', 'energy', 'key', 'loudness', 'mode',
+                  'speechiness', 'acousticness', 'instrumentalness',
+                  'liveness', 'valence', 'tempo']
+
+# (column, threshold) pairs counted for the summary report
+THRESHOLD_COUNTS = {
+    'high_energy': ('energy', 0.8),
+    'high_danceability': ('danceability', 0.8),
+    'acoustic': ('acousticness', 0.8),
+    'high_popularity': ('popularity', 70),
+    'long_tracks': ('duration_ms', 5 * 60 * 1000),
+}
+
+
+class MomentsAccumulator:
+    """Count, mean, variance (Welford/Chan), min and max of one numeric column."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        other = MomentsAccumulator()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        """Sample standard deviation, as pandas reports it."""
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+
+class CoMomentAccumulator:
+    """Mergeable co-moment matrix for a fixed set of columns, giving the correlation matrix."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = 0
+        self.mean = np.zeros(len(self.columns))
+        self.comoment = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, frame):
+        values = frame[self.columns].dropna().to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            return self
+        other = CoMomentAccumulator(self.columns)
+        other.count = len(values)
+        other.mean = values.mean(axis=0)
+        centered = values - other.mean
+        other.comoment = centered.T @ centered
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment += other.comoment + np.outer(delta, delta) * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        return self
+
+    def correlation(self):
+        """Pearson correlation matrix as a DataFrame."""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantiles from weighted centroids.
+
+    Centroids are compressed into `compression` equal-weight buckets, so the
+    rank error stays around 1/compression while memory stays constant.
+    """
+
+    def __init__(self, compression=2000):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self._absorb(values.astype(np.float64), np.ones(len(values)))
+
+    def merge(self, other):
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self._absorb(other.means, other.weights)
+
+    def _absorb(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        if len(means) > self.compression:
+            cumulative = np.cumsum(weights) - weights / 2
+            buckets = np.floor(cumulative / weights.sum() * self.compression).astype(np.int64)
+            bucket_weights = np.bincount(buckets, weights)
+            keep = bucket_weights > 0
+            means = (np.bincount(buckets, weights * means)[keep] / bucket_weights[keep])
+            weights = bucket_weights[keep]
+        self.means, self.weights = means, weights
+        return self
+
+    def quantile(self, q):
+        if len(self.weights) == 0:
+            return np.nan
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+        target = q * self.weights.sum()
+        positions = np.concatenate([[0.0], cumulative, [self.weights.sum()]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(target, positions, values))
+
+
+class HeavyHitters:
+    """
+    Misra-Gries frequent-items summary with an attached per-item sum.
+
+    Keeps at most `capacity` items; counts are lower bounds with error at
+    most N / (capacity + 1). The attached sum (e.g. popularity) is scaled
+    with the count so its mean is preserved when counts are decremented.
+    """
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.float64)
+        self.sums = pd.Series(dtype=np.float64)
+        self.total = 0
+
+    def update(self, keys, values):
+        frame = pd.DataFrame({'key': keys.to_numpy(), 'value': values.to_numpy()}).dropna(subset=['key'])
+        grouped = frame.groupby('key', sort=False)['value'].agg(['count', 'sum'])
+        other = HeavyHitters(self.capacity)
+        other.counts = grouped['count'].astype(np.float64)
+        other.sums = grouped['sum'].astype(np.float64)
+        other.total = len(frame)
+        return self.merge(other)
+
+    def merge(self, other):
+        counts = self.counts.add(other.counts, fill_value=0)
+        sums = self.sums.add(other.sums, fill_value=0)
+        self.total += other.total
+        if len(counts) > self.capacity:
+            threshold = counts.nlargest(self.capacity + 1).iloc[-1]
+            means = sums / counts
+            counts = counts - threshold
+            counts = counts[counts > 0]
+            sums = means[counts.index] * counts
+        self.counts, self.sums = counts, sums
+        return self
+
+    def top(self, n):
+        """Most frequent items as (key, estimated count) pairs."""
+        return list(self.counts.nlargest(n).items())
+
+    def means(self, min_count=0):
+        """Mean of the attached value per item with at least `min_count` estimated occurrences."""
+        counts = self.counts[self.counts >= min_count]
+        return pd.DataFrame({'mean': self.sums[counts.index] / counts, 'count': counts})
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimate with 2**precision one-byte registers."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values):
+        values = values.dropna()
+        if len(values) == 0:
+            return self
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest_bits = 64 - self.precision
+        rest = (hashes & np.uint64((1 << rest_bits) - 1)).astype(np.float64)
+        # Position of the leftmost set bit of the remaining bits (frexp is exact below 2**53)
+        _, exponent = np.frexp(rest)
+        rank = np.where(rest > 0, rest_bits + 1 - exponent, rest_bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class EDAAccumulator:
+    """
+    All statistics needed for the EDA report, updated one chunk at a time.
+
+    Every part is mergeable, so chunks can be summarised independently (for
+    example in worker processes) and combined in any order.
+    """
+
+    def __init__(self, top_n=10, artist_capacity=5000):
+        self.top_n = top_n
+        self.rows = 0
+        self.columns = None
+        self.dtypes = None
+        self.missing = None
+        self.moments = {}
+        self.quantiles = {}
+        self.correlation = CoMomentAccumulator(AUDIO_FEATURES)
+        self.threshold_counts = {name: 0 for name in THRESHOLD_COUNTS}
+        self.short_tracks = 0
+        self.explicit = 0
+        self.top_tracks = None
+        self.genre_sums = pd.Series(dtype=np.float64)
+        self.genre_counts = pd.Series(dtype=np.float64)
+        self.artists = HeavyHitters(artist_capacity)
+        self.unique_artists = HyperLogLog()
+        self.unique_track_names = HyperLogLog()
+
+    def update(self, chunk, offset=0):
+        """
+        Add one chunk of rows.
+
+        Args:
+            chunk (pd.DataFrame): Rows of the dataset.
+            offset (int): Position of the chunk's first row in the file, used to
+                          break popularity ties in file order.
+        """
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.dtypes = chunk.dtypes
+            self.missing = pd.Series(0, index=chunk.columns)
+        self.rows += len(chunk)
+        self.missing = self.missing.add(chunk.isnull().sum(), fill_value=0)
+
+        for column in chunk.select_dtypes(include='number').columns:
+            values = chunk[column].to_numpy(dtype=np.float64)
+            self.moments.setdefault(column, MomentsAccumulator()).update(values)
+            self.quantiles.setdefault(column, QuantileSketch()).update(values)
+        self.correlation.update(chunk)
+
+        for name, (column, threshold) in THRESHOLD_COUNTS.items():
+            self.threshold_counts[name] += int((chunk[column] > threshold).sum())
+        self.short_tracks += int((chunk['duration_ms'] < 2 * 60 * 1000).sum())
+        self.explicit += int(chunk['explicit'].sum())
+
+        candidates = chunk[['track_name', 'artists', 'popularity', 'track_genre']].copy()
+        candidates.index = np.arange(offset, offset + len(chunk))
+        self._merge_top_tracks(candidates.nlargest(self.top_n, 'popularity'))
+
+        genre_stats = chunk.groupby('track_genre')['popularity'].agg(['sum', 'count'])
+        self.genre_sums = self.genre_sums.add(genre_stats['sum'], fill_value=0)
+        self.genre_counts = self.genre_counts.add(genre_stats['count'], fill_value=0)
+
+        self.artists.update(chunk['artists'], chunk['popularity'])
+        self.unique_artists.update(chunk['artists'])
+        self.unique_track_names.update(chunk['track_name'])
+        return self
+
+    def _merge_top_tracks(self, candidates):
+        combined = candidates if self.top_tracks is None else pd.concat([self.top_tracks, candidates])
+        self.top_tracks = combined.sort_index().nlargest(self.top_n, 'popularity')
+
+    def merge(self, other):
+        """Combine the statistics of another accumulator into this one."""
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.columns, self.dtypes = other.columns, other.dtypes
+            self.missing = pd.Series(0, index=other.columns)
+        self.rows += other.rows
+        self.missing = self.missing.add(other.missing, fill_value=0)
+        for column, moments in other.moments.items():
+            self.moments.setdefault(column, MomentsAccumulator()).merge(moments)
+        for column, sketch in other.quantiles.items():
+            self.quantiles.setdefault(column, QuantileSketch()).merge(sketch)
+        self.correlation.merge(other.correlation)
+        for name, count in other.threshold_counts.items():
+            self.threshold_counts[name] += count
+        self.short_tracks += other.short_tracks
+        self.explicit += other.explicit
+        if other.top_tracks is not None:
+            self._merge_top_tracks(other.top_tracks)
+        self.genre_sums = self.genre_sums.add(other.genre_sums, fill_value=0)
+        self.genre_counts = self.genre_counts.add(other.genre_counts, fill_value=0)
+        self.artists.merge(other.artists)
+        self.unique_artists.merge(other.unique_artists)
+        self.unique_track_names.merge(other.unique_track_names)
+        return self
+
+    def describe(self, columns=None):
+        """Equivalent of `DataFrame.describe()` built from the accumulators."""
+        columns = columns or list(self.moments)
+        stats = {}
+        for column in columns:
+            moments, sketch = self.moments[column], self.quantiles[column]
+            stats[column] = [moments.count, moments.mean, moments.std, moments.min,
+                             sketch.quantile(0.25), sketch.quantile(0.5), sketch.quantile(0.75), moments.max]
+        return pd.DataFrame(stats, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+    def popularity_prior(self, weight=20):
+        """
+        Mean popularity per genre, shrunk towards the dataset mean.
+
+        Args:
+            weight (float): Pseudo-tracks at the dataset mean added to every genre,
+                            so small genres stay close to the overall average.
+
+        Returns:
+            pd.Series: Prior popularity by genre.
+        """
+        overall = self.moments['popularity'].mean
+        return (self.genre_sums + weight * overall) / (self.genre_counts + weight)
+
+    def fill_popularity(self, items, weight=20):
+        """
+        Popularity of `items`, with missing values replaced by the prior of the
+        track's (first) genre, or by the dataset mean for unknown genres.
+
+        Returns:
+            np.ndarray: float64 popularity per row.
+        """
+        popularity = items['popularity'].to_numpy(dtype=np.float64)
+        missing = np.isnan(popularity)
+        if missing.any():
+            genres = items['track_genre'].fillna('').astype(str).str.split().str[0]
+            prior = self.popularity_prior(weight)
+            filled = prior.reindex(genres[missing].to_numpy()).fillna(self.moments['popularity'].mean)
+            popularity = popularity.copy()
+            popularity[missing] = filled.to_numpy()
+        return popularity
+
+    def feature_scaling(self, columns=AUDIO_FEATURES):
+        """Mean and standard deviation per column, for standardising features without a pass over the data."""
+        return pd.DataFrame({'mean': [self.moments[c].mean for c in columns],
+                             'std': [self.moments[c].std for c in columns]}, index=columns)
+
+    def standardize(self, frame, columns=AUDIO_FEATURES):
+        """`frame[columns]` scaled to zero mean and unit variance with the dataset's moments."""
+        scaling = self.feature_scaling(columns)
+        return (frame[columns] - scaling['mean']) / scaling['std'].replace(0, 1).fillna(1)
+
+
+def _summarize_chunk(chunk, offset, top_n, artist_capacity):
+    """Build an accumulator for one chunk (runs in a worker process)."""
+    return EDAAccumulator(top_n, artist_capacity).update(chunk, offset)
+
+
+def stream_statistics(data_path, chunksize=200_000, workers=1, top_n=10, artist_capacity=5000):
+    """
+    Summarise a CSV file in one pass over bounded-size chunks.
+
+    Args:
+        data_path (str): Path to the dataset CSV.
+        chunksize (int): Rows per chunk.
+        workers (int): Worker processes summarising chunks in parallel; 1 runs inline.
+        top_n (int): Number of top tracks kept.
+        artist_capacity (int): Number of artists tracked by the heavy-hitter summary.
+
+    Returns:
+        EDAAccumulator: Merged statistics of the whole file.
+    """
+    result = EDAAccumulator(top_n, artist_capacity)
+    reader = pd.read_csv(data_path, chunksize=chunksize)
+
+    if workers <= 1:
+        offset = 0
+        for chunk in reader:
+            result.update(chunk, offset)
+            offset += len(chunk)
+        return result
+
+    # Keep at most two chunks per worker in flight to bound memory
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        offset = 0
+        for chunk in reader:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result.merge(future.result())
+            pending.add(executor.submit(_summarize_chunk, chunk, offset, top_n, artist_capacity))
+            offset += len(chunk)
+        for future in pending:
+            result.merge(future.result())
+    return result
+
+
+class StreamingSpotifyEDA(SpotifyEDA):
+    """
+    Single-pass, bounded-memory variant of SpotifyEDA.
+
+    The dataset is read in chunks and folded into mergeable accumulators, so
+    the report of `run_full_analysis` is produced without keeping the whole
+    file in memory. Unique counts, quantiles and artist rankings are
+    approximate (HyperLogLog, quantile sketch and Misra-Gries summaries).
+    """
+
+    def __init__(self, data_path=None, chunksize=200_000, workers=1, store_dir=None):
+        """
+        Args:
+            data_path (str, optional): Path to the dataset CSV. If None, will automatically find the dataset.
+            chunksize (int): Rows read per chunk.
+            workers (int): Worker processes summarising chunks in parallel.
+            store_dir (str, optional): Reuse and update the statistics kept in this
+                                       `eda_store.StatisticsStore` directory; only
+                                       partitions of the file not seen before are read.
+        """
+        self.chunksize = chunksize
+        self.workers = workers
+        self.store_dir = store_dir
+        self.stats = None
+        super().__init__(data_path)
+
+    def load_data(self):
+        """Stream the dataset once and build all statistics."""
+        print(f"Streaming Spotify tracks dataset from: {self.data_path}")
+        if not os.path.exists(self.data_path):
+            raise FileNotFoundError(f"Dataset not found at: {self.data_path}")
+
+        if self.store_dir is not None:
+            from eda_store import StatisticsStore
+            report = {}
+            with span('eda.stored'):
+                self.stats = StatisticsStore(self.store_dir).statistics(
+                    self.data_path, self.chunksize, self.workers, report=report)
+            if report['cached']:
+                print(f"Statistics reused from {self.store_dir} (dataset unchanged)")
+            else:
+                print(f"Statistics of {report['partitions']} partitions: "
+                      f"{report['reused']} reused, {report['computed']} computed")
+        else:
+            with span('eda.stream'):
+                self.stats = stream_statistics(self.data_path, self.chunksize, self.workers)
+            print(f"Dataset streamed successfully!")
+        print(f"Dataset shape: ({self.stats.rows}, {len(self.stats.columns)})")
+        print(f"Chunk size: {self.chunksize:,} rows, workers: {self.workers}")
+
+    def basic_info(self):
+        """Display basic information about the dataset."""
+        stats = self.stats
+        print("\n" + "="*60)
+        print(" BASIC DATASET INFORMATION")
+        print("="*60)
+
+        print(f"\n Dataset Dimensions: {stats.rows:,} rows × {len(stats.columns)} columns")
+
+        print(f"\n Column Names:")
+        for i, col in enumerate(stats.columns, 1):
+            print(f"  {i:2d}. {col}")
+
+        print(f"\n Data Types:")
+        print(stats.dtypes)
+
+        print(f"\n Missing Values:")
+        missing = stats.missing.astype(int)
+        missing_df = pd.DataFrame({
+            'Missing Count': missing,
+            'Missing %': (missing / stats.rows) * 100
+        }).sort_values('Missing Count', ascending=False)
+        print(missing_df[missing_df['Missing Count'] > 0])
+
+        print(f"\n Basic Statistics for Numeric Columns:")
+        print(stats.describe())
+
+    def analyze_tracks(self):
+        """Analyze track-related features."""
+        stats = self.stats
+        print("\n" + "="*60)
+        print(" TRACK ANALYSIS")
+        print("="*60)
+
+        unique_tracks = min(stats.unique_track_names.estimate(), stats.rows)
+        print(f"\n Total unique tracks: ~{unique_tracks:,}")
+        print(f" Duplicate tracks: ~{stats.rows - unique_tracks:,}")
+
+        print(f"\n Top {stats.top_n} Most Popular Tracks:")
+        for i, (_, row) in enumerate(stats.top_tracks.iterrows(), 1):
+            print(f"  {i:2d}. {row['track_name']} - {row['artists']} ({row['popularity']})")
+
+        print(f"\n Track Duration Analysis:")
+        duration = stats.moments['duration_ms']
+        to_minutes = 1000 * 60
+        print(f"  Average duration: {duration.mean / to_minutes:.2f} minutes")
+        print(f"  Median duration: {stats.quantiles['duration_ms'].quantile(0.5) / to_minutes:.2f} minutes")
+        print(f"  Shortest track: {duration.min / to_minutes:.2f} minutes")
+        print(f"  Longest track: {duration.max / to_minutes:.2f} minutes")
+
+        explicit_pct = (stats.explicit / stats.rows) * 100
+        print(f"\n Explicit content: {stats.explicit:,} tracks ({explicit_pct:.1f}%)")
+
+    def analyze_genres(self):
+        """Analyze genre distribution and patterns."""
+        stats = self.stats
+        print("\n" + "="*60)
+        print(" GENRE ANALYSIS")
+        print("="*60)
+
+        genre_counts = stats.genre_counts.astype(int).sort_values(ascending=False, kind='stable')
+        print(f"\n Total unique genres: {len(genre_counts)}")
+        print(f"\n Top 15 Genres by Track Count:")
+        for i, (genre, count) in enumerate(genre_counts.head(15).items(), 1):
+            pct = (count / stats.rows) * 100
+            print(f"  {i:2d}. {genre:<20} {count:>6,} tracks ({pct:5.1f}%)")
+
+        print(f"\n Most Popular Genres (by average popularity):")
+        genre_popularity = pd.DataFrame({'mean': stats.genre_sums / stats.genre_counts,
+                                         'count': stats.genre_counts}).round(2)
+        genre_popularity = genre_popularity[genre_popularity['count'] >= 100]
+        for i, (genre, row) in enumerate(genre_popularity.nlargest(10, 'mean').iterrows(), 1):
+            print(f"  {i:2d}. {genre:<20} Avg: {row['mean']:5.1f} ({row['count']:>4} tracks)")
+
+    def analyze_artists(self):
+        """Analyze artist-related features."""
+        stats = self.stats
+        print("\n" + "="*60)
+        print(" ARTIST ANALYSIS")
+        print("="*60)
+
+        print(f"\n Total unique artists: ~{stats.unique_artists.estimate():,}")
+
+        print(f"\n Top 15 Most Prolific Artists (by track count):")
+        for i, (artist, count) in enumerate(stats.artists.top(15), 1):
+            print(f"  {i:2d}. {artist:<30} {int(count):>4} tracks")
+
+        print(f"\n Most Popular Artists (by average popularity):")
+        artist_popularity = stats.artists.means(min_count=10).round(2)
+        for i, (artist, row) in enumerate(artist_popularity.nlargest(10, 'mean').iterrows(), 1):
+            print(f"  {i:2d}. {artist:<30} Avg: {row['mean']:5.1f} ({row['count']:>3} tracks)")
+
+    def analyze_audio_features(self):
+        """Analyze audio features and their relationships."""
+        stats = self.stats
+        print("\n" + "="*60)
+        print(" AUDIO FEATURES ANALYSIS")
+        print("="*60)
+
+        print(f"\n Audio Features Summary Statistics:")
+        print(stats.describe(AUDIO_FEATURES).round(3))
+
+        print(f"\n Audio Features Correlation Matrix:")
+        corr_matrix = stats.correlation.correlation()
+
+        corr_pairs = []
+        for i in range(len(corr_matrix.columns)):
+            for j in range(i+1, len(corr_matrix.columns)):
+                corr_pairs.append((corr_matrix.columns[i], corr_matrix.columns[j], corr_matrix.iloc[i, j]))
+        corr_pairs.sort(key=lambda x: abs(x[2]), reverse=True)
+
+        print(f"\n Top 10 Strongest Feature Correlations:")
+        for i, (feat1, feat2, corr) in enumerate(corr_pairs[:10], 1):
+            print(f"  {i:2d}. {feat1:<15} <-> {feat2:<15} {corr:6.3f}")
+
+    def create_visualizations(self):
+        """Visualizations need the full frame and are skipped in streaming mode."""
+        print("\n Visualizations are skipped in streaming mode.")
+
+    def create_fast_visualizations(self, *args, **kwargs):
+        """Visualizations need the full frame and are skipped in streaming mode."""
+        self.create_visualizations()
+
+    def generate_summary_report(self):
+        """Generate a comprehensive summary report."""
+        stats = self.stats
+        rows = stats.rows
+        print("\n" + "="*60)
+        print(" EDA SUMMARY REPORT")
+        print("="*60)
+
+        missing_data = int(stats.missing.sum())
+        total_cells = rows * len(stats.columns)
+        data_completeness = ((total_cells - missing_data) / total_cells) * 100
+
+        print(f"\n DATA QUALITY SUMMARY:")
+        print(f"  • Total tracks: {rows:,}")
+        print(f"  • Total features: {len(stats.columns)}")
+        print(f"  • Data completeness: {data_completeness:.1f}%")
+        print(f"  • Missing values: {missing_data:,}")
+
+        genre_counts = stats.genre_counts.sort_index().astype(int)
+        most_common_genre = genre_counts.idxmax()
+        most_common_count = genre_counts.max()
+
+        print(f"\n GENRE INSIGHTS:")
+        print(f"  • Unique genres: {len(genre_counts)}")
+        print(f"  • Most common genre: {most_common_genre} ({most_common_count:,} tracks)")
+        print(f"  • Genre diversity: {most_common_count/rows*100:.1f}% of tracks are {most_common_genre}")
+
+        counts = stats.threshold_counts
+        print(f"\n AUDIO FEATURES INSIGHTS:")
+        print(f"  • High energy tracks (>0.8): {counts['high_energy']:,} ({counts['high_energy']/rows*100:.1f}%)")
+        print(f"  • High danceability tracks (>0.8): {counts['high_danceability']:,} ({counts['high_danceability']/rows*100:.1f}%)")
+        print(f"  • Acoustic tracks (>0.8): {counts['acoustic']:,} ({counts['acoustic']/rows*100:.1f}%)")
+
+        print(f"\n POPULARITY INSIGHTS:")
+        print(f"  • Average popularity: {stats.moments['popularity'].mean:.1f}")
+        print(f"  • High popularity tracks (>70): {counts['high_popularity']:,} ({counts['high_popularity']/rows*100:.1f}%)")
+
+        print(f"\n DURATION INSIGHTS:")
+        print(f"  • Average duration: {stats.moments['duration_ms'].mean / (1000 * 60):.1f} minutes")
+        print(f"  • Short tracks (<2 min): {stats.short_tracks:,} ({stats.short_tracks/rows*100:.1f}%)")
+        print(f"  • Long tracks (>5 min): {counts['long_tracks']:,} ({counts['long_tracks']/rows*100:.1f}%)")
+
+        print(f"\n EDA analysis completed successfully!")
@@ -0,0 +1,217 @@
+import pandas as pd
+import numpy as np
+import os
+
+# Column order of the Kaggle Spotify tracks dataset
+COLUMNS = ['Unnamed: 0', 'track_id', 'artists', 'album_name', 'track_name', 'popularity',
+           'duration_ms', 'explicit', 'danceability', 'energy', 'key', 'loudness', 'mode',
+           'speechiness', 'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo',
+           'time_signature', 'track_genre']
+
+AUDIO_FEATURES = ['danceability', 'energy', 'key', 'loudness', 'mode',
+                  'speechiness', 'acousticness', 'instrumentalness',
+                  'liveness', 'valence', 'tempo']
+
+WORDS = ['love', 'night', 'heart', 'fire', 'dream', 'rain', 'blue', 'light', 'gold', 'river',
+         'summer', 'road', 'home', 'star', 'wild', 'shadow', 'dance', 'echo', 'storm', 'ocean',
+         'city', 'ghost', 'sun', 'moon', 'paper', 'glass', 'silver', 'midnight', 'thunder', 'sky']
+
+
+class SyntheticSpotifyData:
+    """
+    Generates synthetic datasets with the schema of the Spotify tracks dataset.
+
+    Like the real data, a share of the rows repeat a `track_id` under another
+    `track_genre`, artist track counts are heavy-tailed and some tracks have
+    several semicolon-separated artists. Generation is seeded and chunked, so
+    the same arguments always give the same file and 10M rows can be written
+    without holding the whole frame in memory.
+    """
+
+    def __init__(self, n_rows, seed=42, n_genres=114, duplicate_fraction=0.35):
+        """
+        Args:
+            n_rows (int): Number of rows to generate.
+            seed (int): Random seed.
+            n_genres (int): Number of distinct genres.
+            duplicate_fraction (float): Share of rows that repeat an existing track_id
+                                        under another genre.
+        """
+        self.n_rows = n_rows
+        self.seed = seed
+        self.n_genres = n_genres
+        self.n_tracks = max(1, int(n_rows * (1 - duplicate_fraction)))
+        self.n_artists = max(10, self.n_tracks // 3)
+        self.genres = np.array([f"genre-{i:03d}" for i in range(n_genres)])
+        self._build_track_tables()
+
+    def _build_track_tables(self):
+        """Draw the per-track attributes shared by every row of a track."""
+        rng = np.random.default_rng(self.seed)
+        n = self.n_tracks
+
+        # Heavy-tailed artist productivity
+        self.track_artist = (rng.zipf(1.3, n) - 1) % self.n_artists
+        self.track_second_artist = np.where(rng.random(n) < 0.15, rng.integers(0, self.n_artists, n), -1)
+        self.track_genre = rng.integers(0, self.n_genres, n)
+        self.track_name_words = rng.integers(0, len(WORDS), (n, 2))
+
+        self.track_numeric = {
+            'popularity': np.clip(rng.normal(33, 22, n), 0, 100).astype(np.int64),
+            'duration_ms': np.clip(rng.lognormal(12.3, 0.35, n), 10_000, 5_000_000).astype(np.int64),
+            'explicit': rng.random(n) < 0.086,
+            'danceability': rng.beta(5, 4, n).round(3),
+            'energy': rng.beta(2.5, 1.5, n).round(3),
+            'key': rng.integers(0, 12, n),
+            'loudness': np.clip(rng.normal(-8.3, 5.0, n), -49.5, 4.5).round(3),
+            'mode': (rng.random(n) < 0.64).astype(np.int64),
+            'speechiness': rng.beta(1.2, 12, n).round(4),
+            'acousticness': rng.beta(0.6, 1.3, n).round(4),
+            'instrumentalness': np.where(rng.random(n) < 0.6, 0.0, rng.beta(0.7, 1.5, n)).round(4),
+            'liveness': rng.beta(1.8, 6.5, n).round(4),
+            'valence': rng.beta(2.2, 2.4, n).round(3),
+            'tempo': np.clip(rng.normal(122, 30, n), 0, 243).round(3),
+            'time_signature': rng.choice([3, 4, 5], n, p=[0.08, 0.9, 0.02]),
+        }
+
+    def _track_indices(self, start, stop):
+        """Track index of rows [start, stop): every track once, then duplicates."""
+        rows = np.arange(start, stop)
+        rng = np.random.default_rng([self.seed, start])
+        duplicates = rows >= self.n_tracks
+        indices = rows.copy()
+        indices[duplicates] = rng.integers(0, self.n_tracks, duplicates.sum())
+        genre_shift = np.where(duplicates, rng.integers(1, self.n_genres, len(rows)), 0)
+        return indices, genre_shift
+
+    def chunk(self, start, stop):
+        """
+        Generate rows [start, stop) as a DataFrame.
+
+        Returns:
+            pd.DataFrame: The rows, with the real dataset's columns.
+        """
+        indices, genre_shift = self._track_indices(start, stop)
+
+        artists = pd.Series(self.track_artist[indices]).map(lambda a: f"Artist {a}")
+        second = self.track_second_artist[indices]
+        has_second = second >= 0
+        artists[has_second] = artists[has_second] + ';Artist ' + pd.Series(second[has_second], index=artists.index[has_second]).astype(str)
+
+        words = np.array(WORDS)[self.track_name_words[indices]]
+        track_names = pd.Series(np.char.add(np.char.add(np.char.capitalize(words[:, 0]), ' '), words[:, 1]))
+        # Keep most names distinct while still producing some repeated titles
+        suffix = pd.Series(indices % max(1, int(self.n_tracks * 0.9))).astype(str)
+        track_names = track_names + ' ' + suffix
+
+        frame = {
+            'Unnamed: 0': np.arange(start, stop),
+            'track_id': pd.Series(indices).map(lambda i: f"trk{i:010d}"),
+            'artists': artists,
+            'album_name': 'Album ' + pd.Series(indices // 10).astype(str),
+            'track_name': track_names,
+        }
+        for column, values in self.track_numeric.items():
+            frame[column] = values[indices]
+        frame['track_genre'] = self.genres[(self.track_genre[indices] + genre_shift) % self.n_genres]
+
+        return pd.DataFrame(frame)[COLUMNS]
+
+    def to_frame(self):
+        """Generate the whole dataset in memory."""
+        return self.chunk(0, self.n_rows)
+
+    def write_csv(self, path, chunk_size=500_000):
+        """
+        Write the dataset to a CSV file chunk by chunk.
+
+        Args:
+            path (str): Destination CSV path.
+            chunk_size (int): Number of rows generated per chunk.
+
+        Returns:
+            str: The written path.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        for start in range(0, self.n_rows, chunk_size):
+            stop = min(start + chunk_size, self.n_rows)
+            self.chunk(start, stop).to_csv(path, mode='w' if start == 0 else 'a',
+                                          header=start == 0, index=False)
+        return path
+
+
+class SyntheticListeningEvents:
+    """
+    Generates play events (user_id, track_id, ms_played, timestamp).
+
+    Users and tracks follow heavy-tailed activity/popularity distributions,
+    and roughly a quarter of the plays are skips shorter than 30 seconds.
+    """
+
+    def __init__(self, n_events, n_users=10_000, track_ids=None, n_tracks=100_000, seed=42):
+        """
+        Args:
+            n_events (int): Number of events to generate.
+            n_users (int): Number of distinct users.
+            track_ids (array-like, optional): Track ids to draw from, e.g. the dataset's.
+            n_tracks (int): Number of synthetic track ids when `track_ids` is None.
+            seed (int): Random seed.
+        """
+        self.n_events = n_events
+        self.n_users = n_users
+        self.track_ids = (np.asarray(track_ids, dtype=object) if track_ids is not None
+                          else np.array([f"trk{i:010d}" for i in range(n_tracks)], dtype=object))
+        self.seed = seed
+
+    def chunk(self, start, stop):
+        """Generate events [start, stop) as a DataFrame."""
+        rng = np.random.default_rng([self.seed, start])
+        n = stop - start
+        users = (rng.zipf(1.2, n) - 1) % self.n_users
+        tracks = (rng.zipf(1.1, n) - 1) % len(self.track_ids)
+        skips = rng.random(n) < 0.25
+        ms_played = np.where(skips, rng.integers(1_000, 30_000, n), rng.integers(30_000, 300_000, n))
+        timestamps = 1_600_000_000 + np.arange(start, stop) * 7 + rng.integers(0, 7, n)
+        return pd.DataFrame({
+            'user_id': pd.Series(users).map(lambda u: f"user{u:07d}"),
+            'track_id': self.track_ids[tracks],
+            'ms_played': ms_played,
+            'timestamp': timestamps,
+        })
+
+    def write(self, path, chunk_size=500_000):
+        """
+        Write the events to `path` as CSV, or as JSON lines if it ends with `.jsonl`.
+
+        Returns:
+            str: The written path.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        json_lines = path.endswith('.jsonl')
+        for start in range(0, self.n_events, chunk_size):
+            frame = self.chunk(start, min(start + chunk_size, self.n_events))
+            if json_lines:
+                with open(path, 'w' if start == 0 else 'a') as f:
+                    # Every record, the last included, ends with a newline
+                    frame.to_json(f, orient='records', lines=True)
+            else:
+                frame.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+        return path
+
+
+def write_synthetic_dataset(path, n_rows, seed=42, chunk_size=500_000):
+    """Write a synthetic dataset with `n_rows` rows to `path` and return the path."""
+    print(f"Generating synthetic dataset with {n_rows:,} rows at: {path}")
+    return SyntheticSpotifyData(n_rows, seed=seed).write_csv(path, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic Spotify tracks dataset.")
+    parser.add_argument('output', help="Destination CSV path")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of rows")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    write_synthetic_dataset(args.output, args.rows, seed=args.seed)
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def top_k(scores, k, keys=None):
+    """
+    Positions of the k best finite scores, best first.
+
+    Ties are broken by the lower key, also at the cut: every item scoring at
+    least the k-th score is a candidate, so which tied items are returned does
+    not depend on argpartition's choice (or on how the items were sharded).
+
+    Args:
+        scores (np.ndarray): 1-D scores; -inf marks excluded items.
+        k (int): Number of positions.
+        keys (np.ndarray, optional): Tie-break key per position (default: the position).
+
+    Returns:
+        np.ndarray: int64 positions, at most k and only finite scores.
+    """
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= kth)
+    tie_break = candidates if keys is None else keys[candidates]
+    return candidates[np.lexsort((tie_break, -scores[candidates]))[:k]]
+
+
+def top_k_rows(scores, k):
+    """
+    `top_k` of every row of a 2-D score matrix, keeping exactly min(k, n_columns)
+    columns per row (-inf scores included when a row has fewer finite ones).
+
+    Returns:
+        np.ndarray: int64 columns, (n_rows, min(k, n_columns)), best first.
+    """
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.lexsort((top, -top_scores), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+
+    # Rows with more items tied at the k-th score than fit are redone exactly
+    kth = top_scores.min(axis=1)
+    for row in np.flatnonzero((scores >= kth[:, None]).sum(axis=1) > k):
+        row_scores = scores[row]
+        candidates = np.flatnonzero(row_scores >= kth[row])
+        top[row] = candidates[np.lexsort((candidates, -row_scores[candidates]))[:k]]
+    return top
@@ -0,0 +1,13 @@
+import os
+import sys
+import pytest
+
+# The modules live flat in scripts/ and import each other by bare name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+
+@pytest.fixture(scope='session')
+def dataset_path(tmp_path_factory):
+    """A small synthetic dataset CSV with the schema of the real one."""
+    from synthetic_data import SyntheticSpotifyData
+    return SyntheticSpotifyData(3000, n_genres=20).write_csv(str(tmp_path_factory.mktemp('data') / 'dataset.csv'))
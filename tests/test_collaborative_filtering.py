@@ -0,0 +1,31 @@
+from collaborative_filtering import CollaborativeFiltering
+from instrumentation import metrics
+
+
+class _Spans:
+    """Metrics listener recording the names of finished spans."""
+
+    def __init__(self):
+        self.names = []
+
+    def span_started(self, name):
+        pass
+
+    def span_finished(self, name, seconds):
+        self.names.append(name)
+
+
+def test_fit_svd_is_timed_as_fit_svd_and_the_matrix_build_is_not(dataset_path):
+    spans = _Spans()
+    was_enabled = metrics.enabled
+    metrics.enable()
+    metrics.add_listener(spans)
+    try:
+        cf = CollaborativeFiltering(dataset_path)
+        assert spans.names.count('cf.fit_svd') == 0 and 'cf.create_matrix' in spans.names
+        cf.fit_svd(10)
+    finally:
+        metrics.remove_listener(spans)
+        if not was_enabled:
+            metrics.disable()
+    assert spans.names.count('cf.fit_svd') == 1
@@ -0,0 +1,40 @@
+import time
+from deadline_scheduler import ComponentScheduler
+
+
+def test_skipped_component_is_retried_once_it_became_fast():
+    scheduler = ComponentScheduler({'slow': 316.0})
+    statuses = [scheduler.run([('slow', lambda: ['a'])], deadline_ms=100)[1]['slow']['status']
+                for _ in range(10)]
+    scheduler.close()
+    assert statuses[0] == 'skipped'
+    assert 'ok' in statuses
+    assert scheduler.expected_ms['slow'] < 100
+
+
+def test_finished_components_are_returned_and_late_ones_reported():
+    scheduler = ComponentScheduler({'fast': 1.0, 'slow': 1.0})
+    results, report = scheduler.run([('fast', lambda: ['a']), ('slow', lambda: time.sleep(0.3) or ['b'])],
+                                    deadline_ms=100)
+    scheduler.close()
+    assert results == {'fast': ['a']}
+    assert report['slow']['status'] == 'late'
+
+
+def test_concurrent_calls_each_run_their_components():
+    from concurrent.futures import ThreadPoolExecutor
+    scheduler = ComponentScheduler({'item_based': 1.0}, max_workers=8)
+    with ThreadPoolExecutor(max_workers=8) as callers:
+        reports = list(callers.map(lambda _: scheduler.run([('item_based', lambda: time.sleep(0.02) or ['a'])],
+                                                           deadline_ms=500)[1], range(8)))
+    scheduler.close()
+    assert [report['item_based']['status'] for report in reports] == ['ok'] * 8
+
+
+def test_component_left_running_by_a_late_call_is_busy_until_it_finishes():
+    scheduler = ComponentScheduler({'slow': 1.0})
+    assert scheduler.run([('slow', lambda: time.sleep(0.3) or ['b'])], deadline_ms=50)[1]['slow']['status'] == 'late'
+    assert scheduler.run([('slow', lambda: ['b'])], deadline_ms=50)[1]['slow']['status'] == 'busy'
+    time.sleep(0.4)
+    assert scheduler.run([('slow', lambda: ['b'])], deadline_ms=1000)[1]['slow']['status'] == 'ok'
+    scheduler.close()
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from eda_plots import render_panels
+
+matplotlib = pytest.importorskip('matplotlib')
+
+
+def test_inline_rendering_leaves_the_pyplot_backend_alone(tmp_path):
+    previous = matplotlib.get_backend()
+    # Any backend other than Agg stands in for the caller's interactive one
+    matplotlib.use('svg')
+    panels = {
+        'key': {'labels': ['C', 'C#', 'D'], 'counts': np.array([5, 3, 7])},
+        'popularity': {'edges': np.linspace(0, 100, 11), 'counts': np.arange(10), 'mean': 42.0},
+    }
+    try:
+        paths = render_panels(panels, str(tmp_path), workers=1)
+        backend = matplotlib.get_backend()
+    finally:
+        matplotlib.use(previous)
+    assert sorted(p.rsplit('/', 1)[-1] for p in paths) == ['key.png', 'popularity.png']
+    assert all((tmp_path / name).stat().st_size > 0 for name in ('key.png', 'popularity.png'))
+    assert backend == 'svg'
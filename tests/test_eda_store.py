@@ -0,0 +1,25 @@
+from eda_store import StatisticsStore, partitions
+
+
+def test_only_changed_partitions_are_recomputed(dataset_path, tmp_path):
+    data_path = str(tmp_path / 'dataset.csv')
+    with open(dataset_path) as f:
+        lines = f.readlines()
+    with open(data_path, 'w') as f:
+        f.writelines(lines)
+    store = StatisticsStore(str(tmp_path / 'store'))
+
+    first, again = {}, {}
+    stats = store.statistics(data_path, rows=500, report=first)
+    assert store.statistics(data_path, rows=500, report=again).rows == stats.rows
+    assert first['computed'] == first['partitions'] > 2 and not first['cached']
+    assert again['cached']
+
+    # Appending a row changes only the last partition
+    with open(data_path, 'a') as f:
+        f.write(lines[1])
+    changed = {}
+    stats = store.statistics(data_path, rows=500, report=changed)
+    assert stats.rows == len(lines)
+    assert changed['partitions'] == len(list(partitions(data_path, rows=500)))
+    assert changed['computed'] == 1 and changed['reused'] == changed['partitions'] - 1
@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from evaluation import RankingEvaluator
+
+
+def test_single_user_is_rejected_with_a_clear_error():
+    recommender = SimpleNamespace(user_item_matrix=csr_matrix(np.ones((1, 30))))
+    with pytest.raises(ValueError, match="at least 2 users"):
+        RankingEvaluator(recommender).fit()
+
+
+def test_two_users_fit():
+    rng = np.random.default_rng(0)
+    recommender = SimpleNamespace(user_item_matrix=csr_matrix((rng.random((2, 30)) > 0.5).astype(float)))
+    evaluator = RankingEvaluator(recommender)
+    evaluator.fit()
+    assert evaluator.state['svd_factors'].shape == (2, 1)
@@ -0,0 +1,55 @@
+import pandas as pd
+from basic_recommender import ContentBasedRecommender
+from fallback_tables import FallbackTables, seed_metadata
+from hybrid_recommender import HybridRecommender
+
+
+def _items():
+    return pd.DataFrame({
+        'track_name': ['Low Rock', 'Top Rock', 'Mid Pop', 'Top Pop', 'Solo', 'Duet'],
+        'artists': ['Band A', 'Band A', 'Singer B', 'Singer B', 'Singer C', 'Singer C;Band A'],
+        'track_genre': ['hard-rock', 'hard-rock', 'pop', 'pop', 'jazz', 'pop'],
+        'popularity': [10, 90, 50, 80, 70, 20],
+    })
+
+
+def test_artist_heads_come_before_genre_heads_and_the_global_head():
+    tables = FallbackTables(_items(), genre_size=2, artist_size=2, global_size=3)
+    # Band A's two most popular tracks, then pop's, then the global head, without repeats
+    assert tables.recommend(artists=['band a'], genres=['pop'], n=6) == \
+        ['Top Rock', 'Duet', 'Top Pop', 'Mid Pop', 'Solo']
+
+
+def test_spotify_genre_spellings_map_onto_the_dataset():
+    tables = FallbackTables(_items())
+    assert tables.recommend(genres=['Hard Rock'], n=2) == ['Top Rock', 'Low Rock']
+    # Neither 'album-rock' nor its words are dataset genres: only the global head is left
+    assert tables.recommend(genres=['album rock'], n=1) == ['Top Rock']
+    assert tables.recommend(n=2, exclude=['Top Rock']) == ['Top Pop', 'Solo']
+
+
+def test_seed_metadata_from_spotify_objects():
+    track = {'artists': [{'name': 'Singer B'}, {'name': 'Band A'}]}
+    artist = {'name': 'band a', 'genres': ['pop', 'dance pop']}
+    assert seed_metadata(track, artist) == {'artists': ['Singer B', 'Band A'], 'genres': ['pop', 'dance pop']}
+    assert seed_metadata(artist={'name': 'Singer C', 'genres': []}) == {'artists': ['Singer C'], 'genres': []}
+
+
+class _NoUsers:
+    """Collaborative stand-in that knows no listener of any track."""
+    user_to_idx = {}
+    user_item_df = pd.DataFrame({'user_id': [], 'track_name': []})
+
+
+def test_hybrid_answers_an_unknown_seed_from_its_metadata(dataset_path):
+    content = ContentBasedRecommender(dataset_path)
+    content.fit()
+    hybrid = HybridRecommender.from_components(content, _NoUsers())
+    artist = content.spotify_df['artists'].str.split(';').str[0].value_counts().index[0]
+    metadata = {'artists': [artist], 'genres': []}
+
+    recommendations = hybrid.recommend('Not In The Dataset', num_recommendations=3, deadline_ms=1000,
+                                       seed_metadata=metadata)
+    assert recommendations == content.fallback.recommend(**metadata, n=3)
+    assert 'metadata' in hybrid.last_report['fallbacks']
+    assert hybrid.recommend('Not In The Dataset', num_recommendations=3, seed_metadata=metadata) == recommendations
@@ -0,0 +1,24 @@
+from hybrid_recommender import HybridRecommender, interleave
+
+
+class _Component:
+    """Stands in for a fitted recommender whose tables match or not."""
+
+    def __init__(self, matches):
+        self.matches = matches
+        self.tables = None
+
+    def use_tables(self, tables):
+        self.tables = tables if self.matches else None
+
+
+def test_hybrid_table_needs_matching_content_and_cf_tables():
+    tables = object()
+    for content_matches, cf_matches in ((True, True), (True, False), (False, True)):
+        hybrid = HybridRecommender.from_components(_Component(content_matches), _Component(cf_matches))
+        hybrid.use_tables(tables)
+        assert (hybrid.tables is tables) == (content_matches and cf_matches)
+
+
+def test_interleave_keeps_picks_of_every_list():
+    assert interleave([['a', 'b', 'c'], ['x', 'a', 'y']], 4) == ['a', 'x', 'b', 'c']
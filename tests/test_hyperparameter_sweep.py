@@ -0,0 +1,10 @@
+from collaborative_filtering import CollaborativeFiltering
+from hyperparameter_sweep import HyperparameterSweep
+
+
+def test_ranks_above_the_user_count_are_reported_capped(dataset_path):
+    cf = CollaborativeFiltering(dataset_path)
+    n_users = cf.user_item_matrix.shape[0]
+    sweep = HyperparameterSweep(cf, ranks=[n_users + 5, n_users + 50], neighbors=[5], methods=['svd'])
+    rows = sweep.run(n_jobs=1)
+    assert [(row['method'], row['value']) for row in rows] == [('svd', n_users - 1)]
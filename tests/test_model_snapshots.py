@@ -0,0 +1,71 @@
+import gc
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from basic_recommender import ContentBasedRecommender
+from model_snapshots import ModelSnapshot, SnapshotManager
+
+
+class _Model:
+    """A fitted model holding arrays, directly and inside a nested object."""
+
+    def __init__(self):
+        self.weights = np.zeros(4)
+        self.nested = type('Fitted', (), {})()
+        self.nested.components_ = np.ones((2, 2))
+
+
+def test_snapshot_freezes_arrays(dataset_path):
+    model = _Model()
+    content = ContentBasedRecommender(dataset_path)
+    content.fit(lean=True)
+    snapshot = ModelSnapshot({'model': model, 'Content-Based': content})
+    assert snapshot.info['frozen_arrays'] >= 2
+
+    with pytest.raises(ValueError):
+        model.weights[0] = 1
+    with pytest.raises(ValueError):
+        model.nested.components_[0, 0] = 1
+    with pytest.raises(ValueError, match='read-only'):
+        content.add_tracks(pd.read_csv(dataset_path).head(5).assign(track_id=lambda df: df['track_id'] + 'new'))
+    with pytest.raises(AttributeError):
+        snapshot.version = 2
+
+
+def test_publish_swaps_while_held_snapshots_keep_answering():
+    manager = SnapshotManager(build=None)
+    first = manager.publish({'model': _Model()})
+    held = manager.current()
+    second = manager.publish({'model': _Model()})
+
+    assert manager.current() is second and held is first
+    assert held['model'].weights.sum() == 0
+    assert manager.retired() == [first.version]
+
+    del first, held
+    gc.collect()
+    assert manager.retired() == []
+
+
+def test_concurrent_refits_are_coalesced():
+    release = threading.Event()
+    builds = []
+
+    def build(**options):
+        builds.append(options)
+        release.wait(10)
+        return {'model': _Model()}
+
+    manager = SnapshotManager(build)
+    try:
+        first = manager.refit_async(seed=1)
+        second = manager.refit_async(seed=2)
+        assert second is first and manager.refitting
+        release.set()
+        snapshot = first.result(10)
+    finally:
+        release.set()
+        manager.close()
+    assert builds == [{'seed': 1}]
+    assert manager.current() is snapshot and snapshot.info['seed'] == 1
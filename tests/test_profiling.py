@@ -0,0 +1,62 @@
+import threading
+import time
+from instrumentation import span
+from profiling import CProfileRecorder, SamplingRecorder, TracemallocRecorder
+
+
+def test_concurrent_fit_spans_are_all_reported():
+    recorder = TracemallocRecorder()
+    content_open, svd_open, content_done = threading.Event(), threading.Event(), threading.Event()
+
+    # content.fit opens first and finishes first, while cf.fit_svd is still open
+    def fit_content():
+        with span('content.fit'):
+            content_open.set()
+            svd_open.wait()
+        content_done.set()
+
+    def fit_svd():
+        content_open.wait()
+        with span('cf.fit_svd'):
+            svd_open.set()
+            content_done.wait()
+
+    recorder.start()
+    try:
+        threads = [threading.Thread(target=fit_content), threading.Thread(target=fit_svd)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        recorder.stop()
+    assert sorted(report[0] for report in recorder.span_reports) == ['cf.fit_svd', 'content.fit']
+
+
+def _fit_in_worker():
+    """Busy work in a thread other than the main one, like a fit_orchestrator worker."""
+    end = time.perf_counter() + 0.1
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def _run_worker(recorder):
+    recorder.start()
+    try:
+        worker = threading.Thread(target=_fit_in_worker)
+        worker.start()
+        worker.join()
+    finally:
+        recorder.stop()
+
+
+def test_cprofile_sees_worker_threads():
+    recorder = CProfileRecorder()
+    _run_worker(recorder)
+    assert '_fit_in_worker' in {name for _, _, name in recorder.stats().stats}
+
+
+def test_sampling_sees_worker_threads():
+    recorder = SamplingRecorder(interval_ms=1)
+    _run_worker(recorder)
+    assert any(':_fit_in_worker:' in stack for stack in recorder.stacks)
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from quantized_scoring import QuantizedItemFactors
+
+
+def test_concurrent_queries_get_their_own_scores():
+    rng = np.random.default_rng(0)
+    factors = rng.standard_normal((20_000, 16))
+    quantized = QuantizedItemFactors(factors, 'int8', block_size=512)
+    queries = rng.standard_normal((32, 16))
+    expected = [quantized.approximate_scores(q) for q in queries]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(5):
+            results = list(executor.map(quantized.approximate_scores, queries))
+            for got, want in zip(results, expected):
+                np.testing.assert_array_equal(got, want)
+
+
+def test_int8_scores_are_close_to_exact():
+    rng = np.random.default_rng(1)
+    factors = rng.standard_normal((1000, 8))
+    query = rng.standard_normal(8)
+    scores = QuantizedItemFactors(factors, 'int8').approximate_scores(query)
+    np.testing.assert_allclose(scores, factors @ query, atol=0.1)
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from basic_recommender import ContentBasedRecommender
+from collaborative_filtering import CollaborativeFiltering
+from recommendation_tables import RecommendationTables, build_tables
+
+
+@pytest.fixture(scope='module')
+def fitted(dataset_path, tmp_path_factory):
+    content = ContentBasedRecommender(dataset_path)
+    content.fit()
+    cf = CollaborativeFiltering(dataset_path)
+    cf.fit_svd(10)
+    cf.fit_user_based_cf(5)
+    directory = str(tmp_path_factory.mktemp('tables'))
+    build_tables(content, cf, directory, n=10, n_jobs=1)
+    return content, cf, RecommendationTables(directory)
+
+
+def test_table_lookups_match_live_scoring(fitted):
+    content, cf, tables = fitted
+    users = list(cf.user_to_idx)[:20]
+    tracks = content.track_names[:20]
+    # item_based is left out: its live path takes seconds per user and orders ties by set iteration
+    methods = (cf.recommend_svd, cf.recommend_user_based)
+    live_cf = [[recommend(user, 10) for recommend in methods] for user in users]
+    live_content = [content.recommend(track, 10) for track in tracks]
+
+    cf.use_tables(tables)
+    content.use_tables(tables)
+    try:
+        assert cf.tables is tables and content.tables is tables
+        assert [[recommend(user, 10) for recommend in methods] for user in users] == live_cf
+        assert [content.recommend(track, 10) for track in tracks] == live_content
+    finally:
+        cf.use_tables(None)
+        content.use_tables(None)
+
+
+def test_tables_of_other_users_are_rejected(fitted, dataset_path, tmp_path):
+    _, _, tables = fitted
+    # Dropping the first rows changes the users, and with them the row order of the tables
+    other_path = str(tmp_path / 'other.csv')
+    pd.read_csv(dataset_path).iloc[100:].to_csv(other_path, index=False)
+    other = CollaborativeFiltering(other_path)
+    assert not tables.matches_cf(other)
+    other.fit_svd(10)
+    other.use_tables(tables)
+    assert other.tables is None
@@ -0,0 +1,59 @@
+import numpy as np
+from basic_recommender import ContentBasedRecommender
+from collaborative_filtering import CollaborativeFiltering
+
+
+def test_svd_refit_drops_shards_and_quantized_factors(dataset_path):
+    cf = CollaborativeFiltering(dataset_path)
+    cf.fit_svd(10)
+    cf.shard_svd_items(2)
+    cf.fit_svd(20)
+    assert cf.svd_shards is None
+    user = next(iter(cf.user_to_idx))
+    live = cf.recommend_svd(user, 5)
+    cf.quantize_svd('int8')
+    cf.fit_svd(15)
+    assert cf.svd_quantized is None
+    assert len(live) == 5 and len(cf.recommend_svd(user, 5)) == 5
+
+
+def test_refits_drop_tables_and_candidate_generator(dataset_path):
+    cf = CollaborativeFiltering(dataset_path)
+    for fit in (lambda: cf.fit_svd(10), lambda: cf.fit_user_based_cf(5), lambda: cf.fit_item_based_cf(5)):
+        cf.tables, cf.candidate_generator = object(), object()
+        fit()
+        assert cf.tables is None and cf.candidate_generator is None
+
+    content = ContentBasedRecommender(dataset_path)
+    content.fit()
+    content.tables, content.candidate_generator = object(), object()
+    content.fit()
+    assert content.tables is None and content.candidate_generator is None
+
+
+def test_content_refit_drops_item_shards(dataset_path):
+    content = ContentBasedRecommender(dataset_path)
+    content.fit()
+    name = content.track_names[0]
+    expected = content.recommend(name, 5)
+    content.shard_items(2)
+    try:
+        assert content.recommend(name, 5) == expected
+        content.fit()
+    finally:
+        content.shard_items(0)
+    assert content.item_shards is None
+    assert content.recommend(name, 5) == expected
+
+
+def test_sharded_recommend_drops_padding(dataset_path):
+    content = ContentBasedRecommender(dataset_path)
+    content.fit()
+    content.shard_items(2)
+    try:
+        recommendations = content.recommend(content.track_names[0], len(content.track_names) + 10)
+    finally:
+        content.shard_items(0)
+    names = np.asarray(recommendations, dtype=object)
+    assert len(names) < len(content.track_names)
+    assert (names != content.track_names[0]).all()
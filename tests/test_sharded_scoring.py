@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sharded_scoring import local_top_k, merge_top_k, write_item_blocks, ShardedScorer
+
+
+def _tied_items(n_items=2000, seed=0):
+    """One-feature items with small integer values, so most scores tie."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 10, (n_items, 1)).astype(np.float32)
+
+
+def _reference(matrix, queries, k):
+    scores = queries @ matrix.T
+    order = np.lexsort((np.broadcast_to(np.arange(matrix.shape[0]), scores.shape), -scores), axis=1)
+    return order[:, :k]
+
+
+def _sharded(matrix, queries, k, n_shards, exclude=None):
+    offsets = np.linspace(0, len(matrix), n_shards + 1).astype(np.int64)
+    parts = [local_top_k(matrix[start:stop], start, queries, k, exclude)
+             for start, stop in zip(offsets[:-1], offsets[1:])]
+    return merge_top_k(parts, k)[0]
+
+
+@pytest.mark.parametrize('n_shards', [1, 4, 7])
+def test_ties_break_by_lower_index_for_any_shard_count(n_shards):
+    matrix = _tied_items()
+    queries = np.array([[1.0], [-1.0], [0.5]], dtype=np.float32)
+    np.testing.assert_array_equal(_sharded(matrix, queries, 10, n_shards), _reference(matrix, queries, 10))
+
+
+def test_excluded_items_are_skipped_in_every_shard():
+    matrix = _tied_items()
+    queries = np.array([[1.0]], dtype=np.float32)
+    top = _reference(matrix, queries, 5)[0]
+    exclude = [top[:3].tolist()]
+    one = _sharded(matrix, queries, 5, 1, exclude)
+    np.testing.assert_array_equal(one, _sharded(matrix, queries, 5, 4, exclude))
+    assert not set(top[:3]) & set(one[0])
+
+
+def test_sharded_scorer_matches_one_shard(tmp_path):
+    matrix = _tied_items(400)
+    queries = np.array([[1.0], [-1.0]], dtype=np.float32)
+    directory = write_item_blocks(matrix, str(tmp_path), n_blocks=4)
+    results = []
+    for n_shards in (1, 4):
+        with ShardedScorer(directory, n_shards) as scorer:
+            results.append(scorer.top_k(queries, 10)[0])
+    np.testing.assert_array_equal(results[0], results[1])
+    np.testing.assert_array_equal(results[0], _reference(matrix, queries, 10))
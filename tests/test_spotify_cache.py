@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from fake_spotify import FakeSpotify
+from spotify_cache import SpotifyCache, CachedSpotify, pooled_client, prefetch, MISSING_TTL
+
+pytest.importorskip('spotipy')
+
+
+def _dataset(n=120):
+    return pd.DataFrame({
+        'track_id': [f"track{i:04d}" for i in range(n)],
+        'track_name': [f"Song {i}" for i in range(n)],
+        'artists': [f"Artist {i % 15};Guest {i % 4}" for i in range(n)],
+        'track_genre': ['pop' if i % 2 else 'rock' for i in range(n)],
+        'popularity': [i % 100 for i in range(n)],
+        'duration_ms': [180_000 + i for i in range(n)],
+        'explicit': [i % 3 == 0 for i in range(n)],
+    })
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SpotifyCache(str(tmp_path / 'cache.sqlite'))
+    yield cache
+    cache.close()
+
+
+def test_warm_prefetch_makes_no_calls(cache):
+    df = _dataset()
+    with FakeSpotify(df) as fake:
+        client = pooled_client(2, fake.url)
+        cold = prefetch(client, cache, df['track_id'].tolist(), workers=2, rate=1000, top_tracks=True, verbose=False)
+        requests_after_cold = sum(fake.requests.values())
+        warm = prefetch(client, cache, df['track_id'].tolist(), workers=2, rate=1000, top_tracks=True, verbose=False)
+        assert sum(fake.requests.values()) == requests_after_cold
+
+    assert cold['tracks'] == len(df) and cold['artists'] == 19 and cold['top_tracks'] == 19
+    assert cold['calls'] == 3 + 1 + 19
+    assert warm['calls'] == 0
+    assert cache.stats()['track']['entries'] == len(df)
+
+
+def test_rate_limited_calls_are_retried(cache):
+    df = _dataset()
+    with FakeSpotify(df, throttle_every=2, retry_after=0) as fake:
+        report = prefetch(pooled_client(2, fake.url), cache, df['track_id'].tolist(), workers=2, rate=1000,
+                          verbose=False)
+        assert sum(fake.requests.values()) > report['calls']
+    assert len(cache.get_many('track', df['track_id'].tolist())) == len(df)
+
+
+def test_answers_expire_after_their_ttl(cache):
+    cache.put_many('track', {'found': {'id': 'found'}, 'unknown': None}, now=0)
+    assert set(cache.get_many('track', ['found', 'unknown'], now=MISSING_TTL - 1)) == {'found', 'unknown'}
+    # "Not on Spotify" answers are retried after a day, real answers keep their kind's TTL
+    assert set(cache.get_many('track', ['found', 'unknown'], now=MISSING_TTL)) == {'found'}
+    assert cache.get_many('track', ['found'], now=cache.ttls['track']) == {}
+    assert cache.purge_expired(now=MISSING_TTL) == 1
+    assert cache.stats(now=MISSING_TTL)['track'] == {'entries': 1, 'fresh': 1, 'missing': 0}
+
+
+def test_cached_lookups_do_not_call_the_api_again(cache):
+    df = _dataset()
+    with FakeSpotify(df) as fake:
+        cached = CachedSpotify(pooled_client(2, fake.url), cache)
+        first = (cached.search_artist('Artist 3'), cached.track_uri('Song 7'),
+                 cached.tracks(['track0001', 'missing']), cached.artist_top_tracks(cached.search_artist('Artist 3')['id']))
+        requests = dict(fake.requests)
+        again = (cached.search_artist('artist 3'), cached.track_uri('song 7'),
+                 cached.tracks(['track0001', 'missing']), cached.artist_top_tracks(first[0]['id']))
+        assert fake.requests == requests
+
+    assert again == first
+    assert first[1] == 'spotify:track:track0007'
+    assert first[2]['missing'] is None
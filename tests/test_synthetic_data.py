@@ -0,0 +1,9 @@
+import json
+from synthetic_data import SyntheticListeningEvents
+
+
+def test_chunked_json_lines_have_no_blank_lines(tmp_path):
+    path = SyntheticListeningEvents(25, n_users=5, n_tracks=10).write(str(tmp_path / 'events.jsonl'), chunk_size=10)
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 25
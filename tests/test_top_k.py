@@ -0,0 +1,35 @@
+import numpy as np
+from top_k import top_k, top_k_rows
+
+
+def _reference(scores, k, keys=None):
+    keys = np.arange(len(scores)) if keys is None else keys
+    finite = np.flatnonzero(np.isfinite(scores))
+    return finite[np.lexsort((keys[finite], -scores[finite]))][:k]
+
+
+def test_top_k_breaks_ties_by_lower_position():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        scores = rng.integers(0, 5, 300).astype(np.float64)
+        np.testing.assert_array_equal(top_k(scores, 10), _reference(scores, 10))
+
+
+def test_top_k_uses_keys_and_skips_excluded():
+    scores = np.array([1.0, 2.0, 2.0, -np.inf, 2.0])
+    keys = np.array([0, 30, 20, 0, 10])
+    np.testing.assert_array_equal(top_k(scores, 2, keys=keys), [4, 2])
+    np.testing.assert_array_equal(top_k(scores, 10), [1, 2, 4, 0])
+    assert len(top_k(np.full(3, -np.inf), 2)) == 0
+
+
+def test_top_k_rows_matches_top_k():
+    rng = np.random.default_rng(1)
+    scores = rng.integers(0, 4, (40, 200)).astype(np.float32)
+    scores[3] = -np.inf
+    rows = top_k_rows(scores, 10)
+    assert rows.shape == (40, 10)
+    for row in range(40):
+        if row != 3:
+            np.testing.assert_array_equal(rows[row], _reference(scores[row], 10))
+    np.testing.assert_array_equal(rows[3], np.arange(10))